@@ -0,0 +1,138 @@
+"""Admission control for the API: per-IP rate limits, in-flight caps and an upload size cap.
+
+Requests are grouped into endpoint classes by cost. A voice turn (Whisper + LLM +
+TTS) costs far more than a text query, so each class has its own token bucket per
+client IP and its own concurrency gate. The gate is held until the response body
+has been fully sent, so it bounds the Groq and edge-tts calls in flight. Rejections
+are fast: 429 with ``Retry-After`` when a client is over its rate, 503 when a class
+is saturated and its wait queue is full, 413 as soon as an upload passes the size
+limit (before the rest of it is read). WebSocket voice sessions are admitted per
+turn rather than per connection (see ``app.voice.session``).
+
+Behind reverse proxies (``TRUSTED_PROXY_HOPS``) the client is taken from the
+right-hand end of X-Forwarded-For: each proxy appends the address it received the
+request from, so only those last entries can be trusted. Everything to their left
+is whatever the client sent, and using it would give a spoofer a fresh bucket per
+request.
+"""
+
+import json
+import math
+from typing import Optional
+
+from fastapi import HTTPException
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import Settings, get_settings
+from app.core.limits import ConcurrencyGate, OverloadedError, RateLimiter
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+def endpoint_class(path: str) -> Optional[str]:
+    """Cost class of an API path (None for cheap endpoints such as health checks)."""
+    if path.startswith("/api/voice"):
+        return "voice"
+    if path.startswith("/api/query"):
+        return "query"
+    if path.startswith("/api/tts"):
+        return "tts"
+    return None
+
+
+def client_ip(scope: Scope, trusted_hops: int) -> str:
+    """Client address of a request, honoring X-Forwarded-For only as far as ``trusted_hops`` proxies."""
+    client = scope.get("client")
+    peer = client[0] if client else "unknown"
+    if trusted_hops <= 0:
+        return peer
+    values = [v.decode("latin-1") for k, v in scope.get("headers") or [] if k == b"x-forwarded-for"]
+    hops = [hop.strip() for hop in ",".join(values).split(",") if hop.strip()]
+    if not hops:
+        return peer
+    return hops[-min(trusted_hops, len(hops))]
+
+
+async def _reject(send: Send, status: int, detail: str, headers: Optional[dict[str, str]] = None) -> None:
+    body = json.dumps({"detail": detail}).encode("utf-8")
+    raw_headers = [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+    raw_headers += [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()]
+    await send({"type": "http.response.start", "status": status, "headers": raw_headers})
+    await send({"type": "http.response.body", "body": body})
+
+
+class AdmissionMiddleware:
+    """ASGI middleware enforcing rate limits, concurrency caps and the upload size cap."""
+
+    def __init__(self, app: ASGIApp, settings: Optional[Settings] = None) -> None:
+        settings = settings if settings is not None else get_settings()
+        self.app = app
+        burst = settings.rate_limit_burst
+        self._limiters = {
+            "query": RateLimiter(settings.rate_limit_per_minute, burst),
+            "voice": RateLimiter(settings.voice_rate_limit_per_minute, burst),
+            "tts": RateLimiter(settings.tts_rate_limit_per_minute, burst),
+        }
+        queue, timeout = settings.admission_queue_size, settings.admission_queue_timeout_seconds
+        self._gates = {
+            "query": ConcurrencyGate(settings.query_max_concurrency, queue, timeout),
+            "voice": ConcurrencyGate(settings.voice_max_concurrency, queue, timeout),
+            "tts": ConcurrencyGate(settings.tts_max_concurrency, queue, timeout),
+        }
+        self._max_body = settings.max_upload_size_mb * 1024 * 1024
+        self._max_body_mb = settings.max_upload_size_mb
+        self._trusted_hops = settings.trusted_proxy_hops
+
+    def _limit_body(self, receive: Receive) -> Receive:
+        """Wrap ``receive`` to abort with 413 as soon as the body passes the limit."""
+        received = 0
+
+        async def limited() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self._max_body:
+                    raise HTTPException(413, f"Upload too large. Max {self._max_body_mb}MB")
+            return message
+
+        return limited
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if self._trusted_hops > 0 and scope["type"] in ("http", "websocket"):
+            # Downstream code (logs, voice sessions) sees the same client as the limiter
+            client = scope.get("client")
+            scope["client"] = (client_ip(scope, self._trusted_hops), client[1] if client else 0)
+        if scope["type"] == "websocket" and endpoint_class(scope["path"]) == "voice":
+            # A voice session is long-lived; it admits each turn itself with the same limits
+            scope.setdefault("state", {}).update(voice_limiter=self._limiters["voice"], voice_gate=self._gates["voice"])
+            await self.app(scope, receive, send)
+            return
+        cls = endpoint_class(scope["path"]) if scope["type"] == "http" else None
+        if cls is None:
+            await self.app(scope, receive, send)
+            return
+
+        retry_after = self._limiters[cls].acquire(client_ip(scope, 0))
+        if retry_after:
+            await _reject(send, 429, "Too many requests", {"Retry-After": str(math.ceil(retry_after))})
+            return
+
+        headers = dict(scope.get("headers") or [])
+        length = headers.get(b"content-length")
+        if length is not None and length.isdigit() and int(length) > self._max_body:
+            await _reject(send, 413, f"Upload too large. Max {self._max_body_mb}MB")
+            return
+
+        gate = self._gates[cls]
+        try:
+            await gate.acquire()
+        except OverloadedError as e:
+            logger.warning("Rejecting %s request (%s in flight, %s waiting): %s", cls, gate.active, gate.waiting, e)
+            await _reject(send, 503, "Server busy, please retry", {"Retry-After": "1"})
+            return
+        try:
+            await self.app(scope, self._limit_body(receive), send)
+        finally:
+            gate.release()
@@ -0,0 +1,43 @@
+"""FastAPI dependencies exposing the application-scoped services."""
+
+from typing import Optional
+
+from fastapi import Request
+from starlette.requests import HTTPConnection
+
+from app.core.container import ServiceContainer, get_container
+from app.core.health import HealthMonitor
+from app.core.warmup import WarmupState
+from app.rag.chain import RAGChain
+
+
+def get_services(conn: HTTPConnection) -> ServiceContainer:
+    """The container built in the lifespan hook (built on demand if lifespan did not run).
+
+    Takes an ``HTTPConnection`` so WebSocket routes can depend on it too.
+    """
+    services = getattr(conn.app.state, "services", None)
+    if services is None:
+        services = get_container()
+        conn.app.state.services = services
+    return services
+
+
+def get_chain(conn: HTTPConnection) -> RAGChain:
+    """The shared RAG chain."""
+    return get_services(conn).chain
+
+
+def get_warmup_state(request: Request) -> Optional[WarmupState]:
+    """Startup warm-up progress (None when the lifespan hook did not run)."""
+    return getattr(request.app.state, "warmup", None)
+
+
+def get_health_monitor(request: Request) -> HealthMonitor:
+    """The background health monitor (an idle one, checked on demand, if lifespan did not run)."""
+    monitor = getattr(request.app.state, "health", None)
+    if monitor is None:
+        services = get_services(request)
+        monitor = HealthMonitor(services, services.settings.health_check_interval_seconds)
+        request.app.state.health = monitor
+    return monitor
@@ -1,56 +1,134 @@
-"""API routes: /query, /voice-query, /health."""
+"""API routes: /query, /voice-query, /tts, /health, /ready, plus /metrics."""
 
 import json as _json
+from typing import Optional
 
-from fastapi import APIRouter, File, Form, HTTPException, UploadFile
-from fastapi.responses import Response, StreamingResponse, PlainTextResponse
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Request, UploadFile, WebSocket
+from fastapi.responses import JSONResponse, Response, StreamingResponse, PlainTextResponse
 
+from app.api.deps import get_chain, get_health_monitor, get_services, get_warmup_state
 from app.core.config import get_settings
+from app.core.container import ServiceContainer
+from app.core.health import HealthMonitor
+from app.core.resilience import breaker_states
+from app.core.warmup import WarmupState
 from app.models.schemas import (
+    ComponentStatus,
     HealthResponse,
     QueryRequest,
     QueryResponse,
     VoiceQueryResponse,
 )
 from app.rag.chain import RAGChain
-from app.services.vector_service import get_vector_service
+from app.utils.logging import get_logger
+from app.utils.metrics import REGISTRY, current_timings, render_gauges
+from app.voice.session import VoiceSession
+from app.voice.tts_cache import get_tts_cache
+from app.voice.streaming import speak_tokens
 from app.voice.stt import transcribe_bytes_async
-from app.voice.tts import synthesize_async
+from app.voice.tts import as_file, cache_key as tts_cache_key, file_extension, file_media_type, stream_file, synthesize_cached
+
+logger = get_logger(__name__)
 
 router = APIRouter(prefix="/api", tags=["api"])
+metrics_router = APIRouter(tags=["metrics"])
+
+# TTS audio is content-addressed (voice + text), so clients may reuse it freely
+TTS_CACHE_CONTROL = "public, max-age=604800, immutable"
+
+
+def _tts_headers(key: str) -> dict[str, str]:
+    return {"ETag": f'"{key}"', "Cache-Control": TTS_CACHE_CONTROL}
+
+
+def _attachment_headers(key: str) -> dict[str, str]:
+    return {"Content-Disposition": f"attachment; filename=response.{file_extension()}", **_tts_headers(key)}
+
+
+async def _tts_response(request: Request, text: str) -> Response:
+    """Playable audio (``TTS_FORMAT``) for ``text`` via the TTS cache, honoring If-None-Match before synthesizing."""
+    key = tts_cache_key(text)
+    headers = _tts_headers(key)
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=304, headers=headers)
+    audio_bytes, _ = await synthesize_cached(text)
+    return Response(content=as_file(audio_bytes), media_type=file_media_type(), headers=headers)
+
+
+UPLOAD_CHUNK_BYTES = 64 * 1024
+
+
+async def _read_audio(audio: UploadFile) -> bytes:
+    """Read an upload in chunks, stopping with 413 as soon as it passes the size limit."""
+    settings = get_settings()
+    max_bytes = settings.max_upload_size_mb * 1024 * 1024
+    buf = bytearray()
+    while chunk := await audio.read(UPLOAD_CHUNK_BYTES):
+        buf += chunk
+        if len(buf) > max_bytes:
+            raise HTTPException(413, f"Audio too large. Max {settings.max_upload_size_mb}MB")
+    if not buf:
+        raise HTTPException(400, "Empty audio file")
+    return bytes(buf)
+
+
+def _sse(payload: dict) -> str:
+    """Format one Server-Sent Event."""
+    return f"data: {_json.dumps(payload)}\n\n"
+
+
+def _timing_event() -> str:
+    """Final SSE event with this request's per-stage timings (same numbers as Server-Timing)."""
+    timings = current_timings()
+    return _sse({"type": "timing", **(timings.to_dict() if timings else {})})
+
+
+async def _as_tokens(result):
+    """Normalize a chain result (full text or token iterator) to a token iterator."""
+    if hasattr(result, "__aiter__"):
+        async for token in result:
+            yield token
+    else:
+        yield result
+
+
+async def _answer_events(tokens, tts: bool):
+    """Token events, plus inline sentence-by-sentence audio when server-side TTS is on."""
+    if tts:
+        async for evt in speak_tokens(tokens):
+            yield _sse(evt)
+    else:
+        async for token in tokens:
+            yield _sse({"type": "token", "text": token})
 
 
 @router.post("/query", response_model=QueryResponse)
-async def query(request: QueryRequest):
+async def query(request: QueryRequest, chain: RAGChain = Depends(get_chain)):
     """Text query: RAG -> answer."""
-    chain = RAGChain()
     answer, sources = await chain.query_full(request.query)
     return QueryResponse(answer=answer, sources=sources)
 
 
 @router.post("/query/stream")
-async def query_stream(request: QueryRequest):
+async def query_stream(request: QueryRequest, chain: RAGChain = Depends(get_chain)):
     """Text query with streaming response."""
-    chain = RAGChain()
     result = await chain.query(request.query, stream=True)
     if hasattr(result, "__aiter__"):
         async def gen():
-            async for token in result:
-                yield token
+            try:
+                async for token in result:
+                    yield token
+            except Exception as e:
+                # Plain text has no error event: end the body cleanly with what was sent
+                logger.error("Query stream failed mid-answer: %s", e)
         return StreamingResponse(gen(), media_type="text/plain")
     return PlainTextResponse(result)
 
 
 @router.post("/voice-query", response_model=VoiceQueryResponse)
-async def voice_query(audio: UploadFile = File(...)):
+async def voice_query(audio: UploadFile = File(...), chain: RAGChain = Depends(get_chain)):
     """Voice query: audio -> STT -> RAG -> return text + answer."""
-    settings = get_settings()
-    max_bytes = settings.max_upload_size_mb * 1024 * 1024
-    content = await audio.read()
-    if len(content) > max_bytes:
-        raise HTTPException(400, f"Audio too large. Max {settings.max_upload_size_mb}MB")
-    if not content:
-        raise HTTPException(400, "Empty audio file")
+    content = await _read_audio(audio)
 
     text = await transcribe_bytes_async(content)
     if not text:
@@ -59,33 +137,34 @@ async def voice_query(audio: UploadFile = File(...)):
             answer="I couldn't understand the audio. Please try again.",
         )
 
-    chain = RAGChain()
     answer, _ = await chain.query_full(text)
     return VoiceQueryResponse(text=text, answer=answer)
 
 
 @router.post("/voice-query/stream")
-async def voice_query_stream(audio: UploadFile = File(...), history: str = Form(default="")):
-    """Voice query: audio -> STT -> RAG stream. Returns SSE."""
-    settings = get_settings()
-    max_bytes = settings.max_upload_size_mb * 1024 * 1024
-    raw = await audio.read()
-    if len(raw) > max_bytes:
-        raise HTTPException(400, f"Audio too large. Max {settings.max_upload_size_mb}MB")
-    if not raw:
-        raise HTTPException(400, "Empty audio file")
+async def voice_query_stream(
+    audio: UploadFile = File(...),
+    history: str = Form(default=""),
+    tts: bool = Form(default=False),
+    chain: RAGChain = Depends(get_chain),
+):
+    """Voice query: audio -> STT -> RAG stream. Returns SSE.
+
+    With ``tts=true`` the server also segments the answer into sentences and streams
+    base64 ``audio`` events (in sentence order) on the same SSE stream.
+    """
+    raw = await _read_audio(audio)
 
     text = await transcribe_bytes_async(raw)
     if not text:
         fallback_msg = "I didn't quite catch that. Could you repeat your question?"
-        transcription_evt = _json.dumps({"type": "transcription", "text": ""})
-        token_evt = _json.dumps({"type": "token", "text": fallback_msg})
-        done_evt = _json.dumps({"type": "done"})
 
         async def empty_gen():
-            yield f"data: {transcription_evt}\n\n"
-            yield f"data: {token_evt}\n\n"
-            yield f"data: {done_evt}\n\n"
+            yield _sse({"type": "transcription", "text": ""})
+            async for evt in _answer_events(_as_tokens(fallback_msg), tts):
+                yield evt
+            yield _timing_event()
+            yield _sse({"type": "done"})
 
         return StreamingResponse(empty_gen(), media_type="text/event-stream")
 
@@ -97,89 +176,127 @@ async def voice_query_stream(audio: UploadFile = File(...), history: str = Form(
         except Exception:
             pass
 
-    chain = RAGChain()
     result = await chain.query(text, stream=True, history=chat_history)
 
-    transcription_evt = _json.dumps({"type": "transcription", "text": text})
-    done_evt = _json.dumps({"type": "done"})
-
     async def gen():
-        yield f"data: {transcription_evt}\n\n"
-        if hasattr(result, "__aiter__"):
-            async for token in result:
-                evt = _json.dumps({"type": "token", "text": token})
-                yield f"data: {evt}\n\n"
-        else:
-            evt = _json.dumps({"type": "token", "text": result})
-            yield f"data: {evt}\n\n"
-        yield f"data: {done_evt}\n\n"
+        yield _sse({"type": "transcription", "text": text})
+        try:
+            async for evt in _answer_events(_as_tokens(result), tts):
+                yield evt
+        except Exception as e:
+            logger.error("Voice stream failed mid-answer: %s", e)
+            yield _sse({"type": "error", "detail": "The answer was interrupted"})
+        yield _timing_event()
+        yield _sse({"type": "done"})
 
     return StreamingResponse(gen(), media_type="text/event-stream")
 
 
+@router.websocket("/voice/ws")
+async def voice_session(websocket: WebSocket, chain: RAGChain = Depends(get_chain)):
+    """Streaming voice conversation: PCM frames in; transcription, tokens and audio out.
+
+    See ``app.voice.session`` for the message protocol.
+    """
+    await VoiceSession(websocket, chain, get_settings()).run()
+
+
 @router.post("/voice-query/audio")
-async def voice_query_audio(audio: UploadFile = File(...)):
-    """Voice query returning MP3 audio response."""
-    settings = get_settings()
-    max_bytes = settings.max_upload_size_mb * 1024 * 1024
-    content = await audio.read()
-    if len(content) > max_bytes:
-        raise HTTPException(400, f"Audio too large. Max {settings.max_upload_size_mb}MB")
-    if not content:
-        raise HTTPException(400, "Empty audio file")
+async def voice_query_audio(audio: UploadFile = File(...), chain: RAGChain = Depends(get_chain)):
+    """Voice query returning an audio response (``TTS_FORMAT``; raw PCM is sent as WAV)."""
+    content = await _read_audio(audio)
 
     text = await transcribe_bytes_async(content)
     if not text:
         fallback = "I couldn't understand the audio. Please try again."
-        mp3_bytes = await synthesize_async(fallback)
-        return StreamingResponse(
-            iter([mp3_bytes]),
-            media_type="audio/mpeg",
-            headers={"Content-Disposition": "attachment; filename=response.mp3"},
-        )
+        audio_bytes, key = await synthesize_cached(fallback)
+        return StreamingResponse(iter([as_file(audio_bytes)]), media_type=file_media_type(), headers=_attachment_headers(key))
 
-    chain = RAGChain()
     answer, _ = await chain.query_full(text)
-    mp3_bytes = await synthesize_async(answer)
+    # Cached answers replay instantly; misses stream from the TTS backend while filling the cache
     return StreamingResponse(
-        iter([mp3_bytes]),
-        media_type="audio/mpeg",
-        headers={"Content-Disposition": "attachment; filename=response.mp3"},
+        stream_file(answer), media_type=file_media_type(), headers=_attachment_headers(tts_cache_key(answer))
     )
 
 
 @router.post("/tts")
-async def text_to_speech(request: QueryRequest):
-    """Convert text to speech. Returns MP3 audio."""
-    if not request.query.strip():
+async def text_to_speech(request: Request, body: QueryRequest):
+    """Convert text to speech. Returns audio in ``TTS_FORMAT`` (raw PCM is sent as WAV)."""
+    if not body.query.strip():
         raise HTTPException(400, "Empty text")
-    mp3_bytes = await synthesize_async(request.query)
-    return Response(content=mp3_bytes, media_type="audio/mpeg")
+    return await _tts_response(request, body.query)
 
 
 @router.post("/tts/sentence")
-async def tts_sentence(request: QueryRequest):
-    """TTS for a single sentence. Returns MP3 audio."""
-    if not request.query.strip():
+async def tts_sentence(request: Request, body: QueryRequest):
+    """TTS for a single sentence. Returns audio in ``TTS_FORMAT`` (raw PCM is sent as WAV)."""
+    if not body.query.strip():
         raise HTTPException(400, "Empty text")
-    mp3_bytes = await synthesize_async(request.query)
-    return Response(content=mp3_bytes, media_type="audio/mpeg")
+    return await _tts_response(request, body.query)
+
+
+@router.get("/tts/sentence")
+async def tts_sentence_get(request: Request, text: str):
+    """Cacheable GET variant of /tts/sentence (browsers reuse it via ETag/Cache-Control)."""
+    if not text.strip():
+        raise HTTPException(400, "Empty text")
+    if len(text) > 2000:
+        raise HTTPException(400, "Text too long")
+    return await _tts_response(request, text)
 
 
 @router.get("/health", response_model=HealthResponse)
-async def health():
-    """Health check: API, Qdrant, Groq LLM."""
-    qdrant_ok = get_vector_service().health_check()
-    llm_ok = False
-    try:
-        from app.services.llm_service import get_llm_service
-        llm_ok = await get_llm_service().warmup()
-    except Exception:
-        pass
-    status = "healthy" if (qdrant_ok and llm_ok) else "degraded"
+async def health(deep: bool = False, monitor: HealthMonitor = Depends(get_health_monitor)):
+    """Health check: API, Qdrant, Groq LLM.
+
+    Serves the background monitor's last result; ``deep=true`` re-checks on demand.
+    """
+    status = monitor.status
+    if deep or not status:
+        status = await monitor.check_now()
+    qdrant_ok = status["qdrant"].ok
+    llm_ok = status["llm"].ok
     return HealthResponse(
-        status=status,
+        status="healthy" if (qdrant_ok and llm_ok) else "degraded",
         api=True,
         qdrant=qdrant_ok,
         llm=llm_ok,
+        components={name: ComponentStatus(**vars(c)) for name, c in status.items()},
+    )
+
+
+@router.get("/ready")
+async def ready(state: Optional[WarmupState] = Depends(get_warmup_state)):
+    """Readiness probe: 503 until every startup warm-up has finished, with per-component timings."""
+    if state is None:
+        return JSONResponse({"ready": False, "components": {}}, status_code=503)
+    return JSONResponse(state.to_dict(), status_code=200 if state.ready else 503)
+
+
+@metrics_router.get("/metrics", response_class=PlainTextResponse)
+async def metrics(services: ServiceContainer = Depends(get_services)):
+    """Prometheus metrics: per-stage latency histograms, cache hit rates and circuit breaker state."""
+    answer = services.answer_cache.stats()
+    embed = services.embeddings.cache_stats()
+    tts = get_tts_cache().stats()
+    tts_hits = tts["hits"] + tts["disk_hits"]
+    tts_misses = tts["misses"] - tts["disk_hits"]
+    caches = {
+        "answer": (answer["hits"], answer["misses"]),
+        "embedding": (embed["hits"], embed["misses"]),
+        "tts": (tts_hits, tts_misses),
+    }
+    body = REGISTRY.render()
+    body += render_gauges("cache_hits", "Cache hits since start", (({"cache": c}, h) for c, (h, _) in caches.items()))
+    body += render_gauges("cache_misses", "Cache misses since start", (({"cache": c}, m) for c, (_, m) in caches.items()))
+    body += render_gauges(
+        "cache_hit_ratio",
+        "Cache hit ratio since start",
+        (({"cache": c}, h / (h + m) if h + m else 0.0) for c, (h, m) in caches.items()),
+    )
+    body += render_gauges(
+        "circuit_open",
+        "1 while a dependency's circuit breaker is failing fast",
+        (({"dependency": name}, 0 if state == "closed" else 1) for name, state in breaker_states().items()),
     )
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4")
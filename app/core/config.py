@@ -21,6 +21,22 @@ class Settings(BaseSettings):
     app_name: str = Field(default="Rahul RAG Voice Assistant", description="Application name")
     debug: bool = Field(default=False, description="Enable debug mode")
     cors_origins: str = Field(default="*", description="CORS allowed origins (comma-separated)")
+    warmup_timeout_seconds: float = Field(
+        default=120.0, description="Max seconds per component warm-up before /api/ready gives up on it"
+    )
+    warmup_retry_max_seconds: float = Field(
+        default=30.0, description="Longest backoff between retries of failed critical warm-ups (doubling from 1s)"
+    )
+    health_check_interval_seconds: float = Field(
+        default=30.0, description="Interval of the background health checks served by /api/health"
+    )
+
+    # Vector store
+    vector_backend: str = Field(default="qdrant", description="Vector backend: qdrant or local")
+    local_index_path: str = Field(
+        default="data/processed/vector_index",
+        description="Directory for the local vector index (relative paths are from the project root)",
+    )
 
     # Qdrant
     qdrant_url: str = Field(
@@ -29,6 +45,9 @@ class Settings(BaseSettings):
     )
     qdrant_collection: str = Field(default="rahul_knowledge", description="Vector collection name")
     qdrant_api_key: Optional[str] = Field(default=None, description="Qdrant API key (required for cloud)")
+    qdrant_timeout: int = Field(default=10, description="Qdrant request timeout in seconds")
+    qdrant_max_connections: int = Field(default=20, description="Max pooled connections for the async Qdrant client")
+    qdrant_keepalive_expiry: float = Field(default=60.0, description="Seconds to keep idle Qdrant connections alive")
 
     # Embeddings (BGE default - no API key required)
     embedding_model: str = Field(
@@ -36,27 +55,155 @@ class Settings(BaseSettings):
         description="Sentence transformer model for embeddings",
     )
     embedding_dim: int = Field(default=384, description="Embedding vector dimension (BGE)")
+    embedding_cache_size: int = Field(default=1024, description="Max cached query embeddings (0 disables)")
+    embedding_cache_ttl_seconds: float = Field(default=3600.0, description="Query embedding cache TTL in seconds")
 
     # Groq LLM
     groq_api_key: Optional[str] = Field(default=None, description="Groq API key")
+    groq_base_url: Optional[str] = Field(
+        default=None, description="Override the Groq API base URL (e.g. a local stand-in for benchmarks)"
+    )
     groq_model: str = Field(default="llama-3.1-8b-instant", description="Groq model ID")
     groq_max_tokens: int = Field(default=200, description="Max tokens for Groq response")
 
     # RAG
     rag_top_k: int = Field(default=5, description="Number of chunks to retrieve")
     rag_score_threshold: float = Field(default=0.3, description="Minimum similarity score for retrieval")
+    context_token_budget: int = Field(default=600, description="Max estimated tokens of retrieved context per prompt")
+    history_token_budget: int = Field(default=300, description="Max estimated tokens of conversation history per prompt")
+    hybrid_search: bool = Field(default=True, description="Fuse BM25 lexical results with dense search")
+    rrf_k: int = Field(default=60, description="Reciprocal-rank fusion constant")
+    bm25_fallback_min_coverage: float = Field(
+        default=0.5, description="Share of query terms a BM25 hit must contain to be used while dense search is down"
+    )
+    bm25_index_path: str = Field(
+        default="data/processed/bm25",
+        description="Directory for BM25 index files (relative paths are from the project root)",
+    )
+    coalesce_queries: bool = Field(
+        default=True, description="Share one pipeline run among identical concurrent queries without history"
+    )
+
+    # Semantic answer cache
+    semantic_cache_size: int = Field(default=256, description="Max cached answers (0 disables)")
+    semantic_cache_ttl_seconds: float = Field(default=1800.0, description="Cached answer TTL in seconds")
+    semantic_cache_threshold: float = Field(default=0.95, description="Min cosine similarity to reuse an answer")
+    semantic_cache_revision_check_seconds: float = Field(
+        default=30.0, description="How often to check the collection for a re-ingest"
+    )
 
-    # STT (Faster-Whisper)
+    # STT (Groq Whisper API, or local Faster-Whisper)
+    stt_backend: str = Field(default="groq", description="STT backend: groq (cloud API) or local (faster-whisper)")
     stt_model_size: str = Field(default="small", description="Whisper model size: tiny, base, small, medium, large")
     stt_device: str = Field(default="cpu", description="Device for STT: cpu or cuda")
     stt_compute_type: str = Field(default="int8", description="Compute type for CPU: int8 or float32")
+    stt_cpu_threads: int = Field(default=0, description="CPU threads per local inference (0 = CTranslate2 default)")
+    stt_workers: int = Field(default=1, description="Local STT inference threads (concurrent batches)")
+    stt_queue_size: int = Field(default=16, description="Utterances allowed to wait for local STT before 503")
+    stt_batch_size: int = Field(default=4, description="Max short utterances decoded together by local STT (1 disables)")
+    stt_batch_max_seconds: float = Field(default=15.0, description="Longer utterances are transcribed on their own")
+    stt_trim_silence: bool = Field(
+        default=True,
+        description="Trim silence and resample WAV input to 16 kHz mono before STT; skip STT when there is no speech",
+    )
+    stt_vad_threshold: float = Field(
+        default=0.01, description="Frame RMS (0-1) counted as speech when trimming (below the live VAD, to keep quiet speech)"
+    )
+    stt_vad_padding_ms: int = Field(default=200, description="Audio kept around the detected speech when trimming")
 
-    # TTS (edge-tts, free Microsoft Neural voices)
+    # Voice WebSocket sessions (/api/voice/ws) and server-side VAD
+    voice_ws_sample_rate: int = Field(
+        default=16000, description="Default PCM sample rate of /api/voice/ws (a client's start message may override it)"
+    )
+    voice_ws_max_utterance_seconds: float = Field(
+        default=30.0, description="Longest utterance buffered before the turn is ended anyway"
+    )
+    voice_ws_history_messages: int = Field(default=10, description="Conversation messages a session remembers")
+    vad_energy_threshold: float = Field(default=0.02, description="Frame RMS (0-1) above which a frame counts as speech")
+    vad_frame_ms: int = Field(default=20, description="VAD frame length in milliseconds")
+    vad_min_speech_ms: int = Field(default=120, description="Voiced audio needed to start an utterance")
+    vad_silence_ms: int = Field(default=600, description="Trailing silence that ends an utterance")
+    vad_preroll_ms: int = Field(default=300, description="Audio kept from before the detected start of speech")
+    vad_pause_ms: int = Field(
+        default=250, description="Pause within an utterance that triggers a partial transcript (0 disables)"
+    )
+    voice_ws_partials: bool = Field(
+        default=False,
+        description="Transcribe at mid-utterance pauses (partial transcripts, speculative retrieval); "
+        "each pause is an extra STT call, so leave off with the billed Groq backend",
+    )
+    speculative_retrieval: bool = Field(
+        default=True, description="Start retrieval on a partial transcript while the user is still finishing"
+    )
+    speculative_match_threshold: float = Field(
+        default=0.9, description="Min word similarity between partial and final transcript to reuse early retrieval"
+    )
+    vad_barge_in_factor: float = Field(
+        default=2.0, description="Threshold multiplier while an answer is playing, so its echo does not barge in"
+    )
+
+    # TTS (edge-tts, free Microsoft Neural voices, or local Piper voices)
+    tts_backend: str = Field(default="edge", description="TTS backend: edge (edge-tts, cloud) or piper (local CPU)")
     tts_voice: str = Field(default="en-IN-PrabhatNeural", description="edge-tts voice name")
+    tts_format: str = Field(
+        default="",
+        description="TTS audio sent to clients: mp3, opus (Ogg), wav or pcm (16-bit mono little-endian); "
+        "empty uses the backend's own (mp3 for edge, wav for piper), which needs no ffmpeg",
+    )
+    tts_sample_rate: int = Field(default=24000, description="Sample rate of pcm (and edge-tts wav) TTS output")
+    tts_bitrate: str = Field(default="48k", description="Bitrate of mp3/opus audio encoded by ffmpeg")
+    tts_ffmpeg_path: str = Field(default="ffmpeg", description="ffmpeg binary, needed when TTS_FORMAT is not the engine's own")
+    tts_piper_model: str = Field(
+        default="data/models/piper/en_US-lessac-medium.onnx",
+        description="Piper voice model (.onnx, with its .onnx.json next to it; relative paths are from the project root)",
+    )
+    tts_pool_size: int = Field(default=2, description="Preloaded Piper voices, each with its own worker thread")
+    tts_cache_dir: str = Field(
+        default="data/processed/tts_cache",
+        description="On-disk TTS cache directory (relative paths are from the project root)",
+    )
+    tts_cache_memory_items: int = Field(default=256, description="TTS clips kept in memory (0 disables)")
+    tts_cache_disk_max_mb: int = Field(default=200, description="TTS disk cache budget in MB (0 disables)")
 
     # Security & Limits
     max_upload_size_mb: int = Field(default=10, description="Max audio upload size in MB")
-    rate_limit_per_minute: int = Field(default=60, description="Rate limit per minute per IP")
+    rate_limit_per_minute: int = Field(
+        default=60, description="Text query requests per minute per IP (0 disables)"
+    )
+    voice_rate_limit_per_minute: int = Field(default=12, description="Voice requests (STT + LLM + TTS) per minute per IP (0 disables)")
+    tts_rate_limit_per_minute: int = Field(default=120, description="TTS requests per minute per IP (0 disables)")
+    rate_limit_burst: int = Field(default=5, description="Requests a client may burst above its sustained rate")
+    trusted_proxy_hops: int = Field(
+        default=0,
+        description="Reverse proxies in front of the app; the client IP is the X-Forwarded-For entry the "
+        "outermost one appended (0 ignores the header and uses the socket peer)",
+    )
+    query_max_concurrency: int = Field(default=32, description="Text queries in flight (0 = unlimited)")
+    voice_max_concurrency: int = Field(default=8, description="Voice requests in flight (0 = unlimited)")
+    tts_max_concurrency: int = Field(default=16, description="TTS requests in flight (0 = unlimited)")
+    admission_queue_size: int = Field(default=32, description="Requests per class allowed to wait for a slot")
+    admission_queue_timeout_seconds: float = Field(
+        default=2.0, description="Max wait for a slot before answering 503"
+    )
+
+    # Resilience
+    voice_turn_budget_seconds: float = Field(
+        default=8.0, description="Total latency budget of a turn; stage deadlines are capped by what is left"
+    )
+    llm_timeout_seconds: float = Field(default=5.0, description="Max wait for the LLM's first token (or full answer)")
+    llm_stall_timeout_seconds: float = Field(default=3.0, description="Max gap between streamed LLM tokens")
+    search_timeout_seconds: float = Field(default=1.5, description="Max seconds per vector search attempt")
+    stt_timeout_seconds: float = Field(default=4.0, description="Max seconds per transcription attempt")
+    retry_attempts: int = Field(default=2, description="Attempts per idempotent upstream call (1 disables retries)")
+    retry_base_delay_seconds: float = Field(default=0.1, description="Base of the jittered exponential retry backoff")
+    retry_max_delay_seconds: float = Field(default=1.0, description="Cap of the retry backoff")
+    circuit_failure_threshold: int = Field(
+        default=5, description="Consecutive transient failures that open a dependency's circuit (0 disables)"
+    )
+    circuit_reset_seconds: float = Field(default=30.0, description="Seconds an open circuit fails fast before a trial call")
+    degraded_cache_threshold: float = Field(
+        default=0.85, description="Min similarity to serve a cached (possibly expired) answer while the LLM is down"
+    )
 
 
 @lru_cache
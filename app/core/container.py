@@ -0,0 +1,74 @@
+"""Application-scoped service container.
+
+Everything the request path needs (settings, embedding model, vector store, LLM client,
+answer cache, retriever, RAG chain) is constructed once, in the FastAPI lifespan hook,
+and handed to routes through dependencies in ``app.api.deps``. Scripts and tests that
+run outside the app can call ``get_container()`` directly.
+"""
+
+import threading
+from dataclasses import dataclass
+from typing import Optional
+
+from app.core.config import Settings, get_settings
+from app.rag.answer_cache import SemanticAnswerCache, get_answer_cache
+from app.rag.chain import RAGChain
+from app.rag.embeddings import EmbeddingService, get_embedding_service
+from app.rag.retriever import Retriever
+from app.services.llm_service import LLMService, get_llm_service
+from app.services.local_vector_service import LocalVectorService
+from app.services.vector_service import VectorService, get_vector_service
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass(frozen=True)
+class ServiceContainer:
+    """Long-lived services shared by every request."""
+
+    settings: Settings
+    embeddings: EmbeddingService
+    vectors: VectorService | LocalVectorService
+    llm: LLMService
+    answer_cache: SemanticAnswerCache
+    retriever: Retriever
+    chain: RAGChain
+
+    @classmethod
+    def build(cls) -> "ServiceContainer":
+        """Wire the services together (cheap: models and clients load lazily)."""
+        settings = get_settings()
+        embeddings = get_embedding_service()
+        vectors = get_vector_service()
+        llm = get_llm_service()
+        answer_cache = get_answer_cache()
+        retriever = Retriever(settings, embeddings, vectors)
+        chain = RAGChain(
+            settings,
+            retriever=retriever,
+            llm=llm,
+            embedding_svc=embeddings,
+            vector_svc=vectors,
+            cache=answer_cache,
+        )
+        logger.info("Service container ready (vector backend: %s)", settings.vector_backend)
+        return cls(settings, embeddings, vectors, llm, answer_cache, retriever, chain)
+
+    async def aclose(self) -> None:
+        """Release network clients and persist pending index changes."""
+        await self.vectors.close_async()
+
+
+_container: Optional[ServiceContainer] = None
+_container_lock = threading.Lock()
+
+
+def get_container() -> ServiceContainer:
+    """Get or build the process-wide service container."""
+    global _container
+    if _container is None:
+        with _container_lock:
+            if _container is None:
+                _container = ServiceContainer.build()
+    return _container
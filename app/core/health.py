@@ -0,0 +1,94 @@
+"""Background health monitor: probes dependencies on an interval, serves the last result.
+
+``/api/health`` returns the cached snapshot (O(1), no outbound calls), so load balancer
+probes never touch Groq or Qdrant. ``?deep=true`` runs the checks on demand.
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Optional
+
+from app.core.container import ServiceContainer
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+CHECK_TIMEOUT_SECONDS = 5.0
+
+
+@dataclass
+class ComponentHealth:
+    """Last probe result for one dependency."""
+
+    ok: bool
+    latency_ms: float
+    checked_at: float
+    error: Optional[str] = None
+
+
+class HealthMonitor:
+    """Periodically checks the vector store and LLM and caches the results."""
+
+    def __init__(self, services: ServiceContainer, interval_seconds: float) -> None:
+        self._checks: dict[str, Callable[[], Awaitable[bool]]] = {
+            "qdrant": services.vectors.health_check_async,
+            "llm": services.llm.health_check_async,
+        }
+        self._interval = interval_seconds
+        self._status: dict[str, ComponentHealth] = {}
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def status(self) -> dict[str, ComponentHealth]:
+        return self._status
+
+    async def _probe(self, name: str, check: Callable[[], Awaitable[bool]]) -> ComponentHealth:
+        start = time.perf_counter()
+        error = None
+        try:
+            ok = bool(await asyncio.wait_for(check(), CHECK_TIMEOUT_SECONDS))
+        except asyncio.TimeoutError:
+            ok, error = False, f"timed out after {CHECK_TIMEOUT_SECONDS:.0f}s"
+        except Exception as e:
+            ok, error = False, str(e)
+        return ComponentHealth(
+            ok=ok,
+            latency_ms=(time.perf_counter() - start) * 1000,
+            checked_at=time.time(),
+            error=error,
+        )
+
+    async def check_now(self) -> dict[str, ComponentHealth]:
+        """Probe every component concurrently and store the results."""
+        # Concurrent deep checks share one round of probes instead of stacking up
+        if self._lock.locked():
+            async with self._lock:
+                return self._status
+        async with self._lock:
+            names = list(self._checks)
+            results = await asyncio.gather(*(self._probe(n, self._checks[n]) for n in names))
+            self._status = dict(zip(names, results))
+        return self._status
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.check_now()
+            except Exception as e:
+                logger.warning("Health monitor iteration failed: %s", e)
+            await asyncio.sleep(self._interval)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,100 @@
+"""Admission-control primitives: per-client token buckets and bounded concurrency gates."""
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Hashable
+
+
+class RateLimiter:
+    """Token bucket per key (e.g. client IP): ``per_minute`` sustained, bursts up to ``burst``.
+
+    Buckets live in an LRU bounded by ``max_keys``; an evicted key simply starts over
+    with a full bucket, which only ever errs on the side of admitting.
+    """
+
+    def __init__(self, per_minute: float, burst: int, max_keys: int = 10000) -> None:
+        self._rate = per_minute / 60.0
+        self._burst = float(max(1, burst))
+        self._max_keys = max_keys
+        self._buckets: OrderedDict[Hashable, tuple[float, float]] = OrderedDict()  # key -> (tokens, updated)
+
+    @property
+    def enabled(self) -> bool:
+        return self._rate > 0
+
+    def acquire(self, key: Hashable, cost: float = 1.0) -> float:
+        """Take ``cost`` tokens. Returns 0 when admitted, else seconds until enough refill."""
+        if not self.enabled:
+            return 0.0
+        now = time.monotonic()
+        tokens, updated = self._buckets.pop(key, (self._burst, now))
+        tokens = min(self._burst, tokens + (now - updated) * self._rate)
+        wait = 0.0
+        if tokens >= cost:
+            tokens -= cost
+        else:
+            wait = (cost - tokens) / self._rate
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self._max_keys:
+            self._buckets.popitem(last=False)
+        return wait
+
+
+class OverloadedError(Exception):
+    """A concurrency gate is saturated and its wait queue is full (or the wait timed out)."""
+
+
+class ConcurrencyGate:
+    """At most ``limit`` holders at once; up to ``max_waiting`` more queue for ``timeout`` seconds.
+
+    Anything beyond that is rejected immediately, so overload turns into fast 503s
+    instead of an unbounded backlog of requests all waiting on the same upstream.
+    """
+
+    def __init__(self, limit: int, max_waiting: int, timeout: float) -> None:
+        self._limit = limit
+        self._semaphore = asyncio.Semaphore(max(1, limit))
+        self._max_waiting = max_waiting
+        self._timeout = timeout
+        self._waiting = 0
+        self._active = 0
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    @property
+    def waiting(self) -> int:
+        return self._waiting
+
+    async def acquire(self) -> None:
+        """Take a slot, waiting in the bounded queue if needed; raises OverloadedError."""
+        if self._limit <= 0:
+            return
+        if self._semaphore.locked():
+            if self._waiting >= self._max_waiting:
+                raise OverloadedError("queue full")
+            self._waiting += 1
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), self._timeout)
+            except asyncio.TimeoutError:
+                raise OverloadedError(f"no slot within {self._timeout:.1f}s") from None
+            finally:
+                self._waiting -= 1
+        else:
+            await self._semaphore.acquire()
+        self._active += 1
+
+    def release(self) -> None:
+        if self._limit <= 0:
+            return
+        self._active -= 1
+        self._semaphore.release()
+
+    async def __aenter__(self) -> "ConcurrencyGate":
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        self.release()
@@ -0,0 +1,195 @@
+"""Deadlines, retries and circuit breakers for calls to Groq and the vector store.
+
+A voice turn has a total latency budget (``voice_turn_budget_seconds``). Each stage
+gets ``min(stage timeout, time left in the turn)``, so a slow provider can never hold
+a request past the budget. Idempotent calls are retried on transient errors with
+full-jitter exponential backoff, but only while the budget allows. A per-dependency
+circuit breaker opens after consecutive transient failures and fails fast until a
+trial call succeeds, so callers can fall back (cached answers, BM25-only retrieval)
+at once instead of waiting on timeouts.
+"""
+
+import asyncio
+import random
+import time
+from contextvars import ContextVar
+from typing import Awaitable, Callable, Optional, TypeVar
+
+import httpx
+from groq import APIConnectionError
+from qdrant_client.http.exceptions import ResponseHandlingException
+
+from app.core.config import get_settings
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+
+class DeadlineExceeded(asyncio.TimeoutError):
+    """The turn's latency budget is spent."""
+
+
+class CircuitOpenError(Exception):
+    """The dependency's circuit breaker is open: failing fast without calling it."""
+
+
+# -- deadlines ----------------------------------------------------------------
+
+_deadline: ContextVar[Optional[float]] = ContextVar("turn_deadline", default=None)
+
+
+def start_turn(budget_seconds: Optional[float] = None) -> float:
+    """Start the latency budget for the current request; returns the absolute deadline."""
+    if budget_seconds is None:
+        budget_seconds = get_settings().voice_turn_budget_seconds
+    deadline = time.monotonic() + budget_seconds
+    _deadline.set(deadline)
+    return deadline
+
+
+def remaining() -> Optional[float]:
+    """Seconds left in the current turn (None outside a turn)."""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def stage_timeout(limit: float) -> float:
+    """Timeout for one stage: its own limit, capped by what is left of the turn."""
+    left = remaining()
+    if left is None:
+        return limit
+    if left <= 0:
+        raise DeadlineExceeded("voice turn budget exhausted")
+    return min(limit, left)
+
+
+# -- circuit breaker ----------------------------------------------------------
+
+
+class CircuitBreaker:
+    """Closed -> open after ``threshold`` consecutive failures -> half-open after ``reset_seconds``.
+
+    In half-open state a single trial call is let through (another one only if it
+    never reports back, e.g. was cancelled); success closes the circuit, failure
+    re-opens it for another ``reset_seconds``.
+    """
+
+    def __init__(self, name: str, threshold: int, reset_seconds: float) -> None:
+        self.name = name
+        self._threshold = threshold
+        self._reset = reset_seconds
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_at: Optional[float] = None
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self._reset:
+            return "half_open"
+        return "open"
+
+    def before_call(self) -> None:
+        """Raise CircuitOpenError unless a call may proceed."""
+        state = self.state
+        if state == "closed" or self._threshold <= 0:
+            return
+        now = time.monotonic()
+        if state == "half_open" and (self._trial_at is None or now - self._trial_at >= self._reset):
+            self._trial_at = now
+            return
+        raise CircuitOpenError(f"{self.name} circuit is open")
+
+    def record_success(self) -> None:
+        if self._opened_at is not None:
+            logger.info("%s circuit closed", self.name)
+        self._failures = 0
+        self._opened_at = None
+        self._trial_at = None
+
+    def release_trial(self) -> None:
+        """The call was cut short by our own deadline: no verdict on the dependency."""
+        self._trial_at = None
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        self._trial_at = None
+        if self._threshold > 0 and (self._opened_at is not None or self._failures >= self._threshold):
+            if self._opened_at is None:
+                logger.warning("%s circuit opened after %d failures", self.name, self._failures)
+            self._opened_at = time.monotonic()
+
+
+_breakers: dict[str, CircuitBreaker] = {}
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """Process-wide breaker for a dependency ("llm", "stt", "vector_store")."""
+    breaker = _breakers.get(name)
+    if breaker is None:
+        settings = get_settings()
+        breaker = _breakers.setdefault(
+            name, CircuitBreaker(name, settings.circuit_failure_threshold, settings.circuit_reset_seconds)
+        )
+    return breaker
+
+
+def breaker_states() -> dict[str, str]:
+    return {name: b.state for name, b in _breakers.items()}
+
+
+# -- retries ------------------------------------------------------------------
+
+
+def is_transient(exc: BaseException) -> bool:
+    """Errors worth retrying: timeouts, connection failures, 429 and 5xx responses."""
+    if isinstance(exc, (asyncio.TimeoutError, ConnectionError, httpx.TransportError, APIConnectionError)):
+        return True
+    if isinstance(exc, ResponseHandlingException):
+        return True
+    status = getattr(exc, "status_code", None)
+    return isinstance(status, int) and (status == 429 or status >= 500)
+
+
+async def call_with_policy(
+    fn: Callable[[], Awaitable[T]],
+    breaker: CircuitBreaker,
+    timeout: float,
+    attempts: Optional[int] = None,
+) -> T:
+    """Run ``fn`` under the breaker, a per-attempt deadline, and jittered retries."""
+    settings = get_settings()
+    attempts = attempts if attempts is not None else settings.retry_attempts
+    for attempt in range(1, max(1, attempts) + 1):
+        # Raises DeadlineExceeded / CircuitOpenError without touching the dependency
+        attempt_timeout = stage_timeout(timeout)
+        breaker.before_call()
+        try:
+            result = await asyncio.wait_for(fn(), attempt_timeout)
+        except Exception as e:
+            if isinstance(e, DeadlineExceeded) or (isinstance(e, asyncio.TimeoutError) and attempt_timeout < timeout):
+                # The turn budget ran out before the dependency's own limit: not its failure
+                breaker.release_trial()
+                if isinstance(e, DeadlineExceeded):
+                    raise
+                raise DeadlineExceeded("voice turn budget exhausted") from e
+            if not is_transient(e):
+                # The dependency answered (e.g. 400): not a sign it is unhealthy
+                breaker.record_success()
+                raise
+            breaker.record_failure()
+            delay = random.uniform(
+                0, min(settings.retry_max_delay_seconds, settings.retry_base_delay_seconds * 2 ** (attempt - 1))
+            )
+            left = remaining()
+            if attempt >= attempts or breaker.state == "open" or (left is not None and left <= delay):
+                raise
+            logger.info("%s call failed (%r); retry %d/%d in %.2fs", breaker.name, e, attempt, attempts - 1, delay)
+            await asyncio.sleep(delay)
+            continue
+        breaker.record_success()
+        return result
+    raise AssertionError("unreachable")
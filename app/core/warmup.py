@@ -0,0 +1,125 @@
+"""Concurrent startup warm-up and readiness state for ``/api/ready``.
+
+Each component (embedding model, vector store connection, LLM, STT, TTS) is warmed in
+parallel so startup costs the slowest one rather than the sum. Until every warm-up has
+finished, and the components no request can do without (embedding model, vector store)
+are ok, the instance reports not-ready, so a rolling deploy only routes traffic to warm,
+working instances. Other failures (e.g. TTS) are listed but do not block readiness.
+
+A critical failure is not final: the failed checks are retried in the background with
+exponential backoff until the critical ones pass, so an instance that booted during a
+short vector store outage joins the rotation once it is back.
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Optional
+
+from app.core.container import ServiceContainer
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Every query needs these; an instance without them must not take traffic
+CRITICAL_COMPONENTS = ("embeddings", "vector_store")
+RETRY_BASE_SECONDS = 1.0
+
+
+@dataclass
+class ComponentWarmup:
+    """Outcome of warming one component."""
+
+    ok: bool = False
+    seconds: float = 0.0
+    error: Optional[str] = None
+
+
+@dataclass
+class WarmupState:
+    """Readiness of this instance, filled in by ``run_warmup``."""
+
+    started_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+    components: dict[str, ComponentWarmup] = field(default_factory=dict)
+
+    @property
+    def failed(self) -> list[str]:
+        return [name for name, c in self.components.items() if not c.ok]
+
+    @property
+    def ready(self) -> bool:
+        if self.finished_at is None:
+            return False
+        return all(name in self.components and self.components[name].ok for name in CRITICAL_COMPONENTS)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "failed": self.failed,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "components": {
+                name: {"ok": c.ok, "seconds": round(c.seconds, 3), "error": c.error}
+                for name, c in self.components.items()
+            },
+        }
+
+
+async def _timed(
+    name: str,
+    check: Callable[[], Awaitable[bool]],
+    state: WarmupState,
+    timeout: float,
+) -> None:
+    component = state.components.setdefault(name, ComponentWarmup())
+    component.ok, component.error = False, None
+    start = time.perf_counter()
+    try:
+        component.ok = bool(await asyncio.wait_for(check(), timeout))
+    except asyncio.TimeoutError:
+        component.error = f"timed out after {timeout:.0f}s"
+    except Exception as e:
+        component.error = str(e)
+    component.seconds = time.perf_counter() - start
+    logger.info(
+        "Warm-up %s: %s in %.2fs%s",
+        name,
+        "ok" if component.ok else "failed",
+        component.seconds,
+        f" ({component.error})" if component.error else "",
+    )
+
+
+async def run_warmup(services: ServiceContainer, state: WarmupState) -> WarmupState:
+    """Warm every component concurrently, then retry failures until the critical ones pass."""
+    from app.rag.bm25 import ensure_bm25_index
+    from app.voice.stt import warmup as stt_warmup
+    from app.voice.tts import warmup as tts_warmup
+
+    checks: dict[str, Callable[[], Awaitable[bool]]] = {
+        "embeddings": services.embeddings.warmup_async,
+        "vector_store": services.vectors.health_check_async,
+        "bm25": lambda: ensure_bm25_index(services.vectors),
+        "llm": services.llm.warmup,
+        "stt": stt_warmup,
+        "tts": tts_warmup,
+    }
+    timeout = services.settings.warmup_timeout_seconds
+    await asyncio.gather(*(_timed(name, check, state, timeout) for name, check in checks.items()))
+    state.finished_at = time.time()
+    logger.info("Warm-up finished in %.2fs", state.finished_at - state.started_at)
+    delay = RETRY_BASE_SECONDS
+    while not state.ready:
+        critical = [name for name in state.failed if name in CRITICAL_COMPONENTS]
+        logger.error(
+            "Not ready: critical components failed to warm up: %s (retrying in %.0fs)", ", ".join(critical), delay
+        )
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, services.settings.warmup_retry_max_seconds)
+        # Retry every failed check: the non-critical ones (e.g. bm25) often failed for the same reason
+        failed = state.failed
+        await asyncio.gather(*(_timed(name, checks[name], state, timeout) for name in failed))
+        if state.ready:
+            logger.info("Ready after retrying %s", ", ".join(failed))
+    return state
@@ -1,37 +1,56 @@
 """FastAPI application entry point."""
 
+import asyncio
+import time
 from contextlib import asynccontextmanager
 from pathlib import Path
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse
 
-from app.api.routes import router as api_router
+from app.api.admission import AdmissionMiddleware, endpoint_class
+from app.api.routes import metrics_router, router as api_router
 from app.core.config import get_settings
+from app.core.container import get_container
+from app.core.health import HealthMonitor
+from app.core.limits import OverloadedError
+from app.core.resilience import start_turn
+from app.core.warmup import WarmupState, run_warmup
 from app.utils.logging import get_logger, setup_logging
+from app.utils.metrics import HTTP_REQUEST_SECONDS, start_request
+from app.voice.stt import aclose as close_stt
+from app.voice.tts import aclose as close_tts
+from app.voice.tts_backends import get_tts_backend
 
 settings = get_settings()
 setup_logging("DEBUG" if settings.debug else "INFO")
 logger = get_logger(__name__)
 
 STATIC_DIR = Path(__file__).parent / "static"
+API_PATHS = frozenset(route.path for route in api_router.routes)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan: startup and shutdown."""
-    try:
-        from app.voice.stt import warmup as stt_warmup
-        from app.voice.tts import warmup as tts_warmup
-        from app.services.llm_service import get_llm_service
-        await stt_warmup()
-        await tts_warmup()
-        await get_llm_service().warmup()
-    except Exception as e:
-        logger.warning("Startup warm-up skipped or failed: %s", e)
+    # Build the shared services once, off the request path (see app.api.deps)
+    services = get_container()
+    app.state.services = services
+    # A bad TTS_BACKEND/TTS_FORMAT (or missing ffmpeg) stops startup instead of failing every TTS request
+    get_tts_backend()
+    # Warm up in the background so the port opens at once; /api/ready gates traffic until done
+    app.state.warmup = WarmupState()
+    warmup_task = asyncio.create_task(run_warmup(services, app.state.warmup))
+    app.state.health = HealthMonitor(services, settings.health_check_interval_seconds)
+    app.state.health.start()
     yield
+    warmup_task.cancel()
+    await app.state.health.stop()
+    await services.aclose()
+    await close_stt()
+    await close_tts()
 
 
 app = FastAPI(
@@ -41,6 +60,8 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
+# Innermost: rate limits, in-flight caps and the upload cap (rejections still get CORS headers)
+app.add_middleware(AdmissionMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.cors_origins.split(","),
@@ -49,11 +70,47 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+
+@app.exception_handler(OverloadedError)
+async def overloaded(request: Request, exc: OverloadedError):
+    """A bounded worker queue (e.g. local STT) is full: fail fast, like admission control."""
+    logger.warning("Rejecting %s: %s", request.url.path, exc)
+    return JSONResponse({"detail": "Server busy, please retry"}, status_code=503, headers={"Retry-After": "1"})
+
+
+@app.middleware("http")
+async def request_timing(request: Request, call_next):
+    """Per-request stage timings (Server-Timing, latency histogram) and the turn latency budget."""
+    if not request.url.path.startswith("/api/"):
+        return await call_next(request)
+    # Unknown paths share one label so 404 scans cannot blow up histogram cardinality
+    endpoint = request.url.path if request.url.path in API_PATHS else "other"
+    timings = start_request(endpoint)
+    if endpoint_class(request.url.path) in ("query", "voice"):
+        start_turn()
+    start = time.perf_counter()
+    response = await call_next(request)
+    HTTP_REQUEST_SECONDS.observe(
+        time.perf_counter() - start,
+        endpoint=endpoint,
+        method=request.method,
+        status=str(response.status_code),
+    )
+    # Streaming responses only carry the stages done before the first byte; SSE adds a timing event
+    if timings.stages or timings.marks:
+        response.headers["Server-Timing"] = timings.server_timing()
+    return response
+
+
 app.include_router(api_router)
+app.include_router(metrics_router)
 
 # Serve frontend static files
 if STATIC_DIR.exists():
-    app.mount("/assets", StaticFiles(directory=str(STATIC_DIR / "assets")), name="static-assets")
+    # assets/ only exists after a frontend build; the app must still start without it
+    if (STATIC_DIR / "assets").is_dir():
+        app.mount("/assets", StaticFiles(directory=str(STATIC_DIR / "assets")), name="static-assets")
 
     @app.get("/{full_path:path}")
     async def serve_spa(full_path: str):
@@ -25,6 +25,15 @@ class VoiceQueryResponse(BaseModel):
     answer: str = Field(..., description="RAG-generated answer")
 
 
+class ComponentStatus(BaseModel):
+    """Last known status of one dependency."""
+
+    ok: bool = Field(..., description="Component passed its last check")
+    latency_ms: float = Field(..., description="Duration of the last check in milliseconds")
+    checked_at: float = Field(..., description="Unix timestamp of the last check")
+    error: Optional[str] = Field(default=None, description="Failure reason, if any")
+
+
 class HealthResponse(BaseModel):
     """Health check response."""
 
@@ -32,6 +41,9 @@ class HealthResponse(BaseModel):
     api: bool = Field(..., description="API is up")
     qdrant: bool = Field(..., description="Qdrant is reachable")
     llm: bool = Field(..., description="LLM (Groq) is reachable")
+    components: dict[str, ComponentStatus] = Field(
+        default_factory=dict, description="Per-component status with timestamps and latencies"
+    )
 
 
 class ErrorResponse(BaseModel):
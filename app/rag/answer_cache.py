@@ -0,0 +1,172 @@
+"""Semantic answer cache: replay answers for near-identical recent questions."""
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Optional
+
+import numpy as np
+
+from app.core.config import get_settings
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class CachedAnswer:
+    """A previously generated answer and the query it was produced for."""
+
+    query: str
+    answer: str
+    sources: list[str] = field(default_factory=list)
+    created_at: float = field(default_factory=time.monotonic)
+
+
+class SemanticAnswerCache:
+    """Bounded LRU of (query embedding -> answer), matched by cosine similarity.
+
+    Entries expire after a TTL and the whole cache is dropped when the knowledge
+    base revision changes (re-ingest), so answers never outlive their context.
+    Expired entries stay in the LRU until evicted: while the LLM is unavailable a
+    stale answer beats no answer (``lookup(..., allow_stale=True)``).
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl_seconds: float,
+        threshold: float,
+        revision_check_seconds: float,
+    ) -> None:
+        self._maxsize = maxsize
+        self._ttl = ttl_seconds
+        self._threshold = threshold
+        self._revision_check = revision_check_seconds
+        self._entries: OrderedDict[str, tuple[np.ndarray, CachedAnswer]] = OrderedDict()
+        self._matrix: Optional[np.ndarray] = None
+        self._created: Optional[np.ndarray] = None
+        self._keys: list[str] = []
+        self._lock = threading.Lock()
+        self._revision: Optional[str] = None
+        self._revision_checked_at = float("-inf")
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._maxsize > 0
+
+    @staticmethod
+    def _key(query: str) -> str:
+        return " ".join(query.split()).casefold()
+
+    @staticmethod
+    def _unit(vector: np.ndarray) -> np.ndarray:
+        v = np.asarray(vector, dtype=np.float32)
+        norm = float(np.linalg.norm(v))
+        return v / norm if norm else v
+
+    def _rebuild(self) -> None:
+        self._keys = list(self._entries.keys())
+        self._matrix = (
+            np.stack([self._entries[k][0] for k in self._keys]) if self._keys else None
+        )
+        self._created = np.array([self._entries[k][1].created_at for k in self._keys])
+
+    def lookup(
+        self,
+        vector: np.ndarray,
+        threshold: Optional[float] = None,
+        allow_stale: bool = False,
+    ) -> Optional[CachedAnswer]:
+        """Return the best cached answer above the similarity threshold, if any.
+
+        ``threshold`` overrides the configured one; ``allow_stale`` ignores the TTL.
+        Otherwise expired entries are skipped, so they never hide a fresh match.
+        """
+        if not self.enabled:
+            return None
+        threshold = threshold if threshold is not None else self._threshold
+        q = self._unit(vector)
+        with self._lock:
+            if self._matrix is None:
+                self.misses += 1
+                return None
+            scores = self._matrix @ q
+            if not allow_stale:
+                scores = np.where(time.monotonic() - self._created > self._ttl, -np.inf, scores)
+            best = int(np.argmax(scores))
+            key = self._keys[best]
+            entry = self._entries[key][1]
+            if float(scores[best]) < threshold:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            logger.debug("Semantic cache hit (%.3f): %r ~ %r", float(scores[best]), entry.query[:60], key[:60])
+            return entry
+
+    def store(self, query: str, vector: np.ndarray, answer: str, sources: Optional[list[str]] = None) -> None:
+        """Remember an answer, evicting the least recently used entry when full."""
+        if not self.enabled or not answer:
+            return
+        key = self._key(query)
+        with self._lock:
+            self._entries[key] = (self._unit(vector), CachedAnswer(query, answer, list(sources or [])))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._maxsize:
+                self._entries.popitem(last=False)
+            self._rebuild()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._rebuild()
+
+    def claim_revision_check(self) -> bool:
+        """Return True (at most once per interval) when the revision should be re-checked."""
+        now = time.monotonic()
+        if now - self._revision_checked_at < self._revision_check:
+            return False
+        self._revision_checked_at = now
+        return True
+
+    def set_revision(self, revision: str) -> None:
+        """Record the current knowledge base revision; a change invalidates every entry."""
+        if self._revision is not None and revision != self._revision:
+            logger.info("Knowledge base revision changed (%s -> %s); clearing answer cache", self._revision, revision)
+            self.clear()
+        self._revision = revision
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self._maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "revision": self._revision,
+        }
+
+
+_answer_cache: Optional[SemanticAnswerCache] = None
+_answer_cache_lock = threading.Lock()
+
+
+def get_answer_cache() -> SemanticAnswerCache:
+    """Get or create the process-wide answer cache."""
+    global _answer_cache
+    if _answer_cache is None:
+        with _answer_cache_lock:
+            if _answer_cache is None:
+                settings = get_settings()
+                _answer_cache = SemanticAnswerCache(
+                    maxsize=settings.semantic_cache_size,
+                    ttl_seconds=settings.semantic_cache_ttl_seconds,
+                    threshold=settings.semantic_cache_threshold,
+                    revision_check_seconds=settings.semantic_cache_revision_check_seconds,
+                )
+    return _answer_cache
@@ -0,0 +1,236 @@
+"""Sparse lexical retrieval: precomputed BM25 inverted index built at ingest time.
+
+Postings store the full BM25 term weight per (term, chunk), so a query is just a
+sum of posting weights. Persisted as JSON next to the other processed artifacts and
+reloaded by the server when ingest rewrites it.
+
+The file is a local build artifact (not in git): a server that has none, or one
+built for another knowledge base revision, rebuilds it at startup from the vector
+store's payloads (``ensure_bm25_index``).
+"""
+
+import asyncio
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Any, Optional
+
+import numpy as np
+
+from app.core.config import get_settings
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+
+K1 = 1.2
+B = 0.75
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by did do does for from had has have he her his how i in is it its "
+    "me my of on or she that the their them they this to was were what when where which who "
+    "why will with you your about tell".split()
+)
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercase alphanumeric tokens without stopwords."""
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in _STOPWORDS]
+
+
+class BM25Index:
+    """Inverted index over chunks, keyed by the same point ids as the vector store."""
+
+    def __init__(self, path: str | Path) -> None:
+        self._path = Path(path)
+        self._lock = threading.Lock()
+        self._docs: dict[str, dict[str, Any]] = {}
+        self._ids: list[str] = []
+        self._postings: dict[str, tuple[np.ndarray, np.ndarray]] = {}
+        self._loaded_mtime: Optional[int] = None
+        self.revision: Optional[str] = None  # knowledge base revision the index was built from
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    # -- build (ingest side) -------------------------------------------------
+
+    def load(self) -> "BM25Index":
+        """Load documents and postings from disk if the file exists."""
+        try:
+            mtime = self._path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return self
+        data = json.loads(self._path.read_text(encoding="utf-8"))
+        postings = {
+            term: (np.asarray(rows, dtype=np.int32), np.asarray(weights, dtype=np.float32))
+            for term, (rows, weights) in data["postings"].items()
+        }
+        with self._lock:
+            self._docs = data["docs"]
+            self._ids = list(data["ids"])
+            self._postings = postings
+            self._loaded_mtime = mtime
+            self.revision = data.get("revision")
+        logger.info("Loaded BM25 index %s (%d chunks, %d terms)", self._path, len(self._ids), len(postings))
+        return self
+
+    def add(self, doc_id: str, content: str, metadata: dict[str, Any]) -> None:
+        self._docs[str(doc_id)] = {"content": content, "metadata": metadata}
+
+    def remove(self, doc_ids: set[str] | list[str]) -> None:
+        for doc_id in doc_ids:
+            self._docs.pop(str(doc_id), None)
+
+    def clear(self) -> None:
+        self._docs = {}
+
+    def _build_postings(self) -> tuple[list[str], dict[str, tuple[list[int], list[float]]]]:
+        ids = sorted(self._docs)
+        term_freqs = [Counter(tokenize(self._docs[i]["content"])) for i in ids]
+        lengths = [sum(tf.values()) for tf in term_freqs]
+        avgdl = (sum(lengths) / len(lengths)) if lengths else 0.0
+        df: Counter = Counter()
+        for tf in term_freqs:
+            df.update(tf.keys())
+        n = len(ids)
+        postings: dict[str, tuple[list[int], list[float]]] = {}
+        for row, tf in enumerate(term_freqs):
+            norm = K1 * (1 - B + B * lengths[row] / avgdl) if avgdl else K1
+            for term, freq in tf.items():
+                idf = math.log(1 + (n - df[term] + 0.5) / (df[term] + 0.5))
+                rows, weights = postings.setdefault(term, ([], []))
+                rows.append(row)
+                weights.append(round(idf * freq * (K1 + 1) / (freq + norm), 5))
+        return ids, postings
+
+    def save(self, revision: Optional[str] = None) -> None:
+        """Recompute postings from the current documents and write the index atomically."""
+        ids, postings = self._build_postings()
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self._path.with_suffix(self._path.suffix + ".tmp")
+        tmp.write_text(
+            json.dumps({"ids": ids, "docs": self._docs, "postings": postings, "revision": revision}),
+            encoding="utf-8",
+        )
+        os.replace(tmp, self._path)
+        logger.info("Saved BM25 index %s (%d chunks, %d terms)", self._path, len(ids), len(postings))
+
+    # -- query (server side) -------------------------------------------------
+
+    def available(self) -> bool:
+        """Reload if the file changed on disk; True when there is anything to search."""
+        try:
+            mtime = self._path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return bool(self._ids)
+        if mtime != self._loaded_mtime:
+            self.load()
+        return bool(self._ids)
+
+    def search(self, query: str, top_k: int = 5) -> list[dict[str, Any]]:
+        """Top-k chunks by BM25 score (only chunks sharing at least one query term).
+
+        ``coverage`` is the fraction of the query's distinct terms found in the chunk.
+        """
+        if not self.available():
+            return []
+        with self._lock:
+            ids, docs, postings = self._ids, self._docs, self._postings
+        terms = set(tokenize(query))
+        scores = np.zeros(len(ids), dtype=np.float32)
+        matched = np.zeros(len(ids), dtype=np.int32)
+        for term in terms:
+            hit = postings.get(term)
+            if hit is not None:
+                np.add.at(scores, hit[0], hit[1])
+                matched[hit[0]] += 1
+        candidates = np.flatnonzero(scores)
+        if candidates.size == 0:
+            return []
+        k = min(top_k, candidates.size)
+        top = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+        top = top[np.argsort(-scores[top])]
+        return [
+            {
+                "id": ids[i],
+                "bm25_score": float(scores[i]),
+                "coverage": float(matched[i]) / len(terms),
+                "content": docs[ids[i]]["content"],
+                "metadata": docs[ids[i]]["metadata"],
+            }
+            for i in top
+        ]
+
+
+def bm25_index_path() -> Path:
+    """Index file for the configured collection."""
+    settings = get_settings()
+    root = Path(settings.bm25_index_path)
+    if not root.is_absolute():
+        root = PROJECT_ROOT / root
+    return root / f"{settings.qdrant_collection}.json"
+
+
+_bm25_index: Optional[BM25Index] = None
+_bm25_index_lock = threading.Lock()
+
+
+def get_bm25_index() -> BM25Index:
+    """Get or create the BM25 index singleton (loaded lazily on first search)."""
+    global _bm25_index
+    if _bm25_index is None:
+        with _bm25_index_lock:
+            if _bm25_index is None:
+                _bm25_index = BM25Index(bm25_index_path())
+    return _bm25_index
+
+
+async def ensure_bm25_index(vector_svc) -> bool:
+    """Rebuild the BM25 file from the vector store when it is missing or from another revision."""
+    if not get_settings().hybrid_search:
+        return True
+    index = get_bm25_index()
+    loop = asyncio.get_running_loop()
+    revision = await vector_svc.get_revision_async()
+    await loop.run_in_executor(None, index.available)
+    if len(index) and index.revision == revision:
+        return True
+    points = await vector_svc.scroll_points_async()
+    builder = BM25Index(index.path)
+    for point_id, payload in points:
+        builder.add(point_id, payload.get("content", ""), payload.get("metadata", {}))
+    await loop.run_in_executor(None, builder.save, revision)
+    logger.info("Rebuilt BM25 index from the vector store (%d chunks, revision %s)", len(builder), revision)
+    return True
+
+
+def reciprocal_rank_fusion(
+    result_lists: list[list[dict[str, Any]]],
+    k: int = 60,
+    top_k: Optional[int] = None,
+) -> list[dict[str, Any]]:
+    """Merge ranked lists by RRF: rrf_score = sum(1 / (k + rank)).
+
+    Keeps the first copy of each chunk (so list order decides whose ``score`` survives).
+    """
+    fused: dict[str, float] = {}
+    first: dict[str, dict[str, Any]] = {}
+    for results in result_lists:
+        for rank, r in enumerate(results, 1):
+            fused[r["id"]] = fused.get(r["id"], 0.0) + 1.0 / (k + rank)
+            first.setdefault(r["id"], r)
+    ranked = sorted(fused, key=fused.__getitem__, reverse=True)
+    if top_k is not None:
+        ranked = ranked[:top_k]
+    return [{**first[i], "rrf_score": fused[i]} for i in ranked]
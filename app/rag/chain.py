@@ -1,10 +1,22 @@
 """Custom RAG chain: retrieve, build prompt, stream from LLM."""
 
+import asyncio
+import difflib
+import re
 from typing import AsyncIterator, Optional
 
+import numpy as np
+
+from app.core.config import Settings, get_settings
+from app.rag.answer_cache import CachedAnswer, SemanticAnswerCache, get_answer_cache
+from app.rag.context import ContextAssembler
+from app.rag.embeddings import EmbeddingService, get_embedding_service
 from app.rag.retriever import Retriever
-from app.services.llm_service import get_llm_service
+from app.services.llm_service import LLMService, get_llm_service
+from app.services.vector_service import get_vector_service
 from app.utils.logging import get_logger
+from app.utils.metrics import mark, timed
+from app.utils.singleflight import SingleFlight, TokenBroadcast
 
 logger = get_logger(__name__)
 
@@ -13,23 +25,78 @@ FALLBACK_ANSWER = (
 )
 
 
+_WORD_RE = re.compile(r"[\w']+")
+
+
+def _words(text: str) -> list[str]:
+    return _WORD_RE.findall(text.casefold())
+
+
+class Speculation:
+    """Retrieval started early, on a partial transcript, while the user is still talking.
+
+    ``RAGChain.query`` reuses the chunks when the final transcript matches the partial
+    closely (word-level similarity), and cancels the work otherwise.
+    """
+
+    def __init__(self, query: str, task: asyncio.Task) -> None:
+        self.query = query
+        self.task = task
+
+    def matches(self, query: str, threshold: float) -> bool:
+        a, b = _words(self.query), _words(query)
+        return a == b or difflib.SequenceMatcher(None, a, b).ratio() >= threshold
+
+    def cancel(self) -> None:
+        if self.task.done():
+            if not self.task.cancelled():
+                self.task.exception()  # mark retrieved
+        else:
+            self.task.cancel()
+
+
 class RAGChain:
-    """Manual RAG pipeline: no black-box LangChain magic."""
+    """Manual RAG pipeline: no black-box LangChain magic.
 
-    def __init__(self) -> None:
-        self._retriever = Retriever()
-        self._llm = get_llm_service()
+    Stateless per request, so the app builds one instance (see ``app.core.container``)
+    and shares it; dependencies default to the process-wide singletons.
+    """
+
+    def __init__(
+        self,
+        settings: Optional[Settings] = None,
+        retriever: Optional[Retriever] = None,
+        llm: Optional[LLMService] = None,
+        embedding_svc: Optional[EmbeddingService] = None,
+        vector_svc=None,
+        cache: Optional[SemanticAnswerCache] = None,
+    ) -> None:
+        settings = settings if settings is not None else get_settings()
+        self._embedding_svc = embedding_svc if embedding_svc is not None else get_embedding_service()
+        self._vector_svc = vector_svc if vector_svc is not None else get_vector_service()
+        self._retriever = retriever if retriever is not None else Retriever(settings, self._embedding_svc, self._vector_svc)
+        self._llm = llm if llm is not None else get_llm_service()
+        self._cache = cache if cache is not None else get_answer_cache()
+        self._assembler = ContextAssembler(settings.context_token_budget)
+        self._degraded_threshold = settings.degraded_cache_threshold
+        self._speculation_threshold = settings.speculative_match_threshold
+        # Identical concurrent history-free queries share one pipeline run
+        self._coalesce = settings.coalesce_queries
+        self._full_flights: SingleFlight[tuple[str, list[str]]] = SingleFlight()
+        self._stream_flights: dict[str, TokenBroadcast] = {}
+
+    @staticmethod
+    def _flight_key(query: str) -> str:
+        return " ".join(query.split()).casefold()
 
     def _build_context(self, chunks: list[dict]) -> str:
-        """Build context string from retrieved chunks."""
-        if not chunks:
-            return ""
-        parts = []
-        for i, c in enumerate(chunks, 1):
-            content = c.get("content", "")
-            if content:
-                parts.append(f"[{i}] {content}")
-        return "\n\n".join(parts)
+        """Build a token-budgeted context string from retrieved chunks."""
+        assembled = self._assembler.assemble(chunks)
+        logger.debug(
+            "Context: %d chunks -> %d pieces, ~%d tokens",
+            assembled.chunks_in, assembled.pieces, assembled.tokens,
+        )
+        return assembled.text
 
     @staticmethod
     def _enrich_query(query: str, history: list | None) -> str:
@@ -53,37 +120,197 @@ class RAGChain:
         topic_hint = last_assistant[:120]
         return f"{query} (context: {topic_hint})"
 
+    async def _cache_lookup(self, query: str, history: list | None):
+        """Embed the query and look it up in the answer cache.
+
+        Multi-turn requests are never cached: history changes what a follow-up means.
+        Returns (query_vector, cached_answer); both are None when caching is skipped.
+        """
+        if history or not self._cache.enabled:
+            return None, None
+        if self._cache.claim_revision_check():
+            try:
+                self._cache.set_revision(await self._vector_svc.get_revision_async())
+            except Exception as e:
+                logger.warning("Knowledge base revision check failed: %s", e)
+        try:
+            with timed("embed"):
+                vector = await self._embedding_svc.embed_query_vector_async(query)
+        except Exception as e:
+            logger.warning("Answer cache lookup skipped: %s", e)
+            return None, None
+        cached = self._cache.lookup(vector)
+        mark("answer_cache", "hit" if cached is not None else "miss")
+        return vector, cached
+
+    async def _degraded_lookup(self, query: str, vector: Optional[np.ndarray]) -> Optional[CachedAnswer]:
+        """Best-effort cached answer while retrieval or the LLM is failing.
+
+        Uses a looser similarity threshold and ignores the TTL: a slightly stale or
+        approximate answer is better than the generic fallback.
+        """
+        if not self._cache.enabled:
+            return None
+        try:
+            if vector is None:
+                vector = await self._embedding_svc.embed_query_vector_async(query)
+        except Exception as e:
+            logger.warning("Degraded cache lookup skipped: %s", e)
+            return None
+        cached = self._cache.lookup(vector, threshold=self._degraded_threshold, allow_stale=True)
+        if cached is not None:
+            logger.info("Serving cached answer while degraded: %r", cached.query[:60])
+            mark("degraded", "cached_answer")
+        return cached
+
+    @staticmethod
+    async def _replay(answer: str) -> AsyncIterator[str]:
+        """Replay a cached answer as a token stream (word by word, whitespace kept)."""
+        for match in re.finditer(r"\s*\S+\s*", answer):
+            yield match.group(0)
+
+    async def _stream_and_store(
+        self,
+        tokens: AsyncIterator[str],
+        query: str,
+        vector: np.ndarray,
+    ) -> AsyncIterator[str]:
+        """Pass tokens through and cache the full answer once the stream completes."""
+        parts: list[str] = []
+        async for token in tokens:
+            parts.append(token)
+            yield token
+        self._cache.store(query, vector, "".join(parts))
+
+    def speculate(self, query: str, history: list | None = None) -> Speculation:
+        """Start retrieval for a partial transcript; hand the result to ``query(speculation=...)``."""
+        retrieval_query = self._enrich_query(query, history)
+        return Speculation(query, asyncio.create_task(self._retriever.retrieve(retrieval_query)))
+
     async def query(
         self,
         query: str,
         stream: bool = True,
         history: list | None = None,
+        speculation: Optional[Speculation] = None,
     ) -> str | AsyncIterator[str]:
         """
         Run RAG: retrieve -> LLM -> return answer.
         Returns full text or async iterator of tokens.
         """
-        # Enrich query with conversation context for better retrieval
-        retrieval_query = self._enrich_query(query, history)
+        if not (stream and self._coalesce) or history:
+            return await self._run_query(query, stream, history, speculation)
+        key = self._flight_key(query)
+        flight = self._stream_flights.get(key)
+        if flight is None:
+            flight = TokenBroadcast(
+                self._as_tokens(self._run_query(query, True, None, speculation)),
+                on_done=lambda: self._stream_flights.pop(key, None),
+            )
+            self._stream_flights[key] = flight
+        else:
+            mark("coalesced", "stream")
+            if speculation is not None:
+                speculation.cancel()
+        return flight.subscribe()
+
+    async def _speculative_chunks(self, query: str, speculation: Optional[Speculation]) -> Optional[list[dict]]:
+        """Chunks retrieved early for a matching partial transcript (None: retrieve now)."""
+        if speculation is None:
+            return None
+        if not speculation.matches(query, self._speculation_threshold):
+            logger.debug("Speculative retrieval discarded: %r -> %r", speculation.query[:60], query[:60])
+            speculation.cancel()
+            mark("speculation", "miss")
+            return None
         try:
-            chunks = await self._retriever.retrieve(retrieval_query)
+            chunks = await speculation.task
+        except Exception as e:
+            logger.warning("Speculative retrieval failed, retrieving again: %s", e)
+            return None
+        mark("speculation", "hit")
+        return chunks
+
+    @staticmethod
+    async def _as_tokens(pending) -> AsyncIterator[str]:
+        """Await a query result and yield it as tokens (a plain string is one token)."""
+        result = await pending
+        if isinstance(result, str):
+            yield result
+            return
+        async for token in result:
+            yield token
+
+    async def _run_query(
+        self,
+        query: str,
+        stream: bool,
+        history: list | None,
+        speculation: Optional[Speculation] = None,
+    ) -> str | AsyncIterator[str]:
+        vector, cached = await self._cache_lookup(query, history)
+        if cached is not None:
+            if speculation is not None:
+                speculation.cancel()
+            return self._replay(cached.answer) if stream else cached.answer
+
+        try:
+            chunks = await self._speculative_chunks(query, speculation)
+            if chunks is None:
+                # Enrich query with conversation context for better retrieval
+                chunks = await self._retriever.retrieve(self._enrich_query(query, history))
         except Exception as e:
             logger.error("Retrieval failed: %s", e)
-            return FALLBACK_ANSWER
+            return await self._fallback(query, vector, history, stream)
 
         context = self._build_context(chunks)
 
         try:
             if stream:
-                return await self._llm.generate(context=context, query=query, history=history, stream=True)
-            return await self._llm.generate(context=context, query=query, history=history, stream=False)
+                tokens = await self._llm.generate(context=context, query=query, history=history, stream=True)
+                if vector is not None:
+                    return self._stream_and_store(tokens, query, vector)
+                return tokens
+            answer = await self._llm.generate(context=context, query=query, history=history, stream=False)
         except Exception as e:
             logger.error("LLM generation failed: %s", e)
+            return await self._fallback(query, vector, history, stream)
+        if vector is not None:
+            self._cache.store(query, vector, answer)
+        return answer
+
+    async def _fallback(
+        self,
+        query: str,
+        vector: Optional[np.ndarray],
+        history: list | None,
+        stream: bool,
+    ) -> str | AsyncIterator[str]:
+        """Answer for a failed run: a cached answer when one is close enough, else the canned one."""
+        cached = None if history else await self._degraded_lookup(query, vector)
+        if cached is None:
             return FALLBACK_ANSWER
+        return self._replay(cached.answer) if stream else cached.answer
 
     async def query_full(self, query: str) -> tuple[str, list[str]]:
         """Run RAG and return (answer, source_refs)."""
-        chunks = await self._retriever.retrieve(query)
+        if not self._coalesce:
+            return await self._run_query_full(query)
+        key = self._flight_key(query)
+        if self._full_flights.in_flight(key):
+            mark("coalesced", "full")
+        return await self._full_flights.do(key, lambda: self._run_query_full(query))
+
+    async def _run_query_full(self, query: str) -> tuple[str, list[str]]:
+        vector, cached = await self._cache_lookup(query, None)
+        if cached is not None:
+            return cached.answer, cached.sources
+
+        try:
+            chunks = await self._retriever.retrieve(query)
+        except Exception as e:
+            logger.error("Retrieval failed: %s", e)
+            return await self._fallback_full(query, vector)
         context = self._build_context(chunks)
 
         sources = [
@@ -92,7 +319,16 @@ class RAGChain:
         ]
         try:
             answer = await self._llm.generate(context=context, query=query, stream=False)
-            return answer, list(set(sources))
         except Exception as e:
             logger.error("LLM generation failed: %s", e)
+            return await self._fallback_full(query, vector)
+        sources = list(set(sources))
+        if vector is not None:
+            self._cache.store(query, vector, answer, sources)
+        return answer, sources
+
+    async def _fallback_full(self, query: str, vector: Optional[np.ndarray]) -> tuple[str, list[str]]:
+        cached = await self._degraded_lookup(query, vector)
+        if cached is None:
             return FALLBACK_ANSWER, []
+        return cached.answer, cached.sources
@@ -0,0 +1,151 @@
+"""Token-budgeted context assembly: merge overlapping chunks, cut at sentence boundaries."""
+
+import re
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Cheap, tokenizer-free estimate (~4 chars per token for English with Llama-style BPE)
+CHARS_PER_TOKEN = 4
+# Don't bother appending a truncated chunk smaller than this
+MIN_PIECE_TOKENS = 24
+# Longest overlap searched for when stitching adjacent chunks (splitter overlap is 80)
+MAX_OVERLAP_CHARS = 200
+
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?])\s+|\n+")
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count of a string."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _stitch(left: str, right: str) -> str:
+    """Join two chunks, dropping the longest suffix of ``left`` repeated at the start of ``right``."""
+    limit = min(len(left), len(right), MAX_OVERLAP_CHARS)
+    for size in range(limit, 0, -1):
+        if left.endswith(right[:size]):
+            return left + right[size:]
+    return left.rstrip() + "\n" + right.lstrip()
+
+
+def truncate_to_sentences(text: str, max_tokens: int) -> str:
+    """Longest prefix of whole sentences that fits in ``max_tokens`` (empty if none fits)."""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    cut = 0
+    for m in _SENTENCE_END_RE.finditer(text):
+        if m.start() > max_chars:
+            break
+        cut = m.start()
+    return text[:cut].rstrip()
+
+
+@dataclass
+class _Piece:
+    source: str
+    lo: int
+    hi: int
+    text: str
+
+
+@dataclass
+class AssembledContext:
+    """Prompt context plus what it cost."""
+
+    text: str
+    tokens: int
+    chunks_in: int
+    pieces: int
+    sources: list[str] = field(default_factory=list)
+
+
+class ContextAssembler:
+    """Build the retrieval context for the prompt within a fixed token budget.
+
+    Chunks keep their retrieval rank. Overlapping or adjacent chunks from the same source
+    (consecutive ``chunk_index``) are stitched into one piece so the splitter's overlap is
+    not sent twice; exact duplicates are dropped. The last piece that does not fit is cut
+    at a sentence boundary.
+    """
+
+    def __init__(self, budget_tokens: int) -> None:
+        self._budget = budget_tokens
+
+    def _merge(self, chunks: list[dict[str, Any]]) -> list[_Piece]:
+        pieces: list[_Piece] = []
+        seen: set[str] = set()
+        for c in chunks:
+            content = (c.get("content") or "").strip()
+            if not content or content in seen:
+                continue
+            seen.add(content)
+            meta = c.get("metadata") or {}
+            source = meta.get("source", "unknown")
+            index: Optional[int] = meta.get("chunk_index")
+            if index is not None:
+                merged = False
+                for p in pieces:
+                    if p.source != source:
+                        continue
+                    if index == p.hi + 1:
+                        p.text, p.hi, merged = _stitch(p.text, content), index, True
+                    elif index == p.lo - 1:
+                        p.text, p.lo, merged = _stitch(content, p.text), index, True
+                    if merged:
+                        break
+                if merged:
+                    continue
+            pieces.append(_Piece(source, index if index is not None else -1, index if index is not None else -1, content))
+        return pieces
+
+    def assemble(self, chunks: list[dict[str, Any]]) -> AssembledContext:
+        """Return the numbered context string and its estimated token count."""
+        if not chunks:
+            return AssembledContext(text="", tokens=0, chunks_in=0, pieces=0)
+        parts: list[str] = []
+        sources: list[str] = []
+        used = 0
+        for piece in self._merge(chunks):
+            label = f"[{len(parts) + 1}] "
+            remaining = self._budget - used - estimate_tokens(label)
+            if remaining < MIN_PIECE_TOKENS:
+                break
+            text = truncate_to_sentences(piece.text, remaining)
+            if estimate_tokens(text) < min(MIN_PIECE_TOKENS, estimate_tokens(piece.text)):
+                break
+            parts.append(label + text)
+            sources.append(piece.source)
+            used += estimate_tokens(label + text) + 1
+            if len(text) < len(piece.text):
+                break
+        return AssembledContext(
+            text="\n\n".join(parts),
+            tokens=used,
+            chunks_in=len(chunks),
+            pieces=len(parts),
+            sources=sources,
+        )
+
+
+def trim_history(history: Optional[list[dict[str, Any]]], budget_tokens: int) -> list[dict[str, Any]]:
+    """Keep the most recent messages whose combined content fits in the budget."""
+    if not history:
+        return []
+    kept: list[dict[str, Any]] = []
+    used = 0
+    for msg in reversed(history):
+        cost = estimate_tokens(str(msg.get("content", ""))) + 4  # role/formatting overhead
+        if used + cost > budget_tokens:
+            break
+        kept.append(msg)
+        used += cost
+    kept.reverse()
+    # Never start on an orphaned assistant reply
+    while kept and kept[0].get("role") == "assistant":
+        kept.pop(0)
+    return kept
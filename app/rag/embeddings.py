@@ -1,11 +1,14 @@
 """Embedding service using BAAI/bge-small-en-v1.5 via fastembed (ONNX, low memory)."""
 
 import asyncio
+import threading
 from typing import List
 
+import numpy as np
 from fastembed import TextEmbedding
 
 from app.core.config import get_settings
+from app.utils.cache import TTLCache
 from app.utils.logging import get_logger
 
 logger = get_logger(__name__)
@@ -17,7 +20,14 @@ class EmbeddingService:
     def __init__(self) -> None:
         settings = get_settings()
         self._model: TextEmbedding | None = None
+        self._model_lock = threading.Lock()
         self._model_name = settings.embedding_model
+        # Query text -> float32 vector. Keys include the model name so a model change never
+        # serves vectors from a different embedding space.
+        self._query_cache: TTLCache[np.ndarray] = TTLCache(
+            maxsize=settings.embedding_cache_size,
+            ttl_seconds=settings.embedding_cache_ttl_seconds,
+        )
 
     @property
     def dimension(self) -> int:
@@ -25,18 +35,47 @@ class EmbeddingService:
 
     def _get_model(self) -> TextEmbedding:
         if self._model is None:
-            logger.info("Loading embedding model (fastembed): %s", self._model_name)
-            self._model = TextEmbedding(self._model_name)
+            # Executor threads race here on a cold-start burst: load the ONNX model once
+            with self._model_lock:
+                if self._model is None:
+                    logger.info("Loading embedding model (fastembed): %s", self._model_name)
+                    self._model = TextEmbedding(self._model_name)
         return self._model
 
+    @staticmethod
+    def _normalize_query(text: str) -> str:
+        """Collapse whitespace and case so trivially different queries share a cache entry."""
+        return " ".join(text.split()).casefold()
+
+    def embed_query_vector(self, text: str) -> np.ndarray:
+        """Embed a query as a float32 vector, served from the LRU/TTL cache when possible."""
+        normalized = self._normalize_query(text)
+        key = (self._model_name, normalized)
+        vector = self._query_cache.get(key)
+        if vector is None:
+            model = self._get_model()
+            vector = np.asarray(next(iter(model.query_embed(normalized))), dtype=np.float32)
+            vector.setflags(write=False)
+            self._query_cache.set(key, vector)
+        return vector
+
+    def cache_stats(self) -> dict:
+        """Query embedding cache counters."""
+        return self._query_cache.stats()
+
     def embed_text(self, text: str, is_query: bool = False) -> List[float]:
-        model = self._get_model()
         if is_query:
-            result = list(model.query_embed(text))
-        else:
-            result = list(model.passage_embed([text]))
+            return self.embed_query_vector(text).tolist()
+        model = self._get_model()
+        result = list(model.passage_embed([text]))
         return result[0].tolist()
 
+    def embed_passages_array(self, texts: List[str], batch_size: int = 64) -> np.ndarray:
+        """Embed passages into a (len(texts), dim) float32 matrix, no Python float lists."""
+        model = self._get_model()
+        embeddings = model.passage_embed(texts, batch_size=batch_size)
+        return np.stack([np.asarray(e, dtype=np.float32) for e in embeddings])
+
     def embed_texts(self, texts: List[str], is_query: bool = False) -> List[List[float]]:
         model = self._get_model()
         if is_query:
@@ -49,16 +88,38 @@ class EmbeddingService:
         loop = asyncio.get_event_loop()
         return await loop.run_in_executor(None, self.embed_text, text, is_query)
 
+    async def embed_query_vector_async(self, text: str) -> np.ndarray:
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(None, self.embed_query_vector, text)
+
     async def embed_texts_async(self, texts: List[str], is_query: bool = False) -> List[List[float]]:
         loop = asyncio.get_event_loop()
         return await loop.run_in_executor(None, self.embed_texts, texts, is_query)
 
+    def warmup(self) -> bool:
+        """Load the ONNX model and run one query embedding (bypassing the cache)."""
+        try:
+            model = self._get_model()
+            list(model.query_embed(["warm-up"]))
+            logger.info("Embedding model (%s) warm-up complete", self._model_name)
+            return True
+        except Exception as e:
+            logger.warning("Embedding warm-up failed: %s", e)
+            return False
+
+    async def warmup_async(self) -> bool:
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(None, self.warmup)
+
 
 _embedding_service: EmbeddingService | None = None
+_embedding_service_lock = threading.Lock()
 
 
 def get_embedding_service() -> EmbeddingService:
     global _embedding_service
     if _embedding_service is None:
-        _embedding_service = EmbeddingService()
+        with _embedding_service_lock:
+            if _embedding_service is None:
+                _embedding_service = EmbeddingService()
     return _embedding_service
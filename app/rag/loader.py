@@ -1,7 +1,11 @@
 """Document loaders for knowledge ingestion."""
 
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Iterator
+from typing import Any, Iterator
 
 from langchain_community.document_loaders import (
     DirectoryLoader,
@@ -10,6 +14,7 @@ from langchain_community.document_loaders import (
 )
 from langchain_core.documents import Document
 
+from app.rag.splitter import CHUNK_OVERLAP, CHUNK_SIZE, chunk_documents
 from app.utils.logging import get_logger
 
 logger = get_logger(__name__)
@@ -47,26 +52,89 @@ def load_markdown(path: str | Path) -> list[Document]:
     return []
 
 
-def load_directory(path: str | Path) -> list[Document]:
-    """Load all supported documents from a directory."""
+SUPPORTED_SUFFIXES = (".pdf", ".md", ".markdown", ".txt")
+
+
+def list_files(path: str | Path) -> list[Path]:
+    """List supported document files under a directory, in a stable (sorted) order."""
     path = Path(path)
     if not path.is_dir():
         logger.warning("Not a directory: %s", path)
         return []
+    return sorted(
+        f for f in path.rglob("*")
+        if f.is_file() and f.suffix.lower() in SUPPORTED_SUFFIXES
+    )
+
+
+def load_file(path: str | Path) -> list[Document]:
+    """Load a single supported document file."""
+    path = Path(path)
+    suffix = path.suffix.lower()
+    if suffix == ".pdf":
+        return load_resume(path)
+    if suffix in (".md", ".markdown"):
+        return load_markdown(path)
+    if suffix == ".txt":
+        loader = TextLoader(str(path), encoding="utf-8")
+        return loader.load()
+    return []
+
+
+def load_directory(path: str | Path) -> list[Document]:
+    """Load all supported documents from a directory."""
     docs: list[Document] = []
-    for f in path.rglob("*"):
-        if f.is_file():
-            suffix = f.suffix.lower()
-            if suffix == ".pdf":
-                docs.extend(load_resume(f))
-            elif suffix in (".md", ".markdown"):
-                docs.extend(load_markdown(f))
-            elif suffix == ".txt":
-                loader = TextLoader(str(f), encoding="utf-8")
-                docs.extend(loader.load())
+    for f in list_files(path):
+        docs.extend(load_file(f))
     return docs
 
 
+def load_and_chunk_file(
+    path: str | Path,
+    chunk_size: int = CHUNK_SIZE,
+    chunk_overlap: int = CHUNK_OVERLAP,
+) -> list[dict[str, Any]]:
+    """Load one file and split it with chunk_documents (process-pool worker entry point)."""
+    return chunk_documents(load_file(path), chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+
+
+def iter_chunked_files(
+    files: list[Path],
+    workers: int = 1,
+    chunk_size: int = CHUNK_SIZE,
+    chunk_overlap: int = CHUNK_OVERLAP,
+) -> Iterator[tuple[Path, list[dict[str, Any]]]]:
+    """Load and chunk files, yielding (path, chunks) in input order.
+
+    With ``workers`` > 1 parsing and chunking fan out across a process pool (PDF parsing
+    is CPU-bound); ``workers`` <= 0 uses every core. At most ``2 * workers`` files are in
+    flight, so results stay ordered (deterministic chunk_index) with bounded memory.
+    """
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(files)) or 1
+    if workers == 1:
+        for f in files:
+            yield f, load_and_chunk_file(f, chunk_size, chunk_overlap)
+        return
+
+    # spawn, not fork: callers may already run threads (ingest pipeline, ONNX runtime)
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+        pending: deque = deque()
+        remaining = iter(files)
+        for f in remaining:
+            pending.append((f, pool.submit(load_and_chunk_file, f, chunk_size, chunk_overlap)))
+            if len(pending) >= workers * 2:
+                break
+        while pending:
+            f, future = pending.popleft()
+            yield f, future.result()
+            nxt = next(remaining, None)
+            if nxt is not None:
+                pending.append((nxt, pool.submit(load_and_chunk_file, nxt, chunk_size, chunk_overlap)))
+
+
 def load_all_sources(raw_dir: str | Path) -> Iterator[Document]:
     """Load all documents from data/raw directory."""
     raw_dir = Path(raw_dir)
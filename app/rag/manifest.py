@@ -0,0 +1,88 @@
+"""Ingestion manifest: content hashes of ingested files and chunks for incremental re-ingest."""
+
+import hashlib
+import json
+import uuid
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Optional
+
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+MANIFEST_VERSION = 1
+
+
+def file_sha256(path: str | Path) -> str:
+    """SHA-256 of a file's bytes."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def chunk_point_id(source_key: str, content: str) -> str:
+    """Deterministic point id (UUID string) derived from a chunk's source and content."""
+    digest = hashlib.sha256(f"{source_key}\0{content}".encode("utf-8")).hexdigest()
+    return str(uuid.UUID(digest[:32]))
+
+
+@dataclass
+class FileEntry:
+    """A source file as last ingested: its hash and the point ids of its chunks."""
+
+    sha256: str
+    chunk_ids: list[str] = field(default_factory=list)
+
+
+@dataclass
+class IngestManifest:
+    """What is currently in the collection, keyed by path relative to the raw data dir."""
+
+    collection: str
+    embedding_model: str
+    files: dict[str, FileEntry] = field(default_factory=dict)
+    version: int = MANIFEST_VERSION
+
+    @classmethod
+    def load(cls, path: str | Path, collection: str, embedding_model: str) -> "IngestManifest":
+        """Load a manifest; start empty if missing, unreadable or built for another collection/model."""
+        path = Path(path)
+        empty = cls(collection=collection, embedding_model=embedding_model)
+        if not path.exists():
+            return empty
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring unreadable manifest %s: %s", path, e)
+            return empty
+        if (
+            data.get("version") != MANIFEST_VERSION
+            or data.get("collection") != collection
+            or data.get("embedding_model") != embedding_model
+        ):
+            logger.info("Manifest %s is for a different collection/model; starting fresh", path)
+            return empty
+        files = {k: FileEntry(**v) for k, v in data.get("files", {}).items()}
+        return cls(collection=collection, embedding_model=embedding_model, files=files)
+
+    def save(self, path: str | Path) -> None:
+        """Atomically write the manifest as JSON."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        tmp.write_text(json.dumps(asdict(self), indent=2, sort_keys=True), encoding="utf-8")
+        tmp.replace(path)
+
+    def get(self, key: str) -> Optional[FileEntry]:
+        return self.files.get(key)
+
+    def revision(self) -> str:
+        """Content-derived revision of the whole knowledge base."""
+        digest = hashlib.sha256()
+        for key in sorted(self.files):
+            digest.update(key.encode("utf-8"))
+            digest.update(self.files[key].sha256.encode("ascii"))
+        return digest.hexdigest()[:16]
@@ -0,0 +1,161 @@
+"""Streaming ingestion pipeline: chunks -> batched embedding -> batched upsert.
+
+Stages run in their own threads connected by bounded queues, so loading/chunking,
+embedding and upload overlap while at most ``queue_size`` batches are held in memory
+between any two stages, regardless of corpus size.
+"""
+
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from itertools import islice
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+import numpy as np
+
+from app.rag.embeddings import EmbeddingService
+from app.services.vector_service import VectorService
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_BATCH_SIZE = 64
+DEFAULT_QUEUE_SIZE = 4
+
+_DONE = object()
+
+
+@dataclass
+class ChunkRecord:
+    """A chunk ready to be embedded and upserted under a deterministic point id."""
+
+    point_id: str
+    content: str
+    metadata: dict[str, Any]
+
+
+@dataclass
+class PipelineStats:
+    chunks: int = 0
+    batches: int = 0
+    seconds: float = 0.0
+
+    @property
+    def chunks_per_second(self) -> float:
+        return self.chunks / self.seconds if self.seconds else 0.0
+
+
+def batched(items: Iterable[Any], size: int) -> Iterator[list[Any]]:
+    """Yield lists of up to ``size`` items."""
+    it = iter(items)
+    while batch := list(islice(it, size)):
+        yield batch
+
+
+class IngestPipeline:
+    """Three overlapping stages: produce batches, embed them, upsert them."""
+
+    def __init__(
+        self,
+        embedding_svc: EmbeddingService,
+        vector_svc: VectorService,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        progress: Optional[Callable[[str], None]] = None,
+    ) -> None:
+        self._embedding_svc = embedding_svc
+        self._vector_svc = vector_svc
+        self._batch_size = batch_size
+        self._queue_size = queue_size
+        self._progress = progress or (lambda msg: logger.info(msg))
+        self._stop = threading.Event()
+        self._error: Optional[BaseException] = None
+
+    def _put(self, q: queue.Queue, item: Any) -> bool:
+        """Blocking put that gives up if another stage failed."""
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=0.2)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, q: queue.Queue) -> Any:
+        while not self._stop.is_set():
+            try:
+                return q.get(timeout=0.2)
+            except queue.Empty:
+                continue
+        return _DONE
+
+    def _fail(self, e: BaseException) -> None:
+        if self._error is None:
+            self._error = e
+        self._stop.set()
+
+    def _produce(self, records: Iterable[ChunkRecord], out: queue.Queue) -> None:
+        try:
+            for batch in batched(records, self._batch_size):
+                if not self._put(out, batch):
+                    return
+            self._put(out, _DONE)
+        except BaseException as e:
+            self._fail(e)
+
+    def _embed(self, inbox: queue.Queue, out: queue.Queue) -> None:
+        try:
+            while (batch := self._get(inbox)) is not _DONE:
+                vectors = self._embedding_svc.embed_passages_array(
+                    [r.content for r in batch], batch_size=self._batch_size
+                )
+                if not self._put(out, (batch, vectors)):
+                    return
+            self._put(out, _DONE)
+        except BaseException as e:
+            self._fail(e)
+
+    def _upsert(self, batch: list[ChunkRecord], vectors: np.ndarray) -> None:
+        self._vector_svc.upsert(
+            ids=[r.point_id for r in batch],
+            vectors=vectors,
+            payloads=[{"content": r.content, "metadata": r.metadata} for r in batch],
+        )
+
+    def run(self, records: Iterable[ChunkRecord]) -> PipelineStats:
+        """Embed and upsert all records; re-raises the first stage failure."""
+        self._stop = threading.Event()
+        self._error = None
+        to_embed: queue.Queue = queue.Queue(maxsize=self._queue_size)
+        to_upsert: queue.Queue = queue.Queue(maxsize=self._queue_size)
+        threads = [
+            threading.Thread(target=self._produce, args=(records, to_embed), name="ingest-load", daemon=True),
+            threading.Thread(target=self._embed, args=(to_embed, to_upsert), name="ingest-embed", daemon=True),
+        ]
+        for t in threads:
+            t.start()
+
+        stats = PipelineStats()
+        start = time.perf_counter()
+        try:
+            while (item := self._get(to_upsert)) is not _DONE:
+                batch, vectors = item
+                self._upsert(batch, vectors)
+                stats.chunks += len(batch)
+                stats.batches += 1
+                stats.seconds = time.perf_counter() - start
+                self._progress(
+                    f"  upserted {stats.chunks} chunks in {stats.batches} batches "
+                    f"({stats.chunks_per_second:.1f} chunks/s)"
+                )
+        except BaseException as e:
+            self._fail(e)
+        finally:
+            self._stop.set()
+            for t in threads:
+                t.join()
+        stats.seconds = time.perf_counter() - start
+        if self._error is not None:
+            raise self._error
+        return stats
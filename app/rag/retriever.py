@@ -1,24 +1,65 @@
-"""Retrieval layer: top-k with score threshold."""
+"""Retrieval layer: dense top-k with score threshold, fused with BM25 via reciprocal-rank fusion."""
 
+import asyncio
 from typing import Optional
 
-from app.core.config import get_settings
-from app.rag.embeddings import get_embedding_service
+from app.core.config import Settings, get_settings
+from app.core.resilience import call_with_policy, get_breaker
+from app.rag.bm25 import BM25Index, get_bm25_index, reciprocal_rank_fusion
+from app.rag.embeddings import EmbeddingService, get_embedding_service
 from app.services.vector_service import get_vector_service
 from app.utils.logging import get_logger
+from app.utils.metrics import mark, timed
 
 logger = get_logger(__name__)
 
 
 class Retriever:
-    """Retrieve relevant chunks from Qdrant."""
+    """Retrieve relevant chunks from the vector store (plus the BM25 index when hybrid)."""
 
-    def __init__(self) -> None:
-        settings = get_settings()
+    def __init__(
+        self,
+        settings: Optional[Settings] = None,
+        embedding_svc: Optional[EmbeddingService] = None,
+        vector_svc=None,
+        bm25: Optional[BM25Index] = None,
+    ) -> None:
+        settings = settings if settings is not None else get_settings()
         self._top_k = settings.rag_top_k
         self._score_threshold = settings.rag_score_threshold
-        self._embedding_svc = get_embedding_service()
-        self._vector_svc = get_vector_service()
+        self._hybrid = settings.hybrid_search
+        self._rrf_k = settings.rrf_k
+        self._bm25_min_coverage = settings.bm25_fallback_min_coverage
+        self._search_timeout = settings.search_timeout_seconds
+        self._breaker = get_breaker("vector_store")
+        self._embedding_svc = embedding_svc if embedding_svc is not None else get_embedding_service()
+        self._vector_svc = vector_svc if vector_svc is not None else get_vector_service()
+        self._bm25: Optional[BM25Index] = None
+        if self._hybrid:
+            self._bm25 = bm25 if bm25 is not None else get_bm25_index()
+
+    async def _dense(self, query: str, k: int, threshold: float) -> list[dict]:
+        with timed("embed"):
+            query_vector = await self._embedding_svc.embed_text_async(query, is_query=True)
+        with timed("search"):
+            return await call_with_policy(
+                lambda: self._vector_svc.search_async(
+                    query_vector=query_vector,
+                    top_k=k,
+                    score_threshold=threshold,
+                ),
+                self._breaker,
+                self._search_timeout,
+            )
+
+    async def _sparse(self, query: str, k: int) -> list[dict]:
+        try:
+            loop = asyncio.get_event_loop()
+            with timed("bm25"):
+                return await loop.run_in_executor(None, self._bm25.search, query, k)
+        except Exception as e:
+            logger.warning("BM25 search failed, using dense only: %s", e)
+            return []
 
     async def retrieve(
         self,
@@ -28,15 +69,38 @@ class Retriever:
     ) -> list[dict]:
         """
         Retrieve top-k chunks for the query.
-        Returns list of dicts with content, metadata, score.
+        Returns list of dicts with content, metadata, score (dense cosine similarity).
+        With hybrid search, results are ordered by ``rrf_score``; chunks found only by
+        BM25 have ``bm25_score`` instead of ``score``. Lexical hits are only added when
+        dense search found something above the threshold, so off-topic queries still
+        get no context.
         """
         k = top_k or self._top_k
         threshold = score_threshold if score_threshold is not None else self._score_threshold
-        query_vector = await self._embedding_svc.embed_text_async(query, is_query=True)
-        results = self._vector_svc.search(
-            query_vector=query_vector,
-            top_k=k,
-            score_threshold=threshold,
+        if self._bm25 is None:
+            results = await self._dense(query, k, threshold)
+            logger.debug("Retrieved %d chunks for query", len(results))
+            return results
+
+        # Each list contributes 2k candidates so fusion can promote chunks ranked low by one side
+        dense, sparse = await asyncio.gather(
+            self._dense(query, k * 2, threshold),
+            self._sparse(query, k * 2),
+            return_exceptions=True,
         )
-        logger.debug("Retrieved %d chunks for query", len(results))
+        if isinstance(sparse, BaseException):
+            raise sparse
+        if isinstance(dense, BaseException):
+            # Vector store down or its circuit open: degrade to lexical results
+            # Without a similarity score, only chunks matching most of the query count as on-topic
+            sparse = [r for r in sparse if r["coverage"] >= self._bm25_min_coverage]
+            if not sparse:
+                raise dense
+            logger.warning("Dense search failed, using BM25 only: %s", dense)
+            mark("degraded", "bm25_only")
+            return sparse[:k]
+        if not dense or not sparse:
+            return dense[:k]
+        results = reciprocal_rank_fusion([dense, sparse], k=self._rrf_k, top_k=k)
+        logger.debug("Retrieved %d chunks for query (dense=%d, sparse=%d)", len(results), len(dense), len(sparse))
         return results
@@ -1,11 +1,17 @@
 """Groq LLM service - free tier, 900+ tokens/sec, open-source Llama 3.1."""
 
+import asyncio
+import threading
+import time
 from typing import AsyncIterator, Optional
 
 from groq import AsyncGroq
 
 from app.core.config import get_settings
+from app.core.resilience import call_with_policy, get_breaker
+from app.rag.context import trim_history
 from app.utils.logging import get_logger
+from app.utils.metrics import record, record_rate
 
 logger = get_logger(__name__)
 
@@ -39,9 +45,14 @@ class LLMService:
 
     def __init__(self) -> None:
         settings = get_settings()
-        self._client = AsyncGroq(api_key=settings.groq_api_key)
+        # Retries are done by the resilience policy, within the turn budget
+        self._client = AsyncGroq(api_key=settings.groq_api_key, base_url=settings.groq_base_url, max_retries=0)
         self._model = settings.groq_model
         self._max_tokens = settings.groq_max_tokens
+        self._history_budget = settings.history_token_budget
+        self._timeout = settings.llm_timeout_seconds
+        self._stall_timeout = settings.llm_stall_timeout_seconds
+        self._breaker = get_breaker("llm")
 
     def _build_messages(
         self,
@@ -49,10 +60,10 @@ class LLMService:
         query: str,
         history: Optional[list] = None,
     ) -> list:
-        """Build chat messages with context and optional conversation history."""
+        """Build chat messages with context and optional (token-budgeted) conversation history."""
         messages = [{"role": "system", "content": SYSTEM_PROMPT}]
         if history:
-            messages.extend(history)
+            messages.extend(trim_history(history, self._history_budget))
         user_content = query
         if context:
             user_content = (
@@ -71,31 +82,91 @@ class LLMService:
         history: Optional[list] = None,
         stream: bool = False,
     ):
-        """Generate response. Returns full text or async token iterator."""
+        """Generate response. Returns full text or async token iterator.
+
+        Both modes run under the "llm" retry/circuit-breaker policy. A stream is only
+        returned once its first token has arrived, so connection errors, timeouts and
+        an open circuit raise here, where the caller can still fall back.
+        """
         messages = self._build_messages(context, query, history)
         if stream:
-            return self._stream(messages)
-        response = await self._client.chat.completions.create(
-            model=self._model,
-            messages=messages,
-            max_tokens=self._max_tokens,
-            temperature=0.7,
+            return await self._open_stream(messages)
+        start = time.perf_counter()
+        response = await call_with_policy(
+            lambda: self._client.chat.completions.create(
+                model=self._model,
+                messages=messages,
+                max_tokens=self._max_tokens,
+                temperature=0.7,
+            ),
+            self._breaker,
+            self._timeout,
         )
+        elapsed = time.perf_counter() - start
+        record("llm_total", elapsed)
+        usage = getattr(response, "usage", None)
+        if usage is not None and usage.completion_tokens and elapsed > 0:
+            record_rate(usage.completion_tokens / elapsed)
         return response.choices[0].message.content or ""
 
-    async def _stream(self, messages: list):
-        """Stream tokens from Groq."""
-        stream = await self._client.chat.completions.create(
-            model=self._model,
-            messages=messages,
-            max_tokens=self._max_tokens,
-            temperature=0.7,
-            stream=True,
-        )
-        async for chunk in stream:
-            content = chunk.choices[0].delta.content
-            if content:
-                yield content
+    async def _open_stream(self, messages: list) -> AsyncIterator[str]:
+        """Start a completion stream and wait for its first token (retried as a unit)."""
+        start = time.perf_counter()
+
+        async def first_token():
+            stream = await self._client.chat.completions.create(
+                model=self._model,
+                messages=messages,
+                max_tokens=self._max_tokens,
+                temperature=0.7,
+                stream=True,
+            )
+            try:
+                async for chunk in stream:
+                    content = chunk.choices[0].delta.content
+                    if content:
+                        return content, stream
+            except BaseException:
+                await stream.close()
+                raise
+            return None, stream
+
+        first, stream = await call_with_policy(first_token, self._breaker, self._timeout)
+        record("llm_ttft", time.perf_counter() - start)
+        return self._stream(first, stream, start)
+
+    async def _stream(self, first: Optional[str], stream, start: float) -> AsyncIterator[str]:
+        """Yield the rest of the stream, recording tokens/sec; a stalled stream times out.
+
+        The turn budget only bounds the wait for the first token (``_open_stream``):
+        once an answer is flowing, only a gap longer than the stall timeout ends it.
+        """
+        first_at = time.perf_counter()
+        count = 0
+        try:
+            if first:
+                count += 1
+                yield first
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(stream.__anext__(), self._stall_timeout)
+                except StopAsyncIteration:
+                    break
+                except asyncio.TimeoutError:
+                    self._breaker.record_failure()
+                    logger.warning("LLM stream stalled; giving up after %d tokens", count)
+                    raise
+                content = chunk.choices[0].delta.content
+                if content:
+                    count += 1
+                    yield content
+        finally:
+            await stream.close()
+        end = time.perf_counter()
+        record("llm_total", end - start)
+        # Groq streams roughly one token per chunk
+        if count > 1 and end > first_at:
+            record_rate((count - 1) / (end - first_at))
 
     async def warmup(self) -> bool:
         """Verify Groq API key and connectivity."""
@@ -111,13 +182,25 @@ class LLMService:
             logger.warning("LLM warm-up failed: %s", e)
             return False
 
+    async def health_check_async(self, timeout: float = 5.0) -> bool:
+        """Cheap reachability + auth check: model metadata lookup, no tokens generated."""
+        try:
+            await self._client.models.retrieve(self._model, timeout=timeout)
+            return True
+        except Exception as e:
+            logger.warning("LLM health check failed: %s", e)
+            return False
+
 
 _llm_service: Optional[LLMService] = None
+_llm_service_lock = threading.Lock()
 
 
 def get_llm_service() -> LLMService:
     """Get or create the LLM service singleton."""
     global _llm_service
     if _llm_service is None:
-        _llm_service = LLMService()
+        with _llm_service_lock:
+            if _llm_service is None:
+                _llm_service = LLMService()
     return _llm_service
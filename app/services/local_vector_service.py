@@ -0,0 +1,306 @@
+"""Local in-process vector index: a memory-mapped float32 matrix with exact top-k search.
+
+Drop-in alternative to the Qdrant-backed VectorService for small knowledge bases (a few
+thousand 384-dim vectors): retrieval is a single NumPy matrix product instead of a network
+round trip. Each collection is persisted under ``local_index_path`` as ``vectors.npy``
+(unit-normalized rows, memory-mapped on load) next to ``points.json`` (ids, payloads, revision).
+"""
+
+import asyncio
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Optional
+
+import numpy as np
+
+from app.core.config import get_settings
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+
+
+class LocalVectorService:
+    """Exact cosine search over an on-disk float32 matrix; same API as VectorService."""
+
+    def __init__(self) -> None:
+        settings = get_settings()
+        root = Path(settings.local_index_path)
+        if not root.is_absolute():
+            root = PROJECT_ROOT / root
+        self._collection = settings.qdrant_collection
+        self._dir = root / self._collection
+        self._vector_size = settings.embedding_dim
+        self._lock = threading.RLock()
+        self._vectors: np.ndarray = np.zeros((0, self._vector_size), dtype=np.float32)
+        self._ids: list[str] = []
+        self._payloads: list[dict[str, Any]] = []
+        self._row: dict[str, int] = {}
+        # Upserts since the last flush: rows past the end of _vectors, and new values for rows in it.
+        # Folded into one matrix by _materialize(), so a batched ingest copies the index once.
+        self._pending: list[np.ndarray] = []
+        self._updates: dict[int, np.ndarray] = {}
+        self._revision: Optional[str] = None
+        self._loaded_mtime: Optional[int] = None
+        self._dirty = False
+
+    @property
+    def _vectors_path(self) -> Path:
+        return self._dir / "vectors.npy"
+
+    @property
+    def _points_path(self) -> Path:
+        return self._dir / "points.json"
+
+    def _disk_mtime(self) -> Optional[int]:
+        try:
+            return self._points_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _needs_reload(self) -> bool:
+        mtime = self._disk_mtime()
+        return mtime is not None and mtime != self._loaded_mtime and not self._dirty
+
+    def _maybe_reload(self) -> None:
+        """(Re)load the index from disk if another process (ingest) rewrote it."""
+        with self._lock:
+            mtime = self._disk_mtime()
+            if mtime is None or mtime == self._loaded_mtime or self._dirty:
+                return
+            points = json.loads(self._points_path.read_text(encoding="utf-8"))
+            vectors = np.load(self._vectors_path, mmap_mode="r")
+            self._ids = list(points["ids"])
+            self._payloads = list(points["payloads"])
+            self._row = {pid: i for i, pid in enumerate(self._ids)}
+            self._revision = points.get("revision")
+            self._vectors = vectors
+            self._pending, self._updates = [], {}
+            self._loaded_mtime = mtime
+            logger.info("Loaded local vector index %s (%d points)", self._dir, len(self._ids))
+
+    def _materialize(self) -> None:
+        """Fold pending upserts into the matrix (one copy, whatever the number of batches)."""
+        with self._lock:
+            if not self._pending and not self._updates:
+                return
+            vectors = np.array(self._vectors, dtype=np.float32) if self._updates else self._vectors
+            for row, vector in self._updates.items():
+                vectors[row] = vector
+            if self._pending:
+                vectors = np.vstack([vectors, np.stack(self._pending)])
+            self._vectors = vectors
+            self._pending, self._updates = [], {}
+
+    def flush(self) -> None:
+        """Persist pending changes atomically (vectors first, then the points file)."""
+        with self._lock:
+            if not self._dirty:
+                return
+            self._materialize()
+            self._dir.mkdir(parents=True, exist_ok=True)
+            tmp_vectors = self._vectors_path.with_suffix(".tmp.npy")
+            np.save(tmp_vectors, np.ascontiguousarray(self._vectors, dtype=np.float32))
+            os.replace(tmp_vectors, self._vectors_path)
+            tmp_points = self._points_path.with_suffix(".json.tmp")
+            tmp_points.write_text(
+                json.dumps({
+                    "dim": int(self._vectors.shape[1]),
+                    "revision": self._revision,
+                    "ids": self._ids,
+                    "payloads": self._payloads,
+                }),
+                encoding="utf-8",
+            )
+            os.replace(tmp_points, self._points_path)
+            self._loaded_mtime = self._points_path.stat().st_mtime_ns
+            self._dirty = False
+            logger.info("Persisted local vector index %s (%d points)", self._dir, len(self._ids))
+
+    def _reset(self, dim: int) -> None:
+        self._vectors = np.zeros((0, dim), dtype=np.float32)
+        self._ids, self._payloads, self._row = [], [], {}
+        self._pending, self._updates = [], {}
+        self._revision = None
+        self._dirty = True
+
+    def ensure_collection(self, embedding_dim: int | None = None) -> None:
+        """Create the index if missing. Reset it if dimensions mismatch."""
+        dim = embedding_dim if embedding_dim is not None else self._vector_size
+        with self._lock:
+            self._maybe_reload()
+            if self._loaded_mtime is None and not self._dirty:
+                logger.info("Creating local index: %s (dim=%d)", self._dir, dim)
+                self._reset(dim)
+                self.flush()
+            elif self._vectors.shape[1] != dim:
+                logger.info("Local index has dim %d, need %d. Recreating.", self._vectors.shape[1], dim)
+                self._reset(dim)
+                self.flush()
+
+    async def ensure_collection_async(self, embedding_dim: int | None = None) -> None:
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(None, self.ensure_collection, embedding_dim)
+
+    def delete_collection(self) -> None:
+        """Drop the index files."""
+        with self._lock:
+            for path in (self._vectors_path, self._points_path):
+                path.unlink(missing_ok=True)
+            self._reset(self._vector_size)
+            self._dirty = False
+            self._loaded_mtime = None
+            logger.info("Deleted local index: %s", self._dir)
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def upsert(
+        self,
+        ids: list[str],
+        vectors: list[list[float]] | np.ndarray,
+        payloads: list[dict[str, Any]],
+    ) -> None:
+        """Insert or replace points in memory; call flush() to persist.
+
+        An id repeated within one call is stored once, with its last vector and payload.
+        """
+        matrix = self._normalize(np.asarray(vectors, dtype=np.float32).reshape(len(ids), -1))
+        with self._lock:
+            self._maybe_reload()
+            base = len(self._vectors)
+            for i, pid in enumerate(map(str, ids)):
+                payload = {
+                    "content": payloads[i].get("content", ""),
+                    "metadata": payloads[i].get("metadata", {}),
+                }
+                row = self._row.get(pid)
+                if row is None:
+                    self._row[pid] = len(self._ids)
+                    self._ids.append(pid)
+                    self._payloads.append(payload)
+                    self._pending.append(matrix[i])
+                    continue
+                if row >= base:
+                    self._pending[row - base] = matrix[i]
+                else:
+                    self._updates[row] = matrix[i]
+                self._payloads[row] = payload
+            self._dirty = True
+        logger.info("Upserted %d points to local index %s", len(ids), self._collection)
+
+    async def upsert_async(
+        self,
+        ids: list[str],
+        vectors: list[list[float]] | np.ndarray,
+        payloads: list[dict[str, Any]],
+    ) -> None:
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(None, self.upsert, ids, vectors, payloads)
+
+    def delete(self, ids: list[str]) -> None:
+        """Delete points by id (in memory; call flush() to persist)."""
+        with self._lock:
+            self._maybe_reload()
+            self._materialize()
+            doomed = {self._row[pid] for pid in map(str, ids) if pid in self._row}
+            if not doomed:
+                return
+            keep = np.array([i not in doomed for i in range(len(self._ids))], dtype=bool)
+            self._vectors = np.array(self._vectors[keep], dtype=np.float32)
+            self._ids = [pid for i, pid in enumerate(self._ids) if keep[i]]
+            self._payloads = [p for i, p in enumerate(self._payloads) if keep[i]]
+            self._row = {pid: i for i, pid in enumerate(self._ids)}
+            self._dirty = True
+        logger.info("Deleted %d points from local index %s", len(doomed), self._collection)
+
+    def search_many(
+        self,
+        query_vectors: list[list[float]] | np.ndarray,
+        top_k: int = 5,
+        score_threshold: Optional[float] = None,
+    ) -> list[list[dict[str, Any]]]:
+        """Exact top-k for a batch of queries with one matrix product."""
+        queries = self._normalize(np.atleast_2d(np.asarray(query_vectors, dtype=np.float32)))
+        with self._lock:
+            self._maybe_reload()
+            self._materialize()
+            vectors, ids, payloads = self._vectors, self._ids, self._payloads
+        if not ids:
+            return [[] for _ in range(len(queries))]
+        scores = queries @ vectors.T
+        k = min(top_k, len(ids))
+        out: list[list[dict[str, Any]]] = []
+        for row in scores:
+            top = np.argpartition(-row, k - 1)[:k]
+            top = top[np.argsort(-row[top])]
+            out.append([
+                {
+                    "id": ids[i],
+                    "score": float(row[i]),
+                    "content": payloads[i].get("content", ""),
+                    "metadata": payloads[i].get("metadata", {}),
+                }
+                for i in top
+                if score_threshold is None or row[i] >= score_threshold
+            ])
+        return out
+
+    def search(
+        self,
+        query_vector: list[float],
+        top_k: int = 5,
+        score_threshold: Optional[float] = None,
+    ) -> list[dict[str, Any]]:
+        """Search for similar vectors."""
+        return self.search_many([query_vector], top_k=top_k, score_threshold=score_threshold)[0]
+
+    async def search_async(
+        self,
+        query_vector: list[float],
+        top_k: int = 5,
+        score_threshold: Optional[float] = None,
+    ) -> list[dict[str, Any]]:
+        if self._needs_reload():
+            # Parsing every payload of a re-ingested index is too slow for the event loop
+            await asyncio.get_event_loop().run_in_executor(None, self._maybe_reload)
+        # Microseconds of NumPy work: cheaper inline than an executor hop
+        return self.search(query_vector, top_k=top_k, score_threshold=score_threshold)
+
+    async def scroll_points_async(self) -> list[tuple[str, dict[str, Any]]]:
+        """Every point's (id, payload) (used to rebuild the BM25 index)."""
+        await asyncio.get_event_loop().run_in_executor(None, self._maybe_reload)
+        with self._lock:
+            return list(zip(self._ids, self._payloads))
+
+    def set_revision(self, revision: str) -> None:
+        """Stamp the index with a knowledge base revision and persist it."""
+        with self._lock:
+            self._revision = revision
+            self._dirty = True
+            self.flush()
+
+    async def get_revision_async(self) -> str:
+        await asyncio.get_event_loop().run_in_executor(None, self._maybe_reload)
+        return self._revision or f"points:{len(self._ids)}"
+
+    def health_check(self) -> bool:
+        """The local index is healthy once it can be loaded."""
+        try:
+            self._maybe_reload()
+            return True
+        except Exception as e:
+            logger.warning("Local index health check failed: %s", e)
+            return False
+
+    async def health_check_async(self) -> bool:
+        return await asyncio.get_event_loop().run_in_executor(None, self.health_check)
+
+    async def close_async(self) -> None:
+        self.flush()
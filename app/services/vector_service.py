@@ -1,27 +1,40 @@
 """Qdrant vector store service."""
 
+import threading
+import uuid
 from typing import Any, Optional
 
-from qdrant_client import QdrantClient
+import httpx
+import numpy as np
+from qdrant_client import AsyncQdrantClient, QdrantClient
 from qdrant_client.http import models
 from qdrant_client.http.models import Distance, VectorParams
 
 from app.core.config import get_settings
+from app.services.local_vector_service import LocalVectorService
 from app.utils.logging import get_logger
 
 logger = get_logger(__name__)
 
 
 class VectorService:
-    """Qdrant client wrapper for vector operations."""
+    """Qdrant client wrapper for vector operations.
+
+    The sync methods serve the ingestion scripts; the ``*_async`` methods share one
+    pooled, keep-alive ``AsyncQdrantClient`` so request handlers never block the event loop.
+    """
 
     def __init__(self) -> None:
         settings = get_settings()
         self._client: Optional[QdrantClient] = None
+        self._async_client: Optional[AsyncQdrantClient] = None
         self._url = settings.qdrant_url
         self._api_key = settings.qdrant_api_key
         self._collection = settings.qdrant_collection
         self._vector_size = settings.embedding_dim
+        self._timeout = settings.qdrant_timeout
+        self._max_connections = settings.qdrant_max_connections
+        self._keepalive_expiry = settings.qdrant_keepalive_expiry
 
     def _get_client(self) -> QdrantClient:
         """Lazy-initialize Qdrant client."""
@@ -29,10 +42,85 @@ class VectorService:
             self._client = QdrantClient(
                 url=self._url,
                 api_key=self._api_key if self._api_key else None,
+                timeout=self._timeout,
                 check_compatibility=False,
             )
         return self._client
 
+    def _get_async_client(self) -> AsyncQdrantClient:
+        """Lazy-initialize the shared async Qdrant client (pooled keep-alive connections)."""
+        if self._async_client is None:
+            self._async_client = AsyncQdrantClient(
+                url=self._url,
+                api_key=self._api_key if self._api_key else None,
+                timeout=self._timeout,
+                check_compatibility=False,
+                limits=httpx.Limits(
+                    max_connections=self._max_connections,
+                    max_keepalive_connections=self._max_connections,
+                    keepalive_expiry=self._keepalive_expiry,
+                ),
+            )
+        return self._async_client
+
+    @staticmethod
+    def _collection_vector_size(info: Any) -> Optional[int]:
+        """Extract the vector size from collection info (single or named vectors)."""
+        vconfig = getattr(info.config.params, "vectors", None)
+        if hasattr(vconfig, "size"):
+            return vconfig.size
+        if isinstance(vconfig, dict):
+            for v in vconfig.values():
+                if hasattr(v, "size"):
+                    return v.size
+        return None
+
+    def _create_collection_kwargs(self, dim: int) -> dict[str, Any]:
+        return {
+            "collection_name": self._collection,
+            "vectors_config": VectorParams(size=dim, distance=Distance.COSINE),
+            "hnsw_config": models.HnswConfigDiff(m=16, ef_construct=100),
+        }
+
+    @staticmethod
+    def _point_id(id: str) -> str:
+        """Qdrant point id: UUID strings pass through, anything else maps to a stable UUIDv5."""
+        try:
+            return str(uuid.UUID(str(id)))
+        except ValueError:
+            return str(uuid.uuid5(uuid.NAMESPACE_URL, str(id)))
+
+    def _build_points(
+        self,
+        ids: list[str],
+        vectors: list[list[float]] | np.ndarray,
+        payloads: list[dict[str, Any]],
+    ) -> list[models.PointStruct]:
+        # float32 matrices stay compact until here; convert row by row at the wire
+        return [
+            models.PointStruct(
+                id=self._point_id(ids[i]),
+                vector=vectors[i].tolist() if isinstance(vectors, np.ndarray) else vectors[i],
+                payload={
+                    "content": payloads[i].get("content", ""),
+                    "metadata": payloads[i].get("metadata", {}),
+                },
+            )
+            for i in range(len(ids))
+        ]
+
+    @staticmethod
+    def _to_results(points: list[Any]) -> list[dict[str, Any]]:
+        return [
+            {
+                "id": str(r.id),
+                "score": r.score,
+                "content": r.payload.get("content", ""),
+                "metadata": r.payload.get("metadata", {}),
+            }
+            for r in points
+        ]
+
     def ensure_collection(self, embedding_dim: int | None = None) -> None:
         """Create collection if it does not exist. Recreate if dimensions mismatch."""
         dim = embedding_dim if embedding_dim is not None else self._vector_size
@@ -41,16 +129,7 @@ class VectorService:
         names = [c.name for c in collections]
         if self._collection in names:
             try:
-                info = client.get_collection(self._collection)
-                vconfig = getattr(info.config.params, "vectors", None)
-                current_size = None
-                if hasattr(vconfig, "size"):
-                    current_size = vconfig.size
-                elif isinstance(vconfig, dict):
-                    for v in vconfig.values():
-                        if hasattr(v, "size"):
-                            current_size = v.size
-                            break
+                current_size = self._collection_vector_size(client.get_collection(self._collection))
                 if current_size is not None and current_size != dim:
                     logger.info("Collection %s has dim %d, need %d. Recreating.", self._collection, current_size, dim)
                     client.delete_collection(self._collection)
@@ -61,40 +140,74 @@ class VectorService:
                 logger.warning("Could not check collection config: %s. Recreating.", e)
                 client.delete_collection(self._collection)
         logger.info("Creating collection: %s (dim=%d)", self._collection, dim)
-        client.create_collection(
-            collection_name=self._collection,
-            vectors_config=VectorParams(
-                size=dim,
-                distance=Distance.COSINE,
-            ),
-            hnsw_config=models.HnswConfigDiff(
-                m=16,
-                ef_construct=100,
-            ),
-        )
+        client.create_collection(**self._create_collection_kwargs(dim))
+
+    async def ensure_collection_async(self, embedding_dim: int | None = None) -> None:
+        """Async variant of ensure_collection."""
+        dim = embedding_dim if embedding_dim is not None else self._vector_size
+        client = self._get_async_client()
+        collections = (await client.get_collections()).collections
+        names = [c.name for c in collections]
+        if self._collection in names:
+            try:
+                current_size = self._collection_vector_size(await client.get_collection(self._collection))
+                if current_size is not None and current_size != dim:
+                    logger.info("Collection %s has dim %d, need %d. Recreating.", self._collection, current_size, dim)
+                    await client.delete_collection(self._collection)
+                elif current_size == dim:
+                    logger.debug("Collection %s already exists", self._collection)
+                    return
+            except Exception as e:
+                logger.warning("Could not check collection config: %s. Recreating.", e)
+                await client.delete_collection(self._collection)
+        logger.info("Creating collection: %s (dim=%d)", self._collection, dim)
+        await client.create_collection(**self._create_collection_kwargs(dim))
 
     def upsert(
         self,
         ids: list[str],
-        vectors: list[list[float]],
+        vectors: list[list[float]] | np.ndarray,
         payloads: list[dict[str, Any]],
     ) -> None:
         """Upsert vectors with payloads."""
         client = self._get_client()
-        points = [
-            models.PointStruct(
-                id=hash(ids[i]) % (2**63),
-                vector=vectors[i],
-                payload={
-                    "content": payloads[i].get("content", ""),
-                    "metadata": payloads[i].get("metadata", {}),
-                },
-            )
-            for i in range(len(ids))
-        ]
+        points = self._build_points(ids, vectors, payloads)
         client.upsert(collection_name=self._collection, points=points)
         logger.info("Upserted %d points to %s", len(ids), self._collection)
 
+    def delete(self, ids: list[str]) -> None:
+        """Delete points by id."""
+        if not ids:
+            return
+        client = self._get_client()
+        client.delete(
+            collection_name=self._collection,
+            points_selector=models.PointIdsList(points=[self._point_id(i) for i in ids]),
+        )
+        logger.info("Deleted %d points from %s", len(ids), self._collection)
+
+    def delete_collection(self) -> None:
+        """Drop the collection if it exists."""
+        client = self._get_client()
+        if self._collection in [c.name for c in client.get_collections().collections]:
+            client.delete_collection(self._collection)
+            logger.info("Deleted collection: %s", self._collection)
+
+    def flush(self) -> None:
+        """No-op: Qdrant persists writes server-side (kept for parity with the local backend)."""
+
+    async def upsert_async(
+        self,
+        ids: list[str],
+        vectors: list[list[float]] | np.ndarray,
+        payloads: list[dict[str, Any]],
+    ) -> None:
+        """Async variant of upsert."""
+        client = self._get_async_client()
+        points = self._build_points(ids, vectors, payloads)
+        await client.upsert(collection_name=self._collection, points=points)
+        logger.info("Upserted %d points to %s", len(ids), self._collection)
+
     def search(
         self,
         query_vector: list[float],
@@ -109,15 +222,59 @@ class VectorService:
             limit=top_k,
             score_threshold=score_threshold,
         ).points
-        return [
-            {
-                "id": str(r.id),
-                "score": r.score,
-                "content": r.payload.get("content", ""),
-                "metadata": r.payload.get("metadata", {}),
-            }
-            for r in results
-        ]
+        return self._to_results(results)
+
+    async def search_async(
+        self,
+        query_vector: list[float],
+        top_k: int = 5,
+        score_threshold: Optional[float] = None,
+    ) -> list[dict[str, Any]]:
+        """Search for similar vectors without blocking the event loop."""
+        client = self._get_async_client()
+        response = await client.query_points(
+            collection_name=self._collection,
+            query=query_vector,
+            limit=top_k,
+            score_threshold=score_threshold,
+        )
+        return self._to_results(response.points)
+
+    async def scroll_points_async(self, page_size: int = 256) -> list[tuple[str, dict[str, Any]]]:
+        """Every point's (id, payload), without vectors (used to rebuild the BM25 index)."""
+        client = self._get_async_client()
+        points: list[tuple[str, dict[str, Any]]] = []
+        offset = None
+        while True:
+            batch, offset = await client.scroll(
+                collection_name=self._collection,
+                limit=page_size,
+                offset=offset,
+                with_payload=True,
+                with_vectors=False,
+            )
+            points.extend((str(p.id), p.payload or {}) for p in batch)
+            if offset is None:
+                return points
+
+    def set_revision(self, revision: str) -> None:
+        """Stamp the collection with a knowledge base revision so servers can drop stale caches."""
+        try:
+            self._get_client().update_collection(
+                collection_name=self._collection,
+                metadata={"revision": revision},
+            )
+            logger.info("Collection %s revision set to %s", self._collection, revision)
+        except Exception as e:
+            logger.warning("Could not store collection revision (server too old?): %s", e)
+
+    async def get_revision_async(self) -> str:
+        """Current knowledge base revision (stamped revision, else the point count)."""
+        info = await self._get_async_client().get_collection(self._collection)
+        metadata = getattr(info.config, "metadata", None) or {}
+        if metadata.get("revision"):
+            return str(metadata["revision"])
+        return f"points:{info.points_count}"
 
     def health_check(self) -> bool:
         """Check if Qdrant is reachable."""
@@ -128,13 +285,34 @@ class VectorService:
             logger.warning("Qdrant health check failed: %s", e)
             return False
 
+    async def health_check_async(self) -> bool:
+        """Check if Qdrant is reachable (async)."""
+        try:
+            await self._get_async_client().get_collections()
+            return True
+        except Exception as e:
+            logger.warning("Qdrant health check failed: %s", e)
+            return False
+
+    async def close_async(self) -> None:
+        """Close the shared async client and its connection pool."""
+        if self._async_client is not None:
+            await self._async_client.close()
+            self._async_client = None
+
 
-_vector_service: Optional[VectorService] = None
+_vector_service: Optional[VectorService | LocalVectorService] = None
+_vector_service_lock = threading.Lock()
 
 
-def get_vector_service() -> VectorService:
-    """Get or create the vector service singleton."""
+def get_vector_service() -> VectorService | LocalVectorService:
+    """Get or create the vector service singleton for the configured backend."""
     global _vector_service
     if _vector_service is None:
-        _vector_service = VectorService()
+        with _vector_service_lock:
+            if _vector_service is None:
+                if get_settings().vector_backend == "local":
+                    _vector_service = LocalVectorService()
+                else:
+                    _vector_service = VectorService()
     return _vector_service
@@ -0,0 +1,209 @@
+"""In-process latency metrics: Prometheus-format histograms plus per-request stage timings.
+
+Stage timings are recorded with ``timed("stage")`` (or ``record``) anywhere on the hot
+path. Each observation lands in a process-wide histogram labelled by stage and endpoint,
+served on ``/metrics``, and in the current request's ``RequestTimings`` (a context
+variable set by the HTTP middleware), which is reported back to the client as a
+``Server-Timing`` header or a final SSE ``timing`` event.
+"""
+
+import math
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterable, Iterator, Optional
+
+# Seconds; spans sub-ms cache hits through multi-second LLM answers
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+RATE_BUCKETS = (10, 25, 50, 100, 200, 400, 800, 1600)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _fmt(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Histogram:
+    """Cumulative-bucket histogram with labels (Prometheus semantics)."""
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> None:
+        self.name = name
+        self.help = help_text
+        self.labelnames = labelnames
+        self._buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._series: dict[tuple[str, ...], list] = {}  # labels -> [bucket counts, sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self._buckets), 0.0, 0]
+            for i, bound in enumerate(self._buckets):
+                if value <= bound:
+                    series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            snapshot = [(k, list(s[0]), s[1], s[2]) for k, s in sorted(self._series.items())]
+        for key, counts, total, count in snapshot:
+            for bound, n in zip(self._buckets, counts):
+                le = 'le="' + _fmt(bound) + '"'
+                yield f"{self.name}_bucket{_labels(self.labelnames, key, le)} {n}"
+            yield f"{self.name}_sum{_labels(self.labelnames, key)} {total}"
+            yield f"{self.name}_count{_labels(self.labelnames, key)} {count}"
+
+
+class MetricsRegistry:
+    """Named histograms rendered together in the Prometheus text exposition format."""
+
+    def __init__(self) -> None:
+        self._metrics: dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def histogram(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = Histogram(name, help_text, labelnames, buckets)
+            return self._metrics[name]
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+def render_gauges(name: str, help_text: str, samples: Iterable[tuple[dict[str, str], float]]) -> str:
+    """Prometheus text for a gauge computed at scrape time (e.g. cache hit rates)."""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+    for labels, value in samples:
+        names = tuple(labels)
+        lines.append(f"{name}{_labels(names, tuple(labels[n] for n in names))} {_fmt(value)}")
+    return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "voice_stage_duration_seconds",
+    "Duration of one pipeline stage (stt, embed, search, bm25, llm_ttft, llm_total, tts_ttfb)",
+    ("stage", "endpoint"),
+)
+LLM_TOKENS_PER_SECOND = REGISTRY.histogram(
+    "llm_tokens_per_second",
+    "LLM generation throughput after the first token",
+    ("endpoint",),
+    RATE_BUCKETS,
+)
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    "http_request_duration_seconds",
+    "Time until response headers are sent",
+    ("endpoint", "method", "status"),
+)
+
+
+class RequestTimings:
+    """Stage durations (milliseconds, summed per stage) for one request."""
+
+    def __init__(self, endpoint: str = "") -> None:
+        self.endpoint = endpoint
+        self.stages: dict[str, float] = {}
+        self.marks: dict[str, str] = {}
+
+    def add(self, stage: str, seconds: float) -> None:
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds * 1000
+
+    def mark(self, name: str, value: str) -> None:
+        """Non-timing annotation, e.g. ``mark("cache", "hit")``."""
+        self.marks[name] = value
+
+    def to_dict(self) -> dict[str, float | str]:
+        out: dict[str, float | str] = {k: round(v, 1) for k, v in self.stages.items()}
+        out.update(self.marks)
+        return out
+
+    def server_timing(self) -> str:
+        """``Server-Timing`` header value."""
+        parts = [f"{k};dur={v:.1f}" for k, v in self.stages.items()]
+        parts += [f'{k};desc="{v}"' for k, v in self.marks.items()]
+        return ", ".join(parts)
+
+
+_current: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+def start_request(endpoint: str) -> RequestTimings:
+    """Install a fresh RequestTimings for the current context (called by the middleware)."""
+    timings = RequestTimings(endpoint)
+    _current.set(timings)
+    return timings
+
+
+def current_timings() -> Optional[RequestTimings]:
+    return _current.get()
+
+
+def record(stage: str, seconds: float, first_only: bool = False) -> None:
+    """Record one stage duration in the histogram and the current request's timings.
+
+    With ``first_only`` the request keeps only the first observation (e.g. TTS
+    time-to-first-byte of the first sentence), while the histogram still gets every one.
+    """
+    timings = _current.get()
+    STAGE_SECONDS.observe(seconds, stage=stage, endpoint=timings.endpoint if timings else "")
+    if timings is not None and not (first_only and stage in timings.stages):
+        timings.add(stage, seconds)
+
+
+def mark(name: str, value: str) -> None:
+    """Annotate the current request (no-op outside a request)."""
+    timings = _current.get()
+    if timings is not None:
+        timings.mark(name, value)
+
+
+def record_rate(tokens_per_second: float) -> None:
+    timings = _current.get()
+    LLM_TOKENS_PER_SECOND.observe(tokens_per_second, endpoint=timings.endpoint if timings else "")
+    mark("llm_tps", f"{tokens_per_second:.0f}")
+
+
+@contextmanager
+def timed(stage: str) -> Iterator[None]:
+    """Time the enclosed block as ``stage``."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(stage, time.perf_counter() - start)
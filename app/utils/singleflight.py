@@ -0,0 +1,80 @@
+"""Request coalescing: one in-flight computation per key, shared by every concurrent caller."""
+
+import asyncio
+from typing import AsyncIterator, Awaitable, Callable, Generic, Hashable, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight(Generic[T]):
+    """Concurrent ``do(key, fn)`` calls with the same key await a single ``fn()``.
+
+    The shared task is shielded: a caller that disconnects does not cancel the work
+    the others are waiting on. The key is released as soon as the task finishes, so
+    results are never served stale; only truly concurrent callers share.
+    """
+
+    def __init__(self) -> None:
+        self._calls: dict[Hashable, asyncio.Future] = {}
+
+    def in_flight(self, key: Hashable) -> bool:
+        return key in self._calls
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        fut = self._calls.get(key)
+        if fut is None:
+            fut = asyncio.ensure_future(fn())
+            self._calls[key] = fut
+
+            def _release(done: asyncio.Future) -> None:
+                if self._calls.get(key) is done:
+                    del self._calls[key]
+
+            fut.add_done_callback(_release)
+        return await asyncio.shield(fut)
+
+
+class TokenBroadcast:
+    """Fan one token stream out to many subscribers.
+
+    A background task drains the source into a buffer; each subscriber replays the
+    buffer from the start and then follows live tokens, so late joiners get the same
+    full answer. An error in the source is re-raised in every subscriber.
+    """
+
+    def __init__(self, source: AsyncIterator[str], on_done: Optional[Callable[[], None]] = None) -> None:
+        self._tokens: list[str] = []
+        self._done = False
+        self._error: Optional[BaseException] = None
+        self._changed = asyncio.Event()
+        self._on_done = on_done
+        self._task = asyncio.create_task(self._pump(source))
+
+    def _notify(self) -> None:
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def _pump(self, source: AsyncIterator[str]) -> None:
+        try:
+            async for token in source:
+                self._tokens.append(token)
+                self._notify()
+        except Exception as e:
+            self._error = e
+        finally:
+            self._done = True
+            self._notify()
+            if self._on_done is not None:
+                self._on_done()
+
+    async def subscribe(self) -> AsyncIterator[str]:
+        i = 0
+        while True:
+            while i < len(self._tokens):
+                yield self._tokens[i]
+                i += 1
+            if self._done:
+                if self._error is not None:
+                    raise self._error
+                return
+            await self._changed.wait()
@@ -0,0 +1,373 @@
+"""Streaming voice sessions over a WebSocket (``/api/voice/ws``).
+
+One connection carries a whole conversation. The client streams raw PCM (16-bit
+little-endian mono) as binary frames while it records; the server buffers it in a
+ring buffer, detects end of speech itself, and answers on the same socket with the
+same events as the SSE voice endpoint (``transcription``, ``token``, ``audio``,
+``audio_end``, ``timing``, ``done``). Speech detected while an answer is still
+running is a barge-in: the answer is cancelled (``barge_in``) and the new
+utterance is buffered.
+
+With ``VOICE_WS_PARTIALS`` on, a short pause inside an utterance triggers a
+``partial`` transcript of the audio so far, and retrieval for it starts at once
+(``RAGChain.speculate``). If the user then stops without saying more, that
+transcript is final and its retrieval is already done. Otherwise the final
+transcript decides whether the speculative chunks are reused or thrown away.
+Partials are admitted like turns (rate limiter and concurrency gate), at most
+one runs at a time, and one that cannot be admitted is simply skipped.
+
+Client control messages (JSON text frames):
+
+- ``{"type": "start", "sample_rate": 16000, "tts": true, "history": [...]}`` - optional, configures the session
+- ``{"type": "end"}`` - end the current utterance now (push-to-talk)
+- ``{"type": "cancel"}`` - stop the answer in progress
+"""
+
+import asyncio
+import contextlib
+import json
+import math
+import time
+from typing import AsyncIterator, Optional
+
+import numpy as np
+from fastapi import WebSocket, WebSocketDisconnect
+
+from app.core.config import Settings
+from app.core.limits import ConcurrencyGate, OverloadedError, RateLimiter
+from app.core.resilience import start_turn
+from app.rag.chain import RAGChain, Speculation
+from app.utils.logging import get_logger
+from app.utils.metrics import HTTP_REQUEST_SECONDS, current_timings, mark, start_request
+from app.voice.streaming import speak_tokens
+from app.voice.stt import transcribe_bytes_async
+from app.voice.tts import media_type as tts_media_type
+from app.voice.vad import EndOfSpeechDetector, encode_wav
+
+logger = get_logger(__name__)
+
+ENDPOINT = "/api/voice/ws"
+NO_SPEECH_ANSWER = "I didn't quite catch that. Could you repeat your question?"
+
+
+class PCMRingBuffer:
+    """Fixed-capacity int16 ring buffer: writes past capacity overwrite the oldest samples."""
+
+    def __init__(self, capacity: int) -> None:
+        self._buf = np.zeros(max(1, capacity), dtype=np.int16)
+        self._start = 0
+        self._len = 0
+
+    @property
+    def capacity(self) -> int:
+        return len(self._buf)
+
+    @property
+    def full(self) -> bool:
+        return self._len == len(self._buf)
+
+    def __len__(self) -> int:
+        return self._len
+
+    def write(self, samples: np.ndarray) -> None:
+        cap = len(self._buf)
+        if len(samples) >= cap:
+            self._buf[:] = samples[-cap:]
+            self._start, self._len = 0, cap
+            return
+        end = (self._start + self._len) % cap
+        first = min(len(samples), cap - end)
+        self._buf[end:end + first] = samples[:first]
+        self._buf[: len(samples) - first] = samples[first:]
+        overflow = max(0, self._len + len(samples) - cap)
+        self._start = (self._start + overflow) % cap
+        self._len = min(cap, self._len + len(samples))
+
+    def keep_last(self, n: int) -> None:
+        """Drop all but the newest ``n`` samples."""
+        drop = max(0, self._len - n)
+        self._start = (self._start + drop) % len(self._buf)
+        self._len -= drop
+
+    def read(self) -> np.ndarray:
+        """Copy of the buffered samples, oldest first."""
+        idx = (self._start + np.arange(self._len)) % len(self._buf)
+        return self._buf[idx]
+
+    def clear(self) -> None:
+        self._start = self._len = 0
+
+
+async def _as_tokens(result) -> AsyncIterator[str]:
+    if hasattr(result, "__aiter__"):
+        async for token in result:
+            yield token
+    else:
+        yield result
+
+
+def _release_partial(partial: Optional[asyncio.Task]) -> None:
+    """Cancel a partial transcript, or the speculative retrieval it already started."""
+    if partial is None:
+        return
+    if not partial.done():
+        partial.cancel()
+    elif not partial.cancelled() and partial.exception() is None:
+        _, speculation = partial.result()
+        if speculation is not None:
+            speculation.cancel()
+
+
+class VoiceSession:
+    """State of one ``/api/voice/ws`` connection: audio buffer, VAD, history, current answer."""
+
+    def __init__(self, websocket: WebSocket, chain: RAGChain, settings: Settings) -> None:
+        self._ws = websocket
+        self._chain = chain
+        self._settings = settings
+        self._send_lock = asyncio.Lock()
+        self._tts = True
+        self._history: list[dict] = []
+        self._answer: Optional[asyncio.Task] = None
+        # Transcript (+ speculative retrieval) of the current utterance up to its last pause
+        self._partial: Optional[asyncio.Task] = None
+        self._partial_voiced = 0
+        # Installed by AdmissionMiddleware: each turn is admitted like a voice POST
+        state = websocket.scope.get("state") or {}
+        self._limiter: Optional[RateLimiter] = state.get("voice_limiter")
+        self._gate: Optional[ConcurrencyGate] = state.get("voice_gate")
+        self._configure(settings.voice_ws_sample_rate)
+
+    def _configure(self, sample_rate: int) -> None:
+        s = self._settings
+        self._rate = sample_rate
+        pause_ms = s.vad_pause_ms if s.voice_ws_partials else 0
+        self._vad = EndOfSpeechDetector(
+            sample_rate, s.vad_energy_threshold, s.vad_min_speech_ms, s.vad_silence_ms, s.vad_frame_ms, pause_ms
+        )
+        # Keep the pre-roll plus the audio it takes to confirm speech, so onsets are not clipped
+        self._preroll = sample_rate * (s.vad_preroll_ms + s.vad_min_speech_ms) // 1000
+        capacity = int(sample_rate * s.voice_ws_max_utterance_seconds) + self._preroll
+        self._buffer = PCMRingBuffer(capacity)
+
+    @property
+    def _client_key(self) -> str:
+        client = self._ws.client
+        return client.host if client else "unknown"
+
+    @property
+    def _answering(self) -> bool:
+        return self._answer is not None and not self._answer.done()
+
+    async def _send(self, payload: dict) -> None:
+        async with self._send_lock:
+            await self._ws.send_text(json.dumps(payload))
+
+    async def run(self) -> None:
+        await self._ws.accept()
+        await self._send({"type": "ready", "sample_rate": self._rate, "audio": tts_media_type()})
+        try:
+            while True:
+                message = await self._ws.receive()
+                if message["type"] == "websocket.disconnect":
+                    break
+                if message.get("bytes") is not None:
+                    await self._on_audio(message["bytes"])
+                elif message.get("text") is not None:
+                    await self._on_control(message["text"])
+        except WebSocketDisconnect:
+            pass
+        finally:
+            self._discard_partial()
+            await self._cancel_answer()
+
+    async def _on_control(self, text: str) -> None:
+        try:
+            msg = json.loads(text)
+            kind = msg.get("type")
+        except (ValueError, AttributeError):
+            await self._send({"type": "error", "detail": "Invalid control message"})
+            return
+        if kind == "start":
+            rate = msg.get("sample_rate", self._rate)
+            if not isinstance(rate, int) or not 8000 <= rate <= 48000:
+                await self._send({"type": "error", "detail": "sample_rate must be 8000-48000"})
+                return
+            self._tts = bool(msg.get("tts", self._tts))
+            if isinstance(msg.get("history"), list):
+                self._history = msg["history"][-self._settings.voice_ws_history_messages:]
+            self._configure(rate)
+        elif kind == "end":
+            self._vad.force_end()
+            await self._end_utterance()
+        elif kind == "cancel":
+            if await self._cancel_answer():
+                await self._send({"type": "cancelled"})
+        else:
+            await self._send({"type": "error", "detail": f"Unknown message type: {kind}"})
+
+    async def _on_audio(self, data: bytes) -> None:
+        samples = np.frombuffer(data[: len(data) // 2 * 2], dtype="<i2")
+        # Raise the bar while an answer is playing so its own echo does not count as speech
+        factor = self._settings.vad_barge_in_factor if self._answering else 1.0
+        self._vad.threshold = self._settings.vad_energy_threshold * factor
+        self._buffer.write(samples)
+        for event in self._vad.feed(samples):
+            if event == "start":
+                self._discard_partial()
+                if await self._cancel_answer():
+                    await self._send({"type": "barge_in"})
+                await self._send({"type": "speech_start"})
+            elif event == "pause":
+                self._start_partial()
+            else:
+                await self._end_utterance()
+        if not self._vad.in_speech:
+            self._buffer.keep_last(self._preroll)
+        elif self._buffer.full:
+            logger.info("Utterance reached %.0fs; ending turn", self._settings.voice_ws_max_utterance_seconds)
+            self._vad.force_end()
+            await self._end_utterance()
+
+    def _start_partial(self) -> None:
+        if self._partial is not None and not self._partial.done():
+            return  # one partial at a time; the end-of-turn transcript covers the rest
+        if self._limiter is not None and self._limiter.acquire(self._client_key):
+            return  # partials are an optimization: never queue or report them
+        self._discard_partial()
+        self._partial_voiced = self._vad.voiced_frames
+        self._partial = asyncio.create_task(self._partial_transcript(self._buffer.read()))
+
+    def _discard_partial(self) -> None:
+        partial, self._partial = self._partial, None
+        _release_partial(partial)
+
+    async def _partial_transcript(self, pcm: np.ndarray) -> tuple[str, Optional[Speculation]]:
+        """Transcribe the utterance so far and start retrieval for it."""
+        try:
+            if self._gate is not None:
+                await self._gate.acquire()
+        except OverloadedError:
+            return "", None
+        try:
+            text = await transcribe_bytes_async(encode_wav(pcm, self._rate))
+        finally:
+            if self._gate is not None:
+                self._gate.release()
+        if not text:
+            return "", None
+        await self._send({"type": "partial", "text": text})
+        if not self._settings.speculative_retrieval:
+            return text, None
+        return text, self._chain.speculate(text, list(self._history) or None)
+
+    async def _end_utterance(self) -> None:
+        pcm = self._buffer.read()
+        self._buffer.clear()
+        partial, self._partial = self._partial, None
+        if len(pcm) <= self._preroll:
+            _release_partial(partial)
+            return
+        # Nothing voiced since the pause: the partial transcript is the final one
+        final = partial is not None and self._vad.voiced_frames == self._partial_voiced
+        # Let a cancelled answer record its partial exchange and free its gate slot first
+        await self._cancel_answer()
+        self._answer = asyncio.create_task(self._run_turn(pcm, partial, final))
+
+    async def _cancel_answer(self) -> bool:
+        """Cancel the answer in progress; True if there was one."""
+        task, self._answer = self._answer, None
+        if task is None or task.done():
+            return False
+        task.cancel()
+        try:
+            await task
+        except (asyncio.CancelledError, Exception):
+            pass
+        return True
+
+    async def _transcribe_turn(
+        self, pcm: np.ndarray, partial: Optional[asyncio.Task], final: bool
+    ) -> tuple[str, Optional[Speculation]]:
+        """Final transcript of the turn plus any speculative retrieval to offer the chain."""
+        if partial is not None and final:
+            try:
+                text, speculation = await partial
+            except Exception as e:
+                logger.warning("Partial transcript failed, transcribing again: %s", e)
+            else:
+                if text:
+                    mark("stt", "partial")
+                    return text, speculation
+        text = await transcribe_bytes_async(encode_wav(pcm, self._rate))
+        # The partial's retrieval ran alongside the final STT; the chain checks it still fits
+        if partial is None or not partial.done() or partial.cancelled() or partial.exception() is not None:
+            _release_partial(partial)
+            return text, None
+        return text, partial.result()[1]
+
+    async def _run_turn(self, pcm: np.ndarray, partial: Optional[asyncio.Task] = None, final: bool = False) -> None:
+        """One conversational turn: STT -> RAG stream -> (TTS) events, admitted like a voice POST."""
+        start_request(ENDPOINT)
+        start_turn()
+        started = time.perf_counter()
+        status = "200"
+        retry_after = self._limiter.acquire(self._client_key) if self._limiter else 0.0
+        if retry_after:
+            _release_partial(partial)
+            await self._send({"type": "error", "detail": "Too many requests", "retry_after": math.ceil(retry_after)})
+            return
+        try:
+            if self._gate is not None:
+                await self._gate.acquire()
+        except OverloadedError:
+            _release_partial(partial)
+            await self._send({"type": "error", "detail": "Server busy, please retry", "retry_after": 1})
+            return
+        text, parts = "", []
+        speculation: Optional[Speculation] = None
+        try:
+            text, speculation = await self._transcribe_turn(pcm, partial, final)
+            partial = None
+            await self._send({"type": "transcription", "text": text})
+            if text:
+                handed_over, speculation = speculation, None
+                result = await self._chain.query(
+                    text, stream=True, history=list(self._history) or None, speculation=handed_over
+                )
+            else:
+                result = NO_SPEECH_ANSWER
+            tokens = _as_tokens(result)
+            events = speak_tokens(tokens) if self._tts else ({"type": "token", "text": t} async for t in tokens)
+            async for evt in events:
+                if evt["type"] == "token":
+                    parts.append(evt["text"])
+                await self._send(evt)
+            timings = current_timings()
+            await self._send({"type": "timing", **(timings.to_dict() if timings else {})})
+            await self._send({"type": "done"})
+        except asyncio.CancelledError:
+            status = "499"
+            raise
+        except OverloadedError:
+            status = "503"
+            with contextlib.suppress(Exception):
+                await self._send({"type": "error", "detail": "Server busy, please retry", "retry_after": 1})
+                await self._send({"type": "done"})
+        except Exception as e:
+            status = "500"
+            logger.error("Voice session turn failed: %s", e)
+            with contextlib.suppress(Exception):
+                await self._send({"type": "error", "detail": "Voice turn failed"})
+                await self._send({"type": "done"})
+        finally:
+            _release_partial(partial)
+            if speculation is not None:
+                speculation.cancel()
+            if self._gate is not None:
+                self._gate.release()
+            HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint=ENDPOINT, method="WS", status=status)
+            if parts and text:
+                # A barged-in answer is remembered as far as it got
+                self._history += [{"role": "user", "content": text}, {"role": "assistant", "content": "".join(parts)}]
+                self._history = self._history[-self._settings.voice_ws_history_messages:]
@@ -0,0 +1,127 @@
+"""Server-side sentence segmentation and streaming TTS over a token stream.
+
+As LLM tokens arrive, completed sentences are handed to TTS immediately (a few in
+parallel) and their audio chunks are emitted in sentence order, interleaved with the
+token events, so the client never has to make a TTS request of its own.
+"""
+
+import asyncio
+import base64
+import re
+from typing import AsyncIterator, Callable, Optional
+
+from app.utils.logging import get_logger
+from app.voice.tts import stream_cached
+
+logger = get_logger(__name__)
+
+# A sentence ends at . ! or ? (optionally followed by closing quotes/brackets) and whitespace
+_SENTENCE_END_RE = re.compile(r"[.!?]+[\"')\]]*\s+")
+
+MAX_PARALLEL_TTS = 3
+
+_END = object()
+
+
+class SentenceSegmenter:
+    """Incrementally split a token stream into sentences."""
+
+    def __init__(self, min_chars: int = 12) -> None:
+        self._buffer = ""
+        self._min_chars = min_chars
+
+    def feed(self, token: str) -> list[str]:
+        """Add a token; return any sentences completed by it."""
+        self._buffer += token
+        sentences: list[str] = []
+        start = 0
+        for m in _SENTENCE_END_RE.finditer(self._buffer):
+            candidate = self._buffer[start:m.end()].strip()
+            # Very short fragments ("Hi." / "Sure!") ride along with the next sentence
+            if len(candidate) < self._min_chars:
+                continue
+            sentences.append(candidate)
+            start = m.end()
+        self._buffer = self._buffer[start:]
+        return sentences
+
+    def flush(self) -> Optional[str]:
+        """Return the trailing partial sentence, if any."""
+        rest, self._buffer = self._buffer.strip(), ""
+        return rest or None
+
+
+async def speak_tokens(
+    tokens: AsyncIterator[str],
+    synthesize: Callable[[str], AsyncIterator[bytes]] = stream_cached,
+    max_parallel: int = MAX_PARALLEL_TTS,
+) -> AsyncIterator[dict]:
+    """Yield ``token`` events as they arrive plus ordered ``audio`` / ``audio_end`` events.
+
+    ``audio`` events carry base64 audio chunks (``TTS_FORMAT``) for sentence ``index``; ``audio_end`` marks the
+    end of that sentence's audio and repeats its text for caption sync.
+    """
+    out: asyncio.Queue = asyncio.Queue()
+    sentences: asyncio.Queue = asyncio.Queue()
+    sem = asyncio.Semaphore(max_parallel)
+    tts_tasks: list[asyncio.Task] = []
+
+    async def synthesize_into(sentence: str, chunks: asyncio.Queue) -> None:
+        try:
+            async with sem:
+                async for data in synthesize(sentence):
+                    await chunks.put(data)
+        except Exception as e:
+            logger.warning("Streaming TTS failed for sentence %r: %s", sentence[:40], e)
+        finally:
+            await chunks.put(_END)
+
+    def start_sentence(text: str) -> None:
+        chunks: asyncio.Queue = asyncio.Queue()
+        tts_tasks.append(asyncio.create_task(synthesize_into(text, chunks)))
+        sentences.put_nowait((text, chunks))
+
+    async def produce() -> None:
+        segmenter = SentenceSegmenter()
+        try:
+            async for token in tokens:
+                await out.put({"type": "token", "text": token})
+                for sentence in segmenter.feed(token):
+                    start_sentence(sentence)
+            rest = segmenter.flush()
+            if rest:
+                start_sentence(rest)
+        finally:
+            await sentences.put(_END)
+            await out.put(_END)
+
+    async def emit_audio() -> None:
+        index = 0
+        try:
+            while (item := await sentences.get()) is not _END:
+                text, chunks = item
+                while (data := await chunks.get()) is not _END:
+                    await out.put({
+                        "type": "audio",
+                        "index": index,
+                        "data": base64.b64encode(data).decode("ascii"),
+                    })
+                await out.put({"type": "audio_end", "index": index, "text": text})
+                index += 1
+        finally:
+            await out.put(_END)
+
+    workers = [asyncio.create_task(produce()), asyncio.create_task(emit_audio())]
+    try:
+        finished = 0
+        while finished < len(workers):
+            evt = await out.get()
+            if evt is _END:
+                finished += 1
+                continue
+            yield evt
+        for w in workers:
+            w.result()  # surface producer errors (e.g. the LLM stream failed)
+    finally:
+        for task in workers + tts_tasks:
+            task.cancel()
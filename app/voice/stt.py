@@ -1,51 +1,53 @@
-"""Speech-to-Text via Groq Whisper API (cloud, ~1s latency)."""
+"""Speech-to-text: silence trimming, then the configured backend (Groq Whisper API or local)."""
 
 import asyncio
-import tempfile
 from pathlib import Path
-from typing import Optional
-
-from groq import AsyncGroq
 
 from app.core.config import get_settings
+from app.core.limits import OverloadedError
 from app.utils.logging import get_logger
+from app.utils.metrics import mark, timed
+from app.voice.stt_backends import get_stt_backend
+from app.voice.vad import prepare_for_stt
 
 logger = get_logger(__name__)
 
-_groq_client: Optional[AsyncGroq] = None
-
-
-def _get_client() -> AsyncGroq:
-    """Get or create Groq async client."""
-    global _groq_client
-    if _groq_client is None:
-        settings = get_settings()
-        _groq_client = AsyncGroq(api_key=settings.groq_api_key)
-    return _groq_client
 
+async def transcribe_bytes_async(audio_bytes: bytes | memoryview) -> str:
+    """Transcribe audio bytes with the configured STT backend (``STT_BACKEND``).
 
-async def transcribe_bytes_async(audio_bytes: bytes) -> str:
-    """Transcribe audio bytes using Groq Whisper API. Fast cloud STT."""
-    with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as f:
-        f.write(audio_bytes)
-        path = f.name
+    The buffer is processed in memory; nothing touches the filesystem.
+    WAV input is first trimmed to its speech and resampled to 16 kHz mono (see
+    ``app.voice.vad``); a turn with no speech returns "" without calling Groq.
+    """
     try:
-        client = _get_client()
-        with open(path, "rb") as audio_file:
-            transcription = await client.audio.transcriptions.create(
-                file=("recording.wav", audio_file),
-                model="whisper-large-v3",
-                language="en",
-                response_format="text",
-            )
-        result = transcription.strip() if isinstance(transcription, str) else str(transcription).strip()
+        settings = get_settings()
+        backend = get_stt_backend()
+        data = bytes(audio_bytes) if isinstance(audio_bytes, memoryview) else audio_bytes
+        if settings.stt_trim_silence:
+            with timed("vad"):
+                data = await asyncio.get_event_loop().run_in_executor(
+                    None,
+                    prepare_for_stt,
+                    data,
+                    settings.stt_vad_threshold,
+                    settings.vad_frame_ms,
+                    settings.vad_min_speech_ms,
+                    settings.stt_vad_padding_ms,
+                )
+            if data is None:
+                logger.info("No speech detected; skipping STT")
+                mark("stt", "no_speech")
+                return ""
+        with timed("stt"):
+            result = await backend.transcribe(data)
         logger.info("STT result (%d chars): %s", len(result), result[:80])
         return result
+    except OverloadedError:
+        raise
     except Exception as e:
-        logger.error("Groq Whisper STT failed: %s", e)
+        logger.error("STT (%s) failed: %s", get_settings().stt_backend, e)
         return ""
-    finally:
-        Path(path).unlink(missing_ok=True)
 
 
 async def transcribe_async(audio_path: str | Path) -> str:
@@ -65,11 +67,14 @@ def transcribe_bytes(audio_bytes: bytes) -> str:
 
 
 async def warmup() -> bool:
-    """Test Groq Whisper connectivity."""
+    """Prepare the STT backend (Groq client, or load and exercise the local model)."""
     try:
-        _get_client()
-        logger.info("STT (Groq Whisper) ready")
-        return True
+        return await get_stt_backend().warmup()
     except Exception as e:
         logger.warning("STT warm-up failed: %s", e)
         return False
+
+
+async def aclose() -> None:
+    """Release the STT backend's client or worker threads."""
+    await get_stt_backend().aclose()
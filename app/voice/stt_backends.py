@@ -0,0 +1,277 @@
+"""Speech-to-text backends: the Groq Whisper API (default) or faster-whisper on local CPU.
+
+``STT_BACKEND`` selects one. The input is the compact 16 kHz mono WAV produced by
+``app.voice.vad.prepare_for_stt`` (or the raw upload when trimming is off).
+
+The local backend loads the model once (at warm-up) and runs inference on its own
+thread pool. Requests wait in a bounded queue: when it is full the caller gets
+OverloadedError (a fast 503) instead of an ever-growing backlog. Short utterances
+queued at the same time are decoded as one batch, which costs little more than a
+single one on CPU. A batch is only what is already waiting when a worker frees up,
+so an idle server adds no batching delay.
+"""
+
+import asyncio
+import io
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import numpy as np
+from groq import AsyncGroq
+
+from app.core.config import Settings, get_settings
+from app.core.limits import OverloadedError
+from app.core.resilience import call_with_policy, get_breaker, stage_timeout
+from app.utils.logging import get_logger
+from app.voice.vad import STT_SAMPLE_RATE, decode_wav, resample, to_mono
+
+logger = get_logger(__name__)
+
+LANGUAGE = "en"
+
+
+class STTBackend:
+    """Transcribe one utterance (WAV bytes) to text."""
+
+    name = "base"
+
+    async def transcribe(self, audio: bytes) -> str:
+        raise NotImplementedError
+
+    async def warmup(self) -> bool:
+        return True
+
+    async def aclose(self) -> None:
+        pass
+
+
+class GroqSTTBackend(STTBackend):
+    """Groq's hosted whisper-large-v3, under the "stt" retry/circuit-breaker policy."""
+
+    name = "groq"
+
+    def __init__(self, settings: Settings) -> None:
+        self._settings = settings
+        self._client: Optional[AsyncGroq] = None
+        self._client_lock = threading.Lock()
+
+    def _get_client(self) -> AsyncGroq:
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    # Retries are done by the resilience policy, within the turn budget
+                    self._client = AsyncGroq(
+                        api_key=self._settings.groq_api_key, base_url=self._settings.groq_base_url, max_retries=0
+                    )
+        return self._client
+
+    async def transcribe(self, audio: bytes) -> str:
+        client = self._get_client()
+        transcription = await call_with_policy(
+            lambda: client.audio.transcriptions.create(
+                file=("recording.wav", audio),
+                model="whisper-large-v3",
+                language=LANGUAGE,
+                response_format="text",
+            ),
+            get_breaker("stt"),
+            self._settings.stt_timeout_seconds,
+        )
+        return transcription.strip() if isinstance(transcription, str) else str(transcription).strip()
+
+    async def warmup(self) -> bool:
+        self._get_client()
+        logger.info("STT (Groq Whisper) ready")
+        return True
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+
+def _load_pcm(audio: bytes) -> np.ndarray:
+    """Float32 16 kHz mono samples from WAV bytes (other containers go through faster-whisper/PyAV)."""
+    try:
+        samples, rate = decode_wav(audio)
+    except ValueError:
+        from faster_whisper import decode_audio
+
+        return decode_audio(io.BytesIO(audio), sampling_rate=STT_SAMPLE_RATE)
+    return resample(to_mono(samples), rate, STT_SAMPLE_RATE).astype(np.float32)
+
+
+class LocalWhisperBackend(STTBackend):
+    """faster-whisper (CTranslate2) on local CPU/GPU, honoring the ``stt_*`` settings."""
+
+    name = "local"
+
+    def __init__(self, settings: Settings) -> None:
+        self._settings = settings
+        self._workers = max(1, settings.stt_workers)
+        self._batch_size = max(1, settings.stt_batch_size)
+        self._batch_max_samples = int(settings.stt_batch_max_seconds * STT_SAMPLE_RATE)
+        self._model = None
+        self._model_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix="stt")
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._running: set[asyncio.Task] = set()
+
+    def _get_model(self):
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    try:
+                        from faster_whisper import WhisperModel
+                    except ImportError as e:
+                        raise RuntimeError("STT_BACKEND=local needs faster-whisper (pip install faster-whisper)") from e
+                    s = self._settings
+                    logger.info("Loading faster-whisper %s (%s, %s)", s.stt_model_size, s.stt_device, s.stt_compute_type)
+                    self._model = WhisperModel(
+                        s.stt_model_size,
+                        device=s.stt_device,
+                        compute_type=s.stt_compute_type,
+                        cpu_threads=s.stt_cpu_threads,
+                        num_workers=self._workers,
+                    )
+        return self._model
+
+    # -- inference (worker threads) ------------------------------------------
+
+    def _transcribe_one(self, audio: np.ndarray) -> str:
+        segments, _ = self._get_model().transcribe(
+            audio, language=LANGUAGE, beam_size=1, condition_on_previous_text=False, vad_filter=False
+        )
+        return " ".join(segment.text.strip() for segment in segments).strip()
+
+    def _transcribe_batched(self, audios: list[np.ndarray]) -> list[str]:
+        """Decode several utterances (each under 30 s) in one encoder/decoder pass."""
+        from faster_whisper.tokenizer import Tokenizer
+
+        model = self._get_model()
+        extractor = model.feature_extractor
+        frames = extractor.nb_max_frames
+        features = np.stack([
+            np.pad(f[:, :frames], ((0, 0), (0, max(0, frames - f.shape[1]))))
+            for f in (extractor(audio) for audio in audios)
+        ]).astype(np.float32)
+        tokenizer = Tokenizer(model.hf_tokenizer, model.model.is_multilingual, task="transcribe", language=LANGUAGE)
+        prompt = model.get_prompt(tokenizer, [], without_timestamps=True)
+        results = model.model.generate(
+            model.encode(features),
+            [prompt] * len(audios),
+            beam_size=1,
+            max_length=model.max_length,
+            suppress_blank=True,
+            suppress_tokens=[-1],
+        )
+        return [tokenizer.decode(r.sequences_ids[0]).strip() for r in results]
+
+    def _run_batch(self, audios: list[np.ndarray]) -> list[str]:
+        if len(audios) > 1 and self._batch_size > 1:
+            try:
+                return self._transcribe_batched(audios)
+            except Exception as e:
+                # Relies on faster-whisper internals; fall back for good if they differ
+                logger.warning("Batched STT unavailable (%s); transcribing one at a time", e)
+                self._batch_size = 1
+        return [self._transcribe_one(audio) for audio in audios]
+
+    # -- scheduling (event loop) ---------------------------------------------
+
+    def _ensure_dispatcher(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._dispatcher is not None and self._loop is loop and not self._dispatcher.done():
+            return
+        self._loop = loop
+        self._queue = asyncio.Queue(maxsize=max(1, self._settings.stt_queue_size))
+        self._slots = asyncio.Semaphore(self._workers)
+        self._dispatcher = loop.create_task(self._dispatch())
+
+    async def _dispatch(self) -> None:
+        """Hand queued utterances to free workers, batching the short ones waiting together."""
+        carried = None  # a long utterance met while batching; it goes next, on its own
+        while True:
+            await self._slots.acquire()
+            first, carried = (carried, None) if carried is not None else (await self._queue.get(), None)
+            batch = [first]
+            if len(first[0]) <= self._batch_max_samples:
+                while len(batch) < self._batch_size and not self._queue.empty():
+                    item = self._queue.get_nowait()
+                    if len(item[0]) > self._batch_max_samples:
+                        carried = item
+                        break
+                    batch.append(item)
+            # Callers that gave up (deadline, disconnect) are not transcribed at all
+            batch = [(audio, fut) for audio, fut in batch if not fut.done()]
+            if not batch:
+                self._slots.release()
+                continue
+            task = asyncio.create_task(self._run(batch))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _run(self, batch: list[tuple[np.ndarray, asyncio.Future]]) -> None:
+        try:
+            texts = await asyncio.get_running_loop().run_in_executor(
+                self._executor, self._run_batch, [audio for audio, _ in batch]
+            )
+            for (_, fut), text in zip(batch, texts):
+                if not fut.done():
+                    fut.set_result(text)
+        except Exception as e:
+            for _, fut in batch:
+                if not fut.done():
+                    fut.set_exception(e)
+        finally:
+            self._slots.release()
+
+    async def transcribe(self, audio: bytes) -> str:
+        samples = await asyncio.get_running_loop().run_in_executor(None, _load_pcm, audio)
+        self._ensure_dispatcher()
+        fut = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((samples, fut))
+        except asyncio.QueueFull:
+            raise OverloadedError("STT queue full") from None
+        return await asyncio.wait_for(fut, stage_timeout(self._settings.stt_timeout_seconds))
+
+    async def warmup(self) -> bool:
+        """Load the model and run one inference so the first real turn is not the slow one."""
+        silence = np.zeros(STT_SAMPLE_RATE, dtype=np.float32)
+        await asyncio.get_running_loop().run_in_executor(self._executor, self._transcribe_one, silence)
+        logger.info("STT (faster-whisper %s) ready", self._settings.stt_model_size)
+        return True
+
+    async def aclose(self) -> None:
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+            self._dispatcher = None
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_BACKENDS: dict[str, type[STTBackend]] = {
+    GroqSTTBackend.name: GroqSTTBackend,
+    LocalWhisperBackend.name: LocalWhisperBackend,
+}
+
+_stt_backend: Optional[STTBackend] = None
+_stt_backend_lock = threading.Lock()
+
+
+def get_stt_backend() -> STTBackend:
+    """Get or create the configured STT backend."""
+    global _stt_backend
+    if _stt_backend is None:
+        with _stt_backend_lock:
+            if _stt_backend is None:
+                settings = get_settings()
+                backend = _BACKENDS.get(settings.stt_backend)
+                if backend is None:
+                    raise ValueError(f"Unknown STT_BACKEND {settings.stt_backend!r} (expected one of {sorted(_BACKENDS)})")
+                _stt_backend = backend(settings)
+    return _stt_backend
@@ -1,32 +1,102 @@
-"""Text-to-Speech via edge-tts (free Microsoft Neural voices, no model download)."""
+"""Text-to-speech entry point: the configured backend (edge-tts or local Piper) behind the TTS cache.
 
-import asyncio
-import tempfile
-from pathlib import Path
+Audio is in ``TTS_FORMAT`` (by default the backend's own: MP3 for edge-tts, WAV for
+Piper; see ``app.voice.tts_backends``). Audio served as a file over HTTP must open in
+a plain ``<audio>`` element, so raw PCM goes out there behind a WAV header.
+"""
 
-import edge_tts
+import asyncio
+import time
+from typing import AsyncIterator
 
-from app.core.config import get_settings
 from app.utils.logging import get_logger
+from app.utils.metrics import record
+from app.core.config import get_settings
+from app.voice.tts_backends import AUDIO_FORMATS, get_tts_backend, wav_header
+from app.voice.tts_cache import get_tts_cache, tts_cache_key
 
 logger = get_logger(__name__)
 
 
-def _get_voice() -> str:
-    return get_settings().tts_voice
+def media_type() -> str:
+    """HTTP media type of the audio produced for ``TTS_FORMAT``."""
+    return get_tts_backend().media_type
+
+
+def _raw_pcm() -> bool:
+    return get_tts_backend().format.name == "pcm"
+
+
+def file_media_type() -> str:
+    """Media type of TTS audio served as a file (raw PCM is wrapped as WAV)."""
+    return AUDIO_FORMATS["wav"].media_type if _raw_pcm() else media_type()
+
+
+def file_extension() -> str:
+    return AUDIO_FORMATS["wav"].extension if _raw_pcm() else get_tts_backend().format.extension
+
+
+def as_file(audio: bytes) -> bytes:
+    """Complete audio for an HTTP response, playable as is."""
+    return wav_header(get_settings().tts_sample_rate, len(audio)) + audio if _raw_pcm() else audio
+
+
+async def stream_async(text: str) -> AsyncIterator[bytes]:
+    """Stream audio chunks as the TTS backend produces them (no temp files)."""
+    async for chunk in get_tts_backend().stream(text):
+        yield chunk
 
 
 async def synthesize_async(text: str) -> bytes:
-    """Synthesize text to speech. Returns MP3 bytes."""
-    voice = _get_voice()
-    communicate = edge_tts.Communicate(text, voice)
-    with tempfile.NamedTemporaryFile(suffix=".mp3", delete=False) as f:
-        path = f.name
-    try:
-        await communicate.save(path)
-        return Path(path).read_bytes()
-    finally:
-        Path(path).unlink(missing_ok=True)
+    """Synthesize text to speech in memory. Returns audio bytes in ``TTS_FORMAT``."""
+    chunks = [chunk async for chunk in stream_async(text)]
+    # join sizes the result once: a single allocation, no temp file round trip
+    return b"".join(chunks)
+
+
+def cache_key(text: str) -> str:
+    """Content address (and HTTP ETag) of the audio for ``text`` in the configured voice and format."""
+    return tts_cache_key(get_tts_backend().voice, text)
+
+
+async def synthesize_cached(text: str) -> tuple[bytes, str]:
+    """Synthesize via the TTS cache. Returns (audio bytes, cache key)."""
+    start = time.perf_counter()
+    key = cache_key(text)
+    cache = get_tts_cache()
+    data = await cache.get(key)
+    if data is None:
+        data = await synthesize_async(text)
+        await cache.put(key, data)
+    record("tts_ttfb", time.perf_counter() - start, first_only=True)
+    return data, key
+
+
+async def stream_cached(text: str) -> AsyncIterator[bytes]:
+    """Like stream_async, but served from / written through the TTS cache."""
+    start = time.perf_counter()
+    key = cache_key(text)
+    cache = get_tts_cache()
+    data = await cache.get(key)
+    if data is not None:
+        record("tts_ttfb", time.perf_counter() - start, first_only=True)
+        yield data
+        return
+    chunks: list[bytes] = []
+    async for chunk in stream_async(text):
+        if not chunks:
+            record("tts_ttfb", time.perf_counter() - start, first_only=True)
+        chunks.append(chunk)
+        yield chunk
+    await cache.put(key, b"".join(chunks))
+
+
+async def stream_file(text: str) -> AsyncIterator[bytes]:
+    """Like stream_cached, but playable as a file (raw PCM is streamed behind a WAV header)."""
+    if _raw_pcm():
+        yield wav_header(get_settings().tts_sample_rate)
+    async for chunk in stream_cached(text):
+        yield chunk
 
 
 def synthesize(text: str) -> bytes:
@@ -45,11 +115,14 @@ def synthesize(text: str) -> bytes:
 
 
 async def warmup() -> bool:
-    """Test edge-tts connectivity."""
+    """Prepare the TTS backend (edge-tts connectivity, or load and exercise the Piper voice pool)."""
     try:
-        await synthesize_async("Hello.")
-        logger.info("TTS (edge-tts) warm-up complete")
-        return True
+        return await get_tts_backend().warmup()
     except Exception as e:
         logger.warning("TTS warm-up failed: %s", e)
         return False
+
+
+async def aclose() -> None:
+    """Release the TTS backend's worker threads."""
+    await get_tts_backend().aclose()
@@ -0,0 +1,336 @@
+"""Text-to-speech backends: edge-tts (default) or Piper voices on the local CPU.
+
+``TTS_BACKEND`` selects the engine and ``TTS_FORMAT`` the audio sent to clients:
+MP3, Opus (in Ogg), WAV or raw 16-bit mono PCM. Each engine has a native output
+(MP3 for edge-tts, PCM for Piper, served as WAV by default); anything else is
+transcoded on the fly by an ffmpeg subprocess per synthesis, so audio still
+streams chunk by chunk.
+
+The Piper backend keeps a pool of preloaded voices (ONNX sessions, loaded at
+warm-up) and synthesizes on its own worker threads, one voice per thread. Time to
+first audio is then local inference of the first sentence, with no per-sentence
+connection to an outside service.
+"""
+
+import asyncio
+import queue
+import shutil
+import struct
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import AsyncIterator, Callable, Iterator, Optional
+
+import edge_tts
+import numpy as np
+
+from app.core.config import Settings, get_settings
+from app.utils.logging import get_logger
+from app.voice.vad import INT16_SCALE, resample
+
+logger = get_logger(__name__)
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+
+FFMPEG_READ_BYTES = 16 * 1024
+
+_END = object()
+
+
+@dataclass(frozen=True)
+class AudioFormat:
+    """A client-facing TTS output format."""
+
+    name: str
+    media_type: str
+    extension: str
+
+
+AUDIO_FORMATS: dict[str, AudioFormat] = {
+    "mp3": AudioFormat("mp3", "audio/mpeg", "mp3"),
+    "opus": AudioFormat("opus", "audio/ogg; codecs=opus", "ogg"),
+    "wav": AudioFormat("wav", "audio/wav", "wav"),
+    "pcm": AudioFormat("pcm", "audio/pcm", "pcm"),
+}
+
+
+def get_audio_format(name: str) -> AudioFormat:
+    fmt = AUDIO_FORMATS.get(name)
+    if fmt is None:
+        raise ValueError(f"Unknown TTS_FORMAT {name!r} (expected one of {sorted(AUDIO_FORMATS)})")
+    return fmt
+
+
+def wav_header(sample_rate: int, data_bytes: Optional[int] = None) -> bytes:
+    """Header of a 16-bit mono WAV file.
+
+    While streaming the length is not known yet, so the sizes are left at their
+    maximum, which players read as "until the end of the data".
+    """
+    size = 0xFFFFFFFF - 36 if data_bytes is None else data_bytes
+    fmt = struct.pack("<HHIIHH", 1, 1, sample_rate, sample_rate * 2, 2, 16)
+    riff = b"RIFF" + struct.pack("<I", 36 + size) + b"WAVE"
+    return riff + b"fmt " + struct.pack("<I", len(fmt)) + fmt + b"data" + struct.pack("<I", size)
+
+
+def _output_args(settings: Settings, fmt: AudioFormat) -> list[str]:
+    if fmt.name == "mp3":
+        return ["-c:a", "libmp3lame", "-b:a", settings.tts_bitrate, "-f", "mp3"]
+    if fmt.name == "opus":
+        return ["-c:a", "libopus", "-b:a", settings.tts_bitrate, "-application", "voip", "-f", "ogg"]
+    if fmt.name == "wav":
+        return ["-ac", "1", "-ar", str(settings.tts_sample_rate), "-c:a", "pcm_s16le", "-f", "wav"]
+    return ["-ac", "1", "-ar", str(settings.tts_sample_rate), "-f", "s16le"]
+
+
+async def _transcode(chunks: AsyncIterator[bytes], ffmpeg: str, input_args: list[str], output_args: list[str]):
+    """Pipe ``chunks`` through ffmpeg, yielding its output as soon as it is produced."""
+    proc = await asyncio.create_subprocess_exec(
+        ffmpeg, "-hide_banner", "-loglevel", "error", *input_args, "-i", "pipe:0", *output_args, "pipe:1",
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+
+    async def feed() -> None:
+        try:
+            async for chunk in chunks:
+                proc.stdin.write(chunk)
+                await proc.stdin.drain()
+        finally:
+            proc.stdin.close()
+
+    feeder = asyncio.create_task(feed())
+    try:
+        while data := await proc.stdout.read(FFMPEG_READ_BYTES):
+            yield data
+        await feeder  # surface synthesis errors
+        if await proc.wait() != 0:
+            error = (await proc.stderr.read()).decode(errors="replace").strip()
+            raise RuntimeError(f"ffmpeg exited with {proc.returncode}: {error[:200]}")
+    finally:
+        feeder.cancel()
+        if proc.returncode is None:
+            proc.kill()
+            await proc.wait()
+
+
+class TTSBackend:
+    """Synthesize text to audio chunks in the configured ``TTS_FORMAT``."""
+
+    name = "base"
+    # Used when TTS_FORMAT is empty: playable by browsers and no ffmpeg needed
+    native_format = "mp3"
+
+    def __init__(self, settings: Settings) -> None:
+        self._settings = settings
+        self.format = get_audio_format(settings.tts_format or self.native_format)
+
+    @property
+    def media_type(self) -> str:
+        """HTTP media type of the audio; PCM carries its sample rate as a parameter."""
+        if self.format.name == "pcm":
+            return f"{self.format.media_type}; rate={self._settings.tts_sample_rate}; channels=1; format=s16le"
+        return self.format.media_type
+
+    @property
+    def voice(self) -> str:
+        """Identifies the voice (and output) in cache keys: same voice + text = same audio."""
+        raise NotImplementedError
+
+    def stream(self, text: str) -> AsyncIterator[bytes]:
+        raise NotImplementedError
+
+    def _ffmpeg(self) -> str:
+        ffmpeg = shutil.which(self._settings.tts_ffmpeg_path)
+        if ffmpeg is None:
+            raise RuntimeError(
+                f"TTS_FORMAT={self.format.name} with TTS_BACKEND={self.name} needs ffmpeg ({self._settings.tts_ffmpeg_path!r} not found)"
+            )
+        return ffmpeg
+
+    async def warmup(self) -> bool:
+        """Synthesize a short phrase end to end (engine, and ffmpeg if transcoding)."""
+        async for _ in self.stream("Hello."):
+            pass
+        return True
+
+    async def aclose(self) -> None:
+        pass
+
+
+class EdgeTTSBackend(TTSBackend):
+    """Microsoft Neural voices via edge-tts (one websocket per synthesis; MP3 natively)."""
+
+    name = "edge"
+
+    def __init__(self, settings: Settings) -> None:
+        super().__init__(settings)
+        self._transcoder = None if self.format.name == "mp3" else self._ffmpeg()
+
+    @property
+    def voice(self) -> str:
+        voice = self._settings.tts_voice
+        return voice if self.format.name == "mp3" else f"{voice}/{self.format.name}"
+
+    async def _mp3(self, text: str) -> AsyncIterator[bytes]:
+        communicate = edge_tts.Communicate(text, self._settings.tts_voice)
+        async for chunk in communicate.stream():
+            if chunk["type"] == "audio" and chunk.get("data"):
+                yield chunk["data"]
+
+    def stream(self, text: str) -> AsyncIterator[bytes]:
+        if self._transcoder is None:
+            return self._mp3(text)
+        return _transcode(self._mp3(text), self._transcoder, ["-f", "mp3"], _output_args(self._settings, self.format))
+
+    async def warmup(self) -> bool:
+        await super().warmup()
+        logger.info("TTS (edge-tts %s, %s) ready", self._settings.tts_voice, self.format.name)
+        return True
+
+
+def _piper_chunks(voice, text: str) -> Iterator[bytes]:
+    """16-bit PCM per sentence from a PiperVoice (piper-tts 1.2 and 1.3+ APIs)."""
+    if hasattr(voice, "synthesize_stream_raw"):
+        yield from voice.synthesize_stream_raw(text)
+    else:
+        for chunk in voice.synthesize(text):
+            yield chunk.audio_int16_bytes
+
+
+class PiperTTSBackend(TTSBackend):
+    """Piper (VITS, ONNX Runtime) voices on the local CPU, from a pool of preloaded instances."""
+
+    name = "piper"
+    native_format = "wav"
+
+    def __init__(self, settings: Settings) -> None:
+        super().__init__(settings)
+        model = Path(settings.tts_piper_model)
+        self._model = model if model.is_absolute() else PROJECT_ROOT / model
+        self._size = max(1, settings.tts_pool_size)
+        self._executor = ThreadPoolExecutor(max_workers=self._size, thread_name_prefix="tts")
+        self._pool: queue.Queue = queue.Queue()
+        self._pool_lock = threading.Lock()
+        self._loaded = False
+        self._sample_rate = 0
+        self._transcoder = None if self.format.name in ("pcm", "wav") else self._ffmpeg()
+
+    @property
+    def voice(self) -> str:
+        return f"piper/{self._model.stem}/{self.format.name}"
+
+    def _ensure_pool(self) -> None:
+        if self._loaded:
+            return
+        with self._pool_lock:
+            if self._loaded:
+                return
+            try:
+                from piper import PiperVoice
+            except ImportError as e:
+                raise RuntimeError("TTS_BACKEND=piper needs piper-tts (pip install piper-tts)") from e
+            logger.info("Loading %d Piper voice(s) from %s", self._size, self._model)
+            for _ in range(self._size):
+                voice = PiperVoice.load(str(self._model))
+                self._sample_rate = voice.config.sample_rate
+                self._pool.put(voice)
+            self._loaded = True
+
+    # -- inference (worker threads) ------------------------------------------
+
+    def _synthesize(self, text: str, emit: Callable[[object], None], stop: threading.Event) -> None:
+        try:
+            self._ensure_pool()
+            voice = self._pool.get()
+            try:
+                for pcm in _piper_chunks(voice, text):
+                    if stop.is_set():
+                        break
+                    emit(pcm)
+            finally:
+                self._pool.put(voice)
+        finally:
+            emit(_END)
+
+    # -- streaming (event loop) ----------------------------------------------
+
+    async def _pcm(self, text: str) -> AsyncIterator[bytes]:
+        """Native PCM, one chunk per sentence as Piper finishes it."""
+        loop = asyncio.get_running_loop()
+        chunks: asyncio.Queue = asyncio.Queue()
+        stop = threading.Event()
+        done = loop.run_in_executor(
+            self._executor, self._synthesize, text, lambda item: loop.call_soon_threadsafe(chunks.put_nowait, item), stop
+        )
+        try:
+            while (pcm := await chunks.get()) is not _END:
+                yield pcm
+            await done  # surface inference errors
+        finally:
+            stop.set()
+            if not done.done():
+                done.add_done_callback(lambda f: f.cancelled() or f.exception())
+
+    async def _resampled(self, text: str) -> AsyncIterator[bytes]:
+        rate = self._settings.tts_sample_rate
+        async for pcm in self._pcm(text):
+            if self._sample_rate != rate:
+                samples = np.frombuffer(pcm, dtype="<i2").astype(np.float32) / INT16_SCALE
+                samples = resample(samples, self._sample_rate, rate)
+                pcm = (np.clip(samples, -1.0, 1.0) * 32767.0).astype("<i2").tobytes()
+            yield pcm
+
+    async def _wav(self, text: str) -> AsyncIterator[bytes]:
+        """Native PCM behind a WAV header at the voice's own rate: no resampling or ffmpeg."""
+        await asyncio.get_running_loop().run_in_executor(self._executor, self._ensure_pool)
+        yield wav_header(self._sample_rate)
+        async for pcm in self._pcm(text):
+            yield pcm
+
+    async def _encoded(self, text: str) -> AsyncIterator[bytes]:
+        # ffmpeg needs the voice's native rate, known once the pool is loaded
+        await asyncio.get_running_loop().run_in_executor(self._executor, self._ensure_pool)
+        input_args = ["-f", "s16le", "-ar", str(self._sample_rate), "-ac", "1"]
+        async for data in _transcode(self._pcm(text), self._transcoder, input_args, _output_args(self._settings, self.format)):
+            yield data
+
+    def stream(self, text: str) -> AsyncIterator[bytes]:
+        if self.format.name == "wav":
+            return self._wav(text)
+        return self._resampled(text) if self._transcoder is None else self._encoded(text)
+
+    async def warmup(self) -> bool:
+        """Load every pooled voice and run each once, so no real sentence pays for it."""
+        await asyncio.get_running_loop().run_in_executor(self._executor, self._ensure_pool)
+        await asyncio.gather(*(TTSBackend.warmup(self) for _ in range(self._size)))
+        logger.info("TTS (Piper %s x%d, %s) ready", self._model.stem, self._size, self.format.name)
+        return True
+
+    async def aclose(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_BACKENDS: dict[str, type[TTSBackend]] = {
+    EdgeTTSBackend.name: EdgeTTSBackend,
+    PiperTTSBackend.name: PiperTTSBackend,
+}
+
+_tts_backend: Optional[TTSBackend] = None
+_tts_backend_lock = threading.Lock()
+
+
+def get_tts_backend() -> TTSBackend:
+    """Get or create the configured TTS backend."""
+    global _tts_backend
+    if _tts_backend is None:
+        with _tts_backend_lock:
+            if _tts_backend is None:
+                settings = get_settings()
+                backend = _BACKENDS.get(settings.tts_backend)
+                if backend is None:
+                    raise ValueError(f"Unknown TTS_BACKEND {settings.tts_backend!r} (expected one of {sorted(_BACKENDS)})")
+                _tts_backend = backend(settings)
+    return _tts_backend
@@ -0,0 +1,149 @@
+"""Content-addressed TTS audio cache: in-memory LRU in front of an on-disk store.
+
+Keys are SHA-256 of (voice, text), so the same phrase in the same voice always maps to
+the same file and the key doubles as a strong HTTP ETag. The disk tier lives under
+``tts_cache_dir`` (sharded by the first two hex chars) and is trimmed oldest-first when
+it grows past ``tts_cache_disk_max_mb``.
+"""
+
+import asyncio
+import hashlib
+import os
+import threading
+from pathlib import Path
+from typing import Optional
+
+from app.core.config import get_settings
+from app.utils.cache import TTLCache
+from app.utils.logging import get_logger
+from app.voice.tts_backends import get_tts_backend
+
+logger = get_logger(__name__)
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+
+
+def tts_cache_key(voice: str, text: str) -> str:
+    """Stable content address for a (voice, text) pair."""
+    normalized = " ".join(text.split())
+    return hashlib.sha256(f"{voice}\0{normalized}".encode("utf-8")).hexdigest()
+
+
+class TTSCache:
+    """Two-tier (memory LRU + disk) cache of synthesized audio bytes."""
+
+    def __init__(self, directory: str | Path, memory_items: int, disk_max_bytes: int, suffix: str = ".mp3") -> None:
+        self._dir = Path(directory)
+        self._suffix = suffix
+        self._memory: TTLCache[bytes] = TTLCache(maxsize=memory_items, ttl_seconds=float("inf"))
+        self._disk_max = disk_max_bytes
+        self._disk_bytes: Optional[int] = None
+        self._lock = threading.Lock()
+        self.disk_hits = 0
+
+    def _path(self, key: str) -> Path:
+        return self._dir / key[:2] / f"{key}{self._suffix}"
+
+    def _read_disk(self, key: str) -> Optional[bytes]:
+        if self._disk_max <= 0:
+            return None
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+        except FileNotFoundError:
+            return None
+        os.utime(path)  # refresh recency for eviction
+        return data
+
+    def _scan_disk(self) -> list[tuple[float, int, Path]]:
+        entries = []
+        # Every format counts against the budget, so switching TTS_FORMAT leaves nothing untrimmed
+        for path in self._dir.glob("*/*"):
+            if path.suffix == ".tmp":
+                continue
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+        return entries
+
+    def _write_disk(self, key: str, data: bytes) -> None:
+        if self._disk_max <= 0:
+            return
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+        with self._lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = sum(size for _, size, _ in self._scan_disk())
+            else:
+                self._disk_bytes += len(data)
+            if self._disk_bytes > self._disk_max:
+                self._evict()
+
+    def _evict(self) -> None:
+        """Delete least recently used files until the store is at 90% of its budget."""
+        entries = sorted(self._scan_disk())
+        total = sum(size for _, size, _ in entries)
+        target = int(self._disk_max * 0.9)
+        removed = 0
+        for _, size, path in entries:
+            if total <= target:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+        self._disk_bytes = total
+        logger.info("TTS cache evicted %d files (%.1f MB on disk)", removed, total / 1e6)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        """Memory first, then disk (promoting disk hits into memory)."""
+        data = self._memory.get(key)
+        if data is not None:
+            return data
+        data = await asyncio.to_thread(self._read_disk, key)
+        if data is not None:
+            self.disk_hits += 1
+            self._memory.set(key, data)
+        return data
+
+    async def put(self, key: str, data: bytes) -> None:
+        if not data:
+            return
+        self._memory.set(key, data)
+        try:
+            await asyncio.to_thread(self._write_disk, key, data)
+        except OSError as e:
+            logger.warning("TTS cache write failed: %s", e)
+
+    def stats(self) -> dict:
+        stats = self._memory.stats()
+        stats["disk_hits"] = self.disk_hits
+        stats["disk_bytes"] = self._disk_bytes
+        return stats
+
+
+_tts_cache: Optional[TTSCache] = None
+_tts_cache_lock = threading.Lock()
+
+
+def get_tts_cache() -> TTSCache:
+    """Get or create the TTS cache singleton."""
+    global _tts_cache
+    if _tts_cache is None:
+        with _tts_cache_lock:
+            if _tts_cache is None:
+                settings = get_settings()
+                directory = Path(settings.tts_cache_dir)
+                if not directory.is_absolute():
+                    directory = PROJECT_ROOT / directory
+                _tts_cache = TTSCache(
+                    directory,
+                    memory_items=settings.tts_cache_memory_items,
+                    disk_max_bytes=settings.tts_cache_disk_max_mb * 1024 * 1024,
+                    suffix=f".{get_tts_backend().format.extension}",
+                )
+    return _tts_cache
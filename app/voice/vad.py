@@ -0,0 +1,226 @@
+"""Frame-energy voice activity detection, plus the audio clean-up done before STT.
+
+Uploaded turns are decoded, downmixed and resampled to 16 kHz mono, and leading and
+trailing silence is trimmed before anything is sent to Whisper; a turn with no
+speech at all is dropped without an STT call. Everything is vectorized NumPy.
+"""
+
+import io
+import struct
+import wave
+from typing import Optional
+
+import numpy as np
+
+INT16_SCALE = 32768.0
+STT_SAMPLE_RATE = 16000
+
+_WAVE_FORMAT_PCM = 1
+_WAVE_FORMAT_FLOAT = 3
+_WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+
+def frame_rms(samples: np.ndarray, frame_len: int) -> np.ndarray:
+    """RMS of each whole ``frame_len``-sample frame (int16 or float in [-1, 1]; result in [0, 1])."""
+    n = len(samples) // frame_len
+    if n == 0:
+        return np.zeros(0, dtype=np.float32)
+    frames = samples[: n * frame_len].reshape(n, frame_len).astype(np.float32)
+    if samples.dtype == np.int16:
+        frames /= INT16_SCALE
+    return np.sqrt(np.mean(frames * frames, axis=1))
+
+
+def decode_wav(data: bytes) -> tuple[np.ndarray, int]:
+    """Decode a RIFF/WAVE file to float32 samples of shape (frames, channels) and its sample rate.
+
+    Handles 8/16/24/32-bit PCM and 32/64-bit float (plain or WAVE_FORMAT_EXTENSIBLE);
+    raises ValueError for anything else.
+    """
+    if len(data) < 12 or data[:4] != b"RIFF" or data[8:12] != b"WAVE":
+        raise ValueError("not a WAV file")
+    fmt: Optional[tuple[int, int, int, int]] = None
+    pcm: Optional[memoryview] = None
+    pos, view = 12, memoryview(data)
+    while pos + 8 <= len(data):
+        chunk_id, size = data[pos:pos + 4], struct.unpack_from("<I", data, pos + 4)[0]
+        body = view[pos + 8: pos + 8 + size]
+        if chunk_id == b"fmt ":
+            tag, channels, rate = struct.unpack_from("<HHI", body)
+            bits = struct.unpack_from("<H", body, 14)[0]
+            if tag == _WAVE_FORMAT_EXTENSIBLE and len(body) >= 26:
+                tag = struct.unpack_from("<H", body, 24)[0]
+            fmt = (tag, channels, rate, bits)
+        elif chunk_id == b"data":
+            pcm = body
+            break
+        pos += 8 + size + (size & 1)
+    if fmt is None or pcm is None:
+        raise ValueError("WAV file has no fmt or data chunk")
+    tag, channels, rate, bits = fmt
+    width = bits // 8
+    if channels < 1 or width < 1 or rate < 1:
+        raise ValueError("invalid WAV format")
+    usable = len(pcm) // (width * channels) * width * channels
+    raw = np.frombuffer(pcm[:usable], dtype=np.uint8)
+    if tag == _WAVE_FORMAT_FLOAT and bits in (32, 64):
+        samples = raw.view("<f4" if bits == 32 else "<f8").astype(np.float32)
+    elif tag == _WAVE_FORMAT_PCM and bits == 8:
+        samples = (raw.astype(np.float32) - 128.0) / 128.0
+    elif tag == _WAVE_FORMAT_PCM and bits in (16, 32):
+        dtype = "<i2" if bits == 16 else "<i4"
+        samples = raw.view(dtype).astype(np.float32) / float(2 ** (bits - 1))
+    elif tag == _WAVE_FORMAT_PCM and bits == 24:
+        b = raw.reshape(-1, 3).astype(np.int32)
+        ints = (b[:, 0] | (b[:, 1] << 8) | (b[:, 2] << 16)) << 8 >> 8  # sign-extend
+        samples = ints.astype(np.float32) / float(2 ** 23)
+    else:
+        raise ValueError(f"unsupported WAV encoding (format {tag}, {bits} bits)")
+    return samples.reshape(-1, channels), rate
+
+
+def to_mono(samples: np.ndarray) -> np.ndarray:
+    """Average the channels of (frames, channels) audio."""
+    return samples.mean(axis=1) if samples.ndim == 2 else samples
+
+
+def resample(samples: np.ndarray, src_rate: int, dst_rate: int) -> np.ndarray:
+    """Linear-interpolation resampling; downsampling first applies a box low-pass against aliasing."""
+    if src_rate == dst_rate or len(samples) == 0:
+        return samples
+    if src_rate > dst_rate:
+        width = int(round(src_rate / dst_rate))
+        if width > 1:
+            samples = np.convolve(samples, np.full(width, 1.0 / width, dtype=np.float32), mode="same")
+    n_out = int(round(len(samples) * dst_rate / src_rate))
+    positions = np.arange(n_out, dtype=np.float64) * (src_rate / dst_rate)
+    return np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+
+
+def speech_bounds(
+    samples: np.ndarray,
+    sample_rate: int,
+    threshold: float,
+    frame_ms: int = 20,
+    min_speech_ms: int = 120,
+    padding_ms: int = 200,
+) -> Optional[tuple[int, int]]:
+    """(start, end) sample range from the first to the last voiced frame, padded; None without speech."""
+    frame_len = max(1, sample_rate * frame_ms // 1000)
+    voiced = np.flatnonzero(frame_rms(samples, frame_len) > threshold)
+    if len(voiced) * frame_ms < min_speech_ms:
+        return None
+    pad = sample_rate * padding_ms // 1000
+    start = max(0, int(voiced[0]) * frame_len - pad)
+    end = min(len(samples), (int(voiced[-1]) + 1) * frame_len + pad)
+    return start, end
+
+
+def encode_wav(samples: np.ndarray, sample_rate: int) -> bytes:
+    """16-bit mono WAV bytes for int16 samples (float samples in [-1, 1] are converted)."""
+    if samples.dtype != np.int16:
+        samples = (np.clip(samples, -1.0, 1.0) * 32767.0).astype(np.int16)
+    out = io.BytesIO()
+    with wave.open(out, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(sample_rate)
+        w.writeframes(samples.astype("<i2").tobytes())
+    return out.getvalue()
+
+
+def prepare_for_stt(
+    data: bytes,
+    threshold: float,
+    frame_ms: int = 20,
+    min_speech_ms: int = 120,
+    padding_ms: int = 200,
+) -> Optional[bytes]:
+    """Compact 16 kHz mono 16-bit WAV of just the speech in ``data``; None if there is no speech.
+
+    Audio that is not a decodable WAV is returned unchanged for Whisper to handle.
+    """
+    try:
+        samples, rate = decode_wav(data)
+    except (ValueError, struct.error):
+        return data
+    mono = resample(to_mono(samples), rate, STT_SAMPLE_RATE)
+    bounds = speech_bounds(mono, STT_SAMPLE_RATE, threshold, frame_ms, min_speech_ms, padding_ms)
+    if bounds is None:
+        return None
+    start, end = bounds
+    return encode_wav(mono[start:end], STT_SAMPLE_RATE)
+
+
+class EndOfSpeechDetector:
+    """Incremental speech start / end-of-speech detection for a live PCM stream.
+
+    Speech starts after ``min_speech_ms`` of consecutive frames above ``threshold``
+    and ends after ``silence_ms`` of consecutive frames below it. A shorter
+    ``pause_ms`` of silence inside an utterance is reported too (a natural point for
+    a partial transcript). ``feed`` takes any number of samples (partial frames are
+    carried over) and returns the events they triggered, in order: ``"start"``,
+    ``"pause"`` and/or ``"end"``.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int,
+        threshold: float,
+        min_speech_ms: int = 120,
+        silence_ms: int = 600,
+        frame_ms: int = 20,
+        pause_ms: int = 0,
+    ) -> None:
+        self.threshold = threshold
+        self._frame_len = max(1, sample_rate * frame_ms // 1000)
+        self._min_speech = max(1, min_speech_ms // frame_ms)
+        self._min_silence = max(1, silence_ms // frame_ms)
+        self._pause = pause_ms // frame_ms if 0 < pause_ms < silence_ms else 0
+        self._pending = np.zeros(0, dtype=np.int16)
+        self._voiced_run = 0
+        self._silent_run = 0
+        self.in_speech = False
+        self.voiced_frames = 0  # voiced frames in the current (or last) utterance
+
+    @property
+    def frame_len(self) -> int:
+        return self._frame_len
+
+    def reset(self) -> None:
+        self._pending = np.zeros(0, dtype=np.int16)
+        self._voiced_run = 0
+        self._silent_run = 0
+        self.in_speech = False
+
+    def feed(self, samples: np.ndarray) -> list[str]:
+        if len(self._pending):
+            samples = np.concatenate([self._pending, samples])
+        rms = frame_rms(samples, self._frame_len)
+        self._pending = samples[len(rms) * self._frame_len:].copy()
+        events: list[str] = []
+        for voiced in (rms > self.threshold).tolist():
+            if voiced:
+                self._voiced_run += 1
+                self._silent_run = 0
+                if self.in_speech:
+                    self.voiced_frames += 1
+            else:
+                self._silent_run += 1
+                self._voiced_run = 0
+            if not self.in_speech and self._voiced_run >= self._min_speech:
+                self.in_speech = True
+                self.voiced_frames = self._voiced_run
+                events.append("start")
+            elif self.in_speech and self._silent_run >= self._min_silence:
+                self.in_speech = False
+                events.append("end")
+            elif self.in_speech and self._silent_run == self._pause and self._pause:
+                events.append("pause")
+        return events
+
+    def force_end(self) -> Optional[str]:
+        """End the current utterance now (client-side end of turn); returns "end" if one was open."""
+        was_speaking = self.in_speech
+        self.reset()
+        return "end" if was_speaking else None
@@ -0,0 +1,104 @@
+"""Local stand-in for the Groq API: chat completions (streamed or not), Whisper, model lookup.
+
+Latency is configurable so runs are reproducible without network access:
+time-to-first-token, token rate, and transcription delay.
+
+Usage:
+    python benchmarks/fake_groq.py --port 8300 --ttft 0.25 --tokens-per-second 400
+"""
+
+import argparse
+import asyncio
+import json
+import time
+import uuid
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+
+ANSWER = (
+    "Rahul is a machine learning engineer who has worked at HSBC, Namma Yatri and Dados "
+    "Technologies, building retrieval systems, voice assistants and data pipelines. "
+    "What else would you like to know?"
+)
+TRANSCRIPT = "What has Rahul worked on recently?"
+
+
+def create_app(ttft: float, tokens_per_second: float, stt_delay: float, max_tokens: int) -> FastAPI:
+    app = FastAPI(title="fake-groq")
+    words = ANSWER.split(" ")
+
+    def _tokens(limit: int) -> list[str]:
+        return [w + " " for w in words][: max(1, min(limit, max_tokens))]
+
+    @app.post("/openai/v1/chat/completions")
+    async def chat(request: Request):
+        body = await request.json()
+        tokens = _tokens(int(body.get("max_tokens") or max_tokens))
+        model = body.get("model", "fake")
+        created = int(time.time())
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+
+        if not body.get("stream"):
+            await asyncio.sleep(ttft + len(tokens) / tokens_per_second)
+            return JSONResponse({
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": "".join(tokens).strip()},
+                    "finish_reason": "stop",
+                }],
+                "usage": {"prompt_tokens": 100, "completion_tokens": len(tokens), "total_tokens": 100 + len(tokens)},
+            })
+
+        async def events():
+            await asyncio.sleep(ttft)
+            for token in tokens:
+                chunk = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": created,
+                    "model": model,
+                    "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}],
+                }
+                yield f"data: {json.dumps(chunk)}\n\n"
+                await asyncio.sleep(1.0 / tokens_per_second)
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    @app.post("/openai/v1/audio/transcriptions")
+    async def transcriptions(request: Request):
+        await request.form()
+        await asyncio.sleep(stt_delay)
+        return PlainTextResponse(TRANSCRIPT)
+
+    @app.get("/openai/v1/models/{model:path}")
+    async def model_info(model: str):
+        return {"id": model, "object": "model", "created": 0, "owned_by": "fake"}
+
+    return app
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8300)
+    parser.add_argument("--ttft", type=float, default=0.25, help="Seconds before the first token")
+    parser.add_argument("--tokens-per-second", type=float, default=400.0)
+    parser.add_argument("--stt-delay", type=float, default=0.3, help="Seconds per transcription")
+    parser.add_argument("--max-tokens", type=int, default=200)
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    app = create_app(args.ttft, args.tokens_per_second, args.stt_delay, args.max_tokens)
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,378 @@
+"""Latency and throughput benchmark for the query and voice endpoints.
+
+Starts the fake Groq server and the app (see serve.py) as subprocesses, waits for
+/api/ready, then drives each scenario at each concurrency level and reports
+p50/p95/p99 latency, time to first token, requests/sec and server RSS. Results are
+saved as JSON so runs can be compared between commits.
+
+Usage:
+    python benchmarks/run.py                               # defaults: all scenarios, concurrency 1,8
+    python benchmarks/run.py --concurrency 1,4,16 --requests 200
+    python benchmarks/run.py --compare benchmarks/results/<older>.json
+    python benchmarks/run.py --base-url http://localhost:8000  # benchmark an already running server
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import math
+import os
+import platform
+import struct
+import subprocess
+import sys
+import time
+import wave
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+import httpx
+import numpy as np
+
+BENCH_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = BENCH_DIR.parent
+RESULTS_DIR = BENCH_DIR / "results"
+
+SCENARIOS = ("query", "stream", "voice")
+QUERIES = [
+    "What are Rahul's skills?",
+    "Tell me about the Namma Yatri experience",
+    "What is Rahul's education?",
+    "Which ML projects has Rahul built?",
+    "Where has Rahul worked?",
+    "What does Rahul do at HSBC?",
+    "Has Rahul led a team?",
+    "What programming languages does Rahul use?",
+]
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help=f"Comma-separated subset of {SCENARIOS}")
+    parser.add_argument("--concurrency", default="1,8", help="Comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=50, help="Requests per scenario and concurrency level")
+    parser.add_argument("--warmup", type=int, default=3, help="Unmeasured requests before each run")
+    parser.add_argument("--voice-tts", action="store_true", help="Voice stream with inline server-side TTS")
+    parser.add_argument("--base-url", help="Benchmark this server instead of starting local stand-ins")
+    parser.add_argument("--output", type=Path, help="Result file (default benchmarks/results/<time>-<commit>.json)")
+    parser.add_argument("--compare", type=Path, help="Earlier result file to diff against")
+    stand_ins = parser.add_argument_group("local stand-ins")
+    stand_ins.add_argument("--port", type=int, default=8301)
+    stand_ins.add_argument("--groq-port", type=int, default=8300)
+    stand_ins.add_argument("--ttft", type=float, default=0.25, help="Fake LLM time to first token (s)")
+    stand_ins.add_argument("--tokens-per-second", type=float, default=400.0, help="Fake LLM token rate")
+    stand_ins.add_argument("--stt-delay", type=float, default=0.3, help="Fake Whisper latency (s)")
+    stand_ins.add_argument("--tts-ttfb", type=float, default=0.15, help="Fake edge-tts time to first chunk (s)")
+    stand_ins.add_argument("--chunks", type=int, default=2000, help="Synthetic corpus size")
+    stand_ins.add_argument("--hybrid", action="store_true", help="Enable BM25 hybrid retrieval")
+    stand_ins.add_argument("--semantic-cache", action="store_true", help="Keep answer/embedding caches on")
+    stand_ins.add_argument("--tts-cache", action="store_true", help="Keep the TTS cache on")
+    stand_ins.add_argument("--real-embeddings", action="store_true", help="Use fastembed (model must be cached)")
+    return parser.parse_args()
+
+
+# -- measurement --------------------------------------------------------------
+
+
+@dataclass
+class Sample:
+    ok: bool
+    latency: float
+    ttft: Optional[float] = None
+    ttfa: Optional[float] = None  # time to first audio event (voice with TTS)
+
+
+@dataclass
+class ScenarioResult:
+    scenario: str
+    concurrency: int
+    requests: int
+    errors: int
+    seconds: float
+    rps: float
+    latency_ms: dict[str, float] = field(default_factory=dict)
+    ttft_ms: dict[str, float] = field(default_factory=dict)
+    ttfa_ms: dict[str, float] = field(default_factory=dict)
+    rss_mb: dict[str, float] = field(default_factory=dict)
+
+
+def _percentiles(values: list[float]) -> dict[str, float]:
+    if not values:
+        return {}
+    arr = np.asarray(values) * 1000
+    return {
+        "p50": round(float(np.percentile(arr, 50)), 1),
+        "p95": round(float(np.percentile(arr, 95)), 1),
+        "p99": round(float(np.percentile(arr, 99)), 1),
+        "mean": round(float(arr.mean()), 1),
+    }
+
+
+def _rss_mb(pid: Optional[int]) -> Optional[float]:
+    """Resident set size of a process (psutil if installed, else /proc on Linux)."""
+    if pid is None:
+        return None
+    try:
+        import psutil
+
+        return psutil.Process(pid).memory_info().rss / 1e6
+    except ImportError:
+        pass
+    except Exception:
+        return None
+    try:
+        for line in Path(f"/proc/{pid}/status").read_text().splitlines():
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1e3
+    except OSError:
+        pass
+    return None
+
+
+def _wav_bytes(seconds: float = 1.5, rate: int = 16000) -> bytes:
+    """A short 16-bit mono sine tone, standing in for a recorded question."""
+    n = int(seconds * rate)
+    frames = b"".join(struct.pack("<h", int(8000 * math.sin(2 * math.pi * 220 * i / rate))) for i in range(n))
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(frames)
+    return buf.getvalue()
+
+
+async def _query(client: httpx.AsyncClient, i: int, ctx: dict) -> Sample:
+    start = time.perf_counter()
+    r = await client.post("/api/query", json={"query": QUERIES[i % len(QUERIES)]})
+    latency = time.perf_counter() - start
+    return Sample(ok=r.status_code == 200, latency=latency, ttft=latency)
+
+
+async def _stream(client: httpx.AsyncClient, i: int, ctx: dict) -> Sample:
+    start = time.perf_counter()
+    ttft = None
+    async with client.stream("POST", "/api/query/stream", json={"query": QUERIES[i % len(QUERIES)]}) as r:
+        async for chunk in r.aiter_bytes():
+            if ttft is None and chunk:
+                ttft = time.perf_counter() - start
+        ok = r.status_code == 200
+    return Sample(ok=ok, latency=time.perf_counter() - start, ttft=ttft)
+
+
+async def _voice(client: httpx.AsyncClient, i: int, ctx: dict) -> Sample:
+    start = time.perf_counter()
+    ttft = ttfa = None
+    files = {"audio": ("question.wav", ctx["wav"], "audio/wav")}
+    data = {"tts": "true" if ctx["voice_tts"] else "false"}
+    async with client.stream("POST", "/api/voice-query/stream", files=files, data=data) as r:
+        async for line in r.aiter_lines():
+            if not line.startswith("data: "):
+                continue
+            kind = json.loads(line[6:]).get("type")
+            now = time.perf_counter() - start
+            if kind == "token" and ttft is None:
+                ttft = now
+            elif kind == "audio" and ttfa is None:
+                ttfa = now
+        ok = r.status_code == 200
+    return Sample(ok=ok, latency=time.perf_counter() - start, ttft=ttft, ttfa=ttfa)
+
+
+RUNNERS = {"query": _query, "stream": _stream, "voice": _voice}
+
+
+async def _run_scenario(
+    base_url: str,
+    scenario: str,
+    concurrency: int,
+    total: int,
+    warmup: int,
+    ctx: dict,
+    pid: Optional[int],
+) -> ScenarioResult:
+    runner = RUNNERS[scenario]
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=60, limits=limits) as client:
+        for i in range(warmup):
+            await runner(client, i, ctx)
+
+        samples: list[Sample] = []
+        rss: list[float] = []
+        counter = iter(range(total))
+
+        async def worker() -> None:
+            for i in counter:
+                try:
+                    samples.append(await runner(client, i, ctx))
+                except httpx.HTTPError:
+                    samples.append(Sample(ok=False, latency=0.0))
+
+        async def sample_rss() -> None:
+            while True:
+                value = _rss_mb(pid)
+                if value is not None:
+                    rss.append(value)
+                await asyncio.sleep(0.1)
+
+        sampler = asyncio.create_task(sample_rss())
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        seconds = time.perf_counter() - start
+        sampler.cancel()
+
+    good = [s for s in samples if s.ok]
+    return ScenarioResult(
+        scenario=scenario,
+        concurrency=concurrency,
+        requests=len(samples),
+        errors=len(samples) - len(good),
+        seconds=round(seconds, 3),
+        rps=round(len(good) / seconds, 2) if seconds else 0.0,
+        latency_ms=_percentiles([s.latency for s in good]),
+        ttft_ms=_percentiles([s.ttft for s in good if s.ttft is not None]),
+        ttfa_ms=_percentiles([s.ttfa for s in good if s.ttfa is not None]),
+        rss_mb={"peak": round(max(rss), 1), "end": round(rss[-1], 1)} if rss else {},
+    )
+
+
+# -- stand-in processes -------------------------------------------------------
+
+
+def _start_stand_ins(args: argparse.Namespace) -> list[subprocess.Popen]:
+    groq = subprocess.Popen([
+        sys.executable, str(BENCH_DIR / "fake_groq.py"),
+        "--port", str(args.groq_port),
+        "--ttft", str(args.ttft),
+        "--tokens-per-second", str(args.tokens_per_second),
+        "--stt-delay", str(args.stt_delay),
+    ])
+    cmd = [
+        sys.executable, str(BENCH_DIR / "serve.py"),
+        "--port", str(args.port),
+        "--groq-url", f"http://127.0.0.1:{args.groq_port}",
+        "--chunks", str(args.chunks),
+        "--tts-ttfb", str(args.tts_ttfb),
+    ]
+    for flag in ("hybrid", "semantic_cache", "tts_cache", "real_embeddings"):
+        if getattr(args, flag):
+            cmd.append("--" + flag.replace("_", "-"))
+    server = subprocess.Popen(cmd, cwd=PROJECT_ROOT)
+    return [groq, server]
+
+
+async def _wait_ready(base_url: str, timeout: float = 180.0) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url, timeout=5) as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get("/api/ready")).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.5)
+    raise TimeoutError(f"{base_url} not ready after {timeout:.0f}s")
+
+
+# -- reporting ----------------------------------------------------------------
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT, text=True, stderr=subprocess.DEVNULL
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _print_table(results: list[ScenarioResult]) -> None:
+    print(f"\n{'scenario':<8} {'conc':>4} {'req':>5} {'err':>4} {'rps':>7} "
+          f"{'p50':>8} {'p95':>8} {'p99':>8} {'ttft50':>8} {'ttft95':>8} {'rss MB':>7}")
+    for r in results:
+        print(
+            f"{r.scenario:<8} {r.concurrency:>4} {r.requests:>5} {r.errors:>4} {r.rps:>7.1f} "
+            f"{r.latency_ms.get('p50', 0):>8.1f} {r.latency_ms.get('p95', 0):>8.1f} {r.latency_ms.get('p99', 0):>8.1f} "
+            f"{r.ttft_ms.get('p50', 0):>8.1f} {r.ttft_ms.get('p95', 0):>8.1f} {r.rss_mb.get('peak', 0):>7.1f}"
+        )
+
+
+def _compare(results: list[ScenarioResult], baseline_path: Path) -> None:
+    baseline = json.loads(baseline_path.read_text())
+    old = {(r["scenario"], r["concurrency"]): r for r in baseline["results"]}
+    print(f"\nvs {baseline_path.name} (commit {baseline['meta'].get('commit')}):")
+    for r in results:
+        prev = old.get((r.scenario, r.concurrency))
+        if prev is None:
+            continue
+        parts = []
+        for label, new, was in (
+            ("p50", r.latency_ms.get("p50"), prev["latency_ms"].get("p50")),
+            ("p95", r.latency_ms.get("p95"), prev["latency_ms"].get("p95")),
+            ("ttft50", r.ttft_ms.get("p50"), prev["ttft_ms"].get("p50")),
+            ("rps", r.rps, prev["rps"]),
+        ):
+            if new is not None and was:
+                parts.append(f"{label} {was:.1f} -> {new:.1f} ({(new - was) / was:+.1%})")
+        print(f"  {r.scenario:<8} c={r.concurrency:<3} " + ", ".join(parts))
+
+
+async def _main(args: argparse.Namespace) -> None:
+    scenarios = [s for s in args.scenarios.split(",") if s]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        raise SystemExit(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+    levels = [int(c) for c in args.concurrency.split(",") if c]
+
+    procs: list[subprocess.Popen] = []
+    base_url = args.base_url
+    pid = None
+    if base_url is None:
+        procs = _start_stand_ins(args)
+        base_url = f"http://127.0.0.1:{args.port}"
+        pid = procs[-1].pid
+    try:
+        await _wait_ready(base_url)
+        ctx = {"wav": _wav_bytes(), "voice_tts": args.voice_tts}
+        results = []
+        for scenario in scenarios:
+            for level in levels:
+                print(f"Running {scenario} at concurrency {level} ({args.requests} requests)...")
+                results.append(await _run_scenario(base_url, scenario, level, args.requests, args.warmup, ctx, pid))
+    finally:
+        for p in procs:
+            p.terminate()
+        for p in procs:
+            try:
+                p.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                p.kill()
+
+    _print_table(results)
+    commit = _git_commit()
+    meta = {
+        "commit": commit,
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "base_url": args.base_url or "local stand-ins",
+        "args": {k: str(v) if isinstance(v, Path) else v for k, v in vars(args).items()},
+    }
+    output = args.output or RESULTS_DIR / f"{datetime.now():%Y%m%d-%H%M%S}-{commit}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps({"meta": meta, "results": [asdict(r) for r in results]}, indent=2))
+    print(f"\nSaved {output}")
+    if args.compare:
+        _compare(results, args.compare)
+
+
+def main() -> None:
+    asyncio.run(_main(parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""Run the real FastAPI app against local stand-ins, for benchmarking without network access.
+
+- Groq (LLM + Whisper) -> ``GROQ_BASE_URL`` pointing at benchmarks/fake_groq.py
+- edge-tts             -> an in-process fake that streams MP3-sized chunks after a delay
+- Qdrant               -> the local memory-mapped index (VECTOR_BACKEND=local), seeded
+                          with a synthetic corpus in a temporary directory
+- fastembed            -> hash-seeded random vectors unless --real-embeddings is given
+
+Usage:
+    python benchmarks/serve.py --port 8301 --groq-url http://127.0.0.1:8300
+"""
+
+import argparse
+import asyncio
+import hashlib
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+DIM = 384
+VOCAB = (
+    "rahul machine learning engineer hsbc namma yatri dados technologies python pytorch "
+    "retrieval voice assistant pipeline kubernetes data platform ranking search latency "
+    "model training deployment research project team lead backend api streaming embedding"
+).split()
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8301)
+    parser.add_argument("--groq-url", default="http://127.0.0.1:8300")
+    parser.add_argument("--chunks", type=int, default=2000, help="Synthetic corpus size")
+    parser.add_argument("--real-embeddings", action="store_true", help="Use fastembed (model must be cached)")
+    parser.add_argument("--embed-delay", type=float, default=0.004, help="Fake seconds per embedded text")
+    parser.add_argument("--tts-ttfb", type=float, default=0.15, help="Fake edge-tts seconds to first chunk")
+    parser.add_argument("--tts-chunk-delay", type=float, default=0.01, help="Fake edge-tts seconds per chunk")
+    parser.add_argument("--hybrid", action="store_true", help="Enable BM25 hybrid retrieval")
+    parser.add_argument("--semantic-cache", action="store_true", help="Keep the answer and query-embedding caches on")
+    parser.add_argument("--tts-cache", action="store_true", help="Keep the TTS audio cache on")
+    return parser.parse_args()
+
+
+def _fake_vector(text: str) -> np.ndarray:
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+    v = np.random.default_rng(seed).standard_normal(DIM).astype(np.float32)
+    return v / np.linalg.norm(v)
+
+
+class FakeTextEmbedding:
+    """Same iterator API as fastembed.TextEmbedding, with a fixed per-text cost."""
+
+    def __init__(self, delay: float) -> None:
+        self._delay = delay
+
+    def _embed(self, texts):
+        for text in [texts] if isinstance(texts, str) else texts:
+            if self._delay:
+                time.sleep(self._delay)
+            yield _fake_vector(text)
+
+    def query_embed(self, texts, **kwargs):
+        return self._embed(texts)
+
+    def passage_embed(self, texts, **kwargs):
+        return self._embed(texts)
+
+
+class FakeCommunicate:
+    """Stand-in for edge_tts.Communicate: ~4 KB of 'audio' per 40 characters of text."""
+
+    ttfb = 0.15
+    chunk_delay = 0.01
+
+    def __init__(self, text: str, voice: str = "", **kwargs) -> None:
+        self._text = text
+
+    async def stream(self):
+        await asyncio.sleep(self.ttfb)
+        for _ in range(max(1, len(self._text) // 40)):
+            yield {"type": "audio", "data": b"\xff\xfb" + os.urandom(4094)}
+            await asyncio.sleep(self.chunk_delay)
+
+
+def _corpus(n: int) -> list[str]:
+    rng = random.Random(0)
+    return [" ".join(rng.choice(VOCAB) for _ in range(80)) + "." for _ in range(n)]
+
+
+def seed_index(chunks: list[str]) -> None:
+    """Write the synthetic corpus into the local vector index (and BM25 index)."""
+    from app.rag.bm25 import BM25Index, bm25_index_path
+    from app.rag.embeddings import get_embedding_service
+    from app.services.local_vector_service import LocalVectorService
+
+    embeddings = get_embedding_service()
+    store = LocalVectorService()
+    store.ensure_collection(DIM)
+    ids = [f"00000000-0000-0000-0000-{i:012d}" for i in range(len(chunks))]
+    payloads = [
+        {"content": c, "metadata": {"source": f"doc{i // 20}.md", "chunk_index": i % 20}}
+        for i, c in enumerate(chunks)
+    ]
+    store.upsert(ids, embeddings.embed_passages_array(chunks), payloads)
+    store.set_revision("benchmark")
+    bm25 = BM25Index(bm25_index_path())
+    for pid, p in zip(ids, payloads):
+        bm25.add(pid, p["content"], p["metadata"])
+    bm25.save()
+
+
+def main() -> None:
+    args = parse_args()
+    workdir = Path(tempfile.mkdtemp(prefix="voice-bench-"))
+    os.environ.update({
+        "GROQ_API_KEY": "benchmark",
+        "GROQ_BASE_URL": args.groq_url,
+        "VECTOR_BACKEND": "local",
+        "LOCAL_INDEX_PATH": str(workdir / "vectors"),
+        "BM25_INDEX_PATH": str(workdir / "bm25"),
+        "TTS_CACHE_DIR": str(workdir / "tts_cache"),
+        "HYBRID_SEARCH": "true" if args.hybrid else "false",
+        "RAG_SCORE_THRESHOLD": "0",
+        # One client IP drives all the load: per-IP rate limits would only measure 429s
+        "RATE_LIMIT_PER_MINUTE": "0",
+        "VOICE_RATE_LIMIT_PER_MINUTE": "0",
+        "TTS_RATE_LIMIT_PER_MINUTE": "0",
+    })
+    # Caches are off by default so every request exercises the full pipeline
+    if not args.semantic_cache:
+        os.environ.update({"SEMANTIC_CACHE_SIZE": "0", "EMBEDDING_CACHE_SIZE": "0"})
+    if not args.tts_cache:
+        os.environ.update({"TTS_CACHE_MEMORY_ITEMS": "0", "TTS_CACHE_DISK_MAX_MB": "0"})
+
+    import edge_tts
+    import uvicorn
+
+    FakeCommunicate.ttfb = args.tts_ttfb
+    FakeCommunicate.chunk_delay = args.tts_chunk_delay
+    edge_tts.Communicate = FakeCommunicate
+    if not args.real_embeddings:
+        from app.rag.embeddings import EmbeddingService
+
+        fake_model = FakeTextEmbedding(args.embed_delay)
+        EmbeddingService._get_model = lambda self: fake_model
+
+    seed_index(_corpus(args.chunks))
+
+    from app.main import app
+
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
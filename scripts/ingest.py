@@ -1,65 +1,188 @@
-"""Knowledge ingestion pipeline: load, chunk, embed, upsert to Qdrant."""
+"""Knowledge ingestion pipeline: load, chunk, embed, upsert to the vector store (Qdrant or local index).
 
+Incremental by default: a manifest in data/processed records the content hash of every
+ingested file and the deterministic point ids of its chunks, so only new or changed chunks
+are embedded and upserted, and points of removed chunks are deleted.
+
+Usage:
+    python scripts/ingest.py          # incremental
+    python scripts/ingest.py --full   # drop the collection and re-ingest everything
+
+Chunks stream through batched embedding and upsert stages with bounded queues, so
+memory stays flat no matter how many documents are in data/raw.
+"""
+
+import argparse
 import sys
-import uuid
+from dataclasses import dataclass, field
 from pathlib import Path
+from typing import Iterator
 
 # Add project root to path
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-from app.rag.loader import load_directory
-from app.rag.splitter import chunk_documents
+from app.core.config import get_settings
+from app.rag.bm25 import BM25Index, bm25_index_path
+from app.rag.loader import iter_chunked_files, list_files
+from app.rag.manifest import FileEntry, IngestManifest, chunk_point_id, file_sha256
+from app.rag.pipeline import DEFAULT_BATCH_SIZE, DEFAULT_QUEUE_SIZE, ChunkRecord, IngestPipeline, batched
 from app.rag.embeddings import get_embedding_service
 from app.services.vector_service import get_vector_service
 
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+RAW_DIR = PROJECT_ROOT / "data" / "raw"
+MANIFEST_PATH = PROJECT_ROOT / "data" / "processed" / "ingest_manifest.json"
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Ignore the manifest, recreate the collection and re-embed every chunk",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+        help=f"Chunks per embedding/upsert batch (default {DEFAULT_BATCH_SIZE})",
+    )
+    parser.add_argument(
+        "--queue-size",
+        type=int,
+        default=DEFAULT_QUEUE_SIZE,
+        help=f"Max batches buffered between pipeline stages (default {DEFAULT_QUEUE_SIZE})",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Processes for parsing/chunking documents (0 = all cores, default 1)",
+    )
+    return parser.parse_args()
+
+
+@dataclass
+class ScanResult:
+    """Bookkeeping filled in while changed files are streamed through the pipeline."""
+
+    stale_ids: set[str] = field(default_factory=set)
+    seen: set[str] = field(default_factory=set)
+    unchanged: int = 0
+    changed: int = 0
+
+
+def iter_new_chunks(
+    files: list[Path],
+    manifest: IngestManifest,
+    scan: ScanResult,
+    bm25: BM25Index,
+    workers: int = 1,
+) -> Iterator[ChunkRecord]:
+    """Diff files against the manifest and yield only chunks not already in the collection.
+
+    New chunks are also added to the BM25 index so sparse and dense stay in sync.
+    """
+    changed: list[Path] = []
+    hashes: dict[Path, str] = {}
+    for f in files:
+        key = f.relative_to(RAW_DIR).as_posix()
+        scan.seen.add(key)
+        sha = file_sha256(f)
+        previous = manifest.get(key)
+        if previous is not None and previous.sha256 == sha:
+            scan.unchanged += 1
+            continue
+        changed.append(f)
+        hashes[f] = sha
+
+    # 500-char chunks, 80 overlap; parsed in input order across `workers` processes
+    for f, chunks in iter_chunked_files(changed, workers=workers, chunk_size=500, chunk_overlap=80):
+        key = f.relative_to(RAW_DIR).as_posix()
+        previous = manifest.get(key)
+        ids = [chunk_point_id(key, c["content"]) for c in chunks]
+        old_ids = set(previous.chunk_ids) if previous else set()
+        emitted: set[str] = set()
+        for point_id, chunk in zip(ids, chunks):
+            if point_id not in old_ids and point_id not in emitted:
+                emitted.add(point_id)
+                bm25.add(point_id, chunk["content"], chunk["metadata"])
+                yield ChunkRecord(point_id=point_id, content=chunk["content"], metadata=chunk["metadata"])
+        scan.stale_ids |= old_ids - set(ids)
+        scan.changed += 1
+        manifest.files[key] = FileEntry(sha256=hashes[f], chunk_ids=list(dict.fromkeys(ids)))
+        print(f"  {'changed' if previous else 'new'}: {key} ({len(chunks)} chunks)")
+
 
 def main() -> None:
-    """Run the full ingestion pipeline."""
-    project_root = Path(__file__).resolve().parent.parent
-    raw_dir = project_root / "data" / "raw"
+    """Run the ingestion pipeline."""
+    args = parse_args()
+    settings = get_settings()
 
-    if not raw_dir.exists():
-        raw_dir.mkdir(parents=True, exist_ok=True)
-        print(f"Created {raw_dir}. Add your documents (PDF, MD, TXT) and run again.")
+    if not RAW_DIR.exists():
+        RAW_DIR.mkdir(parents=True, exist_ok=True)
+        print(f"Created {RAW_DIR}. Add your documents (PDF, MD, TXT) and run again.")
         return
 
-    # Load documents
-    print("Loading documents from data/raw...")
-    docs = load_directory(raw_dir)
-    if not docs:
+    files = list_files(RAW_DIR)
+    if not files:
         print("No documents found in data/raw. Add PDF, MD, or TXT files.")
         return
-    print(f"Loaded {len(docs)} documents.")
-
-    # Chunk (500 chars, 80 overlap)
-    print("Chunking (size=500, overlap=80)...")
-    chunks = chunk_documents(docs, chunk_size=500, chunk_overlap=80)
-    if not chunks:
-        print("No chunks produced.")
-        return
-    print(f"Produced {len(chunks)} chunks.")
 
-    # Embed (OpenAI, batched with rate-limit handling)
-    print("Embedding chunks via OpenAI (batches of 5)...")
     embedding_svc = get_embedding_service()
-    texts = [c["content"] for c in chunks]
-    vectors = embedding_svc.embed_texts(texts, is_query=False)
-    print(f"Embedded {len(vectors)} chunks.")
-
-    # Prepare payloads
-    payloads = [
-        {"content": c["content"], "metadata": c["metadata"]}
-        for c in chunks
-    ]
-    ids = [str(uuid.uuid4()) for _ in chunks]
-
-    # Upsert to Qdrant
-    print("Upserting to Qdrant Cloud...")
     vector_svc = get_vector_service()
+
+    # The manifest describes one concrete store: switching backends re-ingests everything
+    collection = f"{settings.vector_backend}:{settings.qdrant_collection}"
+    manifest = None if args.full else IngestManifest.load(MANIFEST_PATH, collection, settings.embedding_model)
+    if manifest is None or not manifest.files:
+        # Without a manifest (missing, unreadable, or for another store or model) the points already
+        # stored cannot be matched to files, so re-ingesting on top of them would duplicate them all
+        if args.full:
+            print("Full re-ingest: dropping collection and manifest...")
+        else:
+            print("No ingest manifest for this collection: dropping it and re-ingesting everything...")
+        vector_svc.delete_collection()
+        manifest = IngestManifest(collection=collection, embedding_model=settings.embedding_model)
+        bm25 = BM25Index(bm25_index_path())
+    else:
+        bm25 = BM25Index(bm25_index_path()).load()
     vector_svc.ensure_collection(embedding_dim=embedding_svc.dimension)
-    vector_svc.upsert(ids=ids, vectors=vectors, payloads=payloads)
 
-    print(f"Done. Ingested {len(chunks)} chunks into Qdrant.")
+    print(f"Scanning {len(files)} files in data/raw (batch size {args.batch_size})...")
+    scan = ScanResult()
+    pipeline = IngestPipeline(
+        embedding_svc,
+        vector_svc,
+        batch_size=args.batch_size,
+        queue_size=args.queue_size,
+        progress=print,
+    )
+    stats = pipeline.run(iter_new_chunks(files, manifest, scan, bm25, workers=args.workers))
+
+    for key in sorted(set(manifest.files) - scan.seen):
+        scan.stale_ids |= set(manifest.files.pop(key).chunk_ids)
+        print(f"  removed: {key}")
+
+    if scan.stale_ids:
+        print(f"Deleting {len(scan.stale_ids)} stale points...")
+        for ids in batched(sorted(scan.stale_ids), args.batch_size * 4):
+            vector_svc.delete(ids)
+
+    vector_svc.flush()
+    bm25.remove(scan.stale_ids)
+    if stats.chunks or scan.stale_ids or not bm25.path.exists():
+        print(f"Writing BM25 index ({len(bm25)} chunks)...")
+        bm25.save(revision=manifest.revision())
+    manifest.save(MANIFEST_PATH)
+    if not stats.chunks and not scan.stale_ids:
+        print(f"Knowledge base is up to date ({scan.unchanged} unchanged files).")
+        return
+    vector_svc.set_revision(manifest.revision())
+    print(
+        f"Done. {scan.changed} changed, {scan.unchanged} unchanged files; upserted {stats.chunks} chunks "
+        f"in {stats.seconds:.1f}s ({stats.chunks_per_second:.1f} chunks/s), deleted {len(scan.stale_ids)} points."
+    )
 
 
 if __name__ == "__main__":
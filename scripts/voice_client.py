@@ -1,9 +1,19 @@
-"""Terminal voice client: Live VAD-based recording, interruptible playback."""
+"""Terminal voice client: Live VAD-based recording, interruptible playback.
 
+Usage:
+    python scripts/voice_client.py          # record locally, upload each turn as a WAV
+    python scripts/voice_client.py --ws     # stream the microphone over /api/voice/ws
+"""
+
+import base64
+import io
+import json
+import queue
 import sys
 import tempfile
 import threading
 import time
+import wave
 from pathlib import Path
 import numpy as np
 import httpx
@@ -14,9 +24,27 @@ import soundfile as sf
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
 API_URL = "http://localhost:8000"
+WS_URL = "ws://localhost:8000/api/voice/ws"
 SAMPLE_RATE = 16000
 VAD_THRESHOLD = 0.02      # RMS amplitude threshold to trigger recording
 SILENCE_DURATION = 1.5    # Seconds of silence to stop recording
+# Temp file suffix per server audio type (TTS_FORMAT), so pygame picks the right decoder
+AUDIO_SUFFIXES = {"audio/mpeg": ".mp3", "audio/wav": ".wav", "audio/ogg": ".ogg"}
+
+
+def audio_suffix(media_type: str) -> str:
+    return AUDIO_SUFFIXES.get(media_type.split(";")[0].strip(), ".mp3")
+
+
+def pcm_to_wav(pcm: bytes, sample_rate: int) -> bytes:
+    """Wrap raw 16-bit mono PCM (TTS_FORMAT=pcm audio events) so pygame can play it."""
+    out = io.BytesIO()
+    with wave.open(out, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(sample_rate)
+        w.writeframes(pcm)
+    return out.getvalue()
 
 
 class LiveVoiceClient:
@@ -28,7 +56,7 @@ class LiveVoiceClient:
         self.playback_event = threading.Event()
         self.playback_thread = None
 
-        # Init pygame mixer for MP3 playback
+        # Init pygame mixer for playback (MP3, WAV or Ogg, per TTS_FORMAT)
         import pygame
         pygame.mixer.init()
         self._pygame = pygame
@@ -90,17 +118,17 @@ class LiveVoiceClient:
                     files={"audio": ("recording.wav", wav_bytes, "audio/wav")},
                 )
             resp.raise_for_status()
-            self.play_audio(resp.content)
+            self.play_audio(resp.content, audio_suffix(resp.headers.get("content-type", "")))
         except Exception as e:
             print(f"[Error] API failed: {e}")
 
-    def play_audio(self, mp3_bytes: bytes):
-        """Play MP3 response audio. Can be interrupted via barge-in."""
+    def play_audio(self, audio_bytes: bytes, suffix: str = ".mp3"):
+        """Play response audio. Can be interrupted via barge-in."""
         self.is_playing = True
         self.playback_event.clear()
 
-        with tempfile.NamedTemporaryFile(suffix=".mp3", delete=False) as f:
-            f.write(mp3_bytes)
+        with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as f:
+            f.write(audio_bytes)
             path = f.name
 
         try:
@@ -136,6 +164,91 @@ class LiveVoiceClient:
             print("\nGoodbye!")
 
 
+class StreamingVoiceClient:
+    """Streams raw PCM to /api/voice/ws; the server does end-of-speech and barge-in detection."""
+
+    def __init__(self):
+        import pygame
+        from websockets.sync.client import connect
+
+        pygame.mixer.init()
+        self._pygame = pygame
+        self._ws = connect(WS_URL, max_size=None)
+        self._clips: queue.Queue = queue.Queue()
+        self._stop_playback = threading.Event()
+        self._sentence_audio: dict[int, bytearray] = {}
+        self._suffix = ".mp3"
+        self._pcm_rate = 0  # set when the server streams raw PCM
+
+    def audio_callback(self, indata, frames, time_info, status):
+        self._ws.send(indata.tobytes())
+
+    def play_loop(self):
+        """Play finished sentences in order; a barge-in drops whatever is queued."""
+        while True:
+            clip = self._clips.get()
+            if self._stop_playback.is_set():
+                continue
+            with tempfile.NamedTemporaryFile(suffix=self._suffix, delete=False) as f:
+                f.write(clip)
+                path = f.name
+            try:
+                self._pygame.mixer.music.load(path)
+                self._pygame.mixer.music.play()
+                while self._pygame.mixer.music.get_busy() and not self._stop_playback.is_set():
+                    time.sleep(0.02)
+                self._pygame.mixer.music.stop()
+                self._pygame.mixer.music.unload()
+            finally:
+                Path(path).unlink(missing_ok=True)
+
+    def handle(self, event: dict):
+        kind = event["type"]
+        if kind == "ready":
+            media_type = event.get("audio", "audio/mpeg")
+            if media_type.startswith("audio/pcm"):
+                params = dict(p.strip().split("=", 1) for p in media_type.split(";")[1:] if "=" in p)
+                self._pcm_rate = int(params.get("rate", 24000))
+                self._suffix = ".wav"
+            else:
+                self._suffix = audio_suffix(media_type)
+        elif kind == "speech_start":
+            print("\n[Listening...] Speaking detected.")
+        elif kind == "barge_in":
+            print("\n[Interrupt] Stopping playback...")
+            self._stop_playback.set()
+            self._sentence_audio.clear()
+        elif kind == "transcription":
+            self._stop_playback.clear()
+            print(f"[You] {event['text']}")
+            print("[Mike] ", end="", flush=True)
+        elif kind == "token":
+            print(event["text"], end="", flush=True)
+        elif kind == "audio":
+            self._sentence_audio.setdefault(event["index"], bytearray()).extend(base64.b64decode(event["data"]))
+        elif kind == "audio_end":
+            clip = bytes(self._sentence_audio.pop(event["index"], b""))
+            self._clips.put(pcm_to_wav(clip, self._pcm_rate) if self._pcm_rate else clip)
+        elif kind == "done":
+            print("\n[Ready] Start speaking anytime...")
+        elif kind == "error":
+            print(f"\n[Error] {event['detail']}")
+
+    def run(self):
+        print("Mike - streaming voice session (Ctrl+C to exit)")
+        self._ws.send(json.dumps({"type": "start", "sample_rate": SAMPLE_RATE, "tts": True}))
+        threading.Thread(target=self.play_loop, daemon=True).start()
+        try:
+            with sd.InputStream(callback=self.audio_callback, channels=1, dtype="int16",
+                                samplerate=SAMPLE_RATE, blocksize=320):
+                for message in self._ws:
+                    self.handle(json.loads(message))
+        except KeyboardInterrupt:
+            print("\nGoodbye!")
+        finally:
+            self._ws.close()
+
+
 if __name__ == "__main__":
-    client = LiveVoiceClient()
+    client = StreamingVoiceClient() if "--ws" in sys.argv else LiveVoiceClient()
     client.run()
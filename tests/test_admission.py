@@ -0,0 +1,54 @@
+import asyncio
+
+from app.api.admission import AdmissionMiddleware, client_ip
+from app.core.config import Settings
+
+PROXY = ("10.0.0.2", 5000)
+
+
+def _scope(forwarded: list[str], path: str = "/api/query") -> dict:
+    headers = [(b"x-forwarded-for", value.encode()) for value in forwarded]
+    return {"type": "http", "path": path, "method": "POST", "headers": headers, "client": PROXY}
+
+
+async def _app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+def _status(middleware: AdmissionMiddleware, scope: dict) -> int:
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(middleware(scope, receive, send))
+    return sent[0]["status"]
+
+
+def test_client_ip_uses_the_hop_the_proxy_appended():
+    scope = _scope(["1.2.3.4, 9.9.9.9"])
+    assert client_ip(scope, 0) == PROXY[0]
+    assert client_ip(scope, 1) == "9.9.9.9"
+    assert client_ip(scope, 2) == "1.2.3.4"
+    assert client_ip(_scope(["1.2.3.4", "5.6.7.8, 9.9.9.9"]), 1) == "9.9.9.9"
+    assert client_ip(_scope([]), 1) == PROXY[0]
+
+
+def test_spoofed_forwarded_for_does_not_escape_the_rate_limit():
+    settings = Settings(rate_limit_per_minute=1, rate_limit_burst=2, trusted_proxy_hops=1)
+    middleware = AdmissionMiddleware(_app, settings)
+    statuses = [_status(middleware, _scope([f"203.0.113.{i}, 198.51.100.7"])) for i in range(3)]
+    assert statuses == [200, 200, 429]
+    # A different real client (as seen by the proxy) has its own bucket
+    assert _status(middleware, _scope(["203.0.113.1, 198.51.100.8"])) == 200
+
+
+def test_without_trusted_proxies_the_header_is_ignored():
+    settings = Settings(rate_limit_per_minute=1, rate_limit_burst=1)
+    middleware = AdmissionMiddleware(_app, settings)
+    assert _status(middleware, _scope(["203.0.113.1"])) == 200
+    assert _status(middleware, _scope(["203.0.113.2"])) == 429
@@ -0,0 +1,145 @@
+import asyncio
+import time
+
+import numpy as np
+import pytest
+
+from app.core.config import Settings
+from app.rag import answer_cache
+from app.rag.answer_cache import SemanticAnswerCache
+from app.rag.chain import FALLBACK_ANSWER, RAGChain
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(answer_cache.time, "monotonic", clock)
+    return clock
+
+
+def make_cache(**kwargs) -> SemanticAnswerCache:
+    options = dict(maxsize=3, ttl_seconds=60, threshold=0.95, revision_check_seconds=10)
+    options.update(kwargs)
+    return SemanticAnswerCache(**options)
+
+
+def vec(*values: float) -> np.ndarray:
+    return np.array(values, dtype=np.float32)
+
+
+def test_hit_above_threshold_and_miss_below():
+    cache = make_cache()
+    cache.store("What has Rahul built?", vec(1, 0, 0), "A voice assistant.", ["projects.md"])
+    hit = cache.lookup(vec(2, 0.1, 0))
+    assert hit is not None and hit.answer == "A voice assistant." and hit.sources == ["projects.md"]
+    assert cache.lookup(vec(1, 1, 0)) is None
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert cache.lookup(vec(1, 1, 0), threshold=0.7) is not None
+
+
+def test_expired_entries_miss_unless_stale_is_allowed():
+    cache = make_cache(ttl_seconds=0.05)
+    cache.store("q", vec(1, 0, 0), "old answer")
+    time.sleep(0.06)
+    assert cache.lookup(vec(1, 0, 0)) is None
+    assert cache.lookup(vec(1, 0, 0), allow_stale=True).answer == "old answer"
+
+
+def test_expired_best_match_does_not_hide_a_fresh_one():
+    cache = make_cache(ttl_seconds=0.05)
+    cache.store("exact", vec(1, 0, 0), "stale")
+    time.sleep(0.06)
+    cache.store("close", vec(1, 0.05, 0), "fresh")
+    assert cache.lookup(vec(1, 0, 0)).answer == "fresh"
+    assert cache.lookup(vec(1, 0, 0), allow_stale=True).answer == "stale"
+
+
+def test_lru_eviction_prefers_recently_used():
+    cache = make_cache()
+    for i in range(3):
+        cache.store(f"q{i}", np.eye(3)[i], f"a{i}")
+    assert cache.lookup(np.eye(3)[0]).answer == "a0"
+    cache.store("q3", vec(1, 1, 1), "a3")
+    assert cache.stats()["size"] == 3
+    assert cache.lookup(np.eye(3)[1]) is None  # least recently used, evicted
+    assert cache.lookup(np.eye(3)[0]).answer == "a0"
+
+
+def test_same_query_replaces_its_entry():
+    cache = make_cache()
+    cache.store("What has  Rahul built?", vec(1, 0, 0), "first")
+    cache.store("what has rahul built?", vec(1, 0, 0), "second")
+    assert cache.stats()["size"] == 1
+    assert cache.lookup(vec(1, 0, 0)).answer == "second"
+
+
+def test_revision_change_clears():
+    cache = make_cache()
+    cache.set_revision("rev-1")
+    cache.store("q", vec(1, 0, 0), "answer")
+    cache.set_revision("rev-1")
+    assert cache.lookup(vec(1, 0, 0)) is not None
+    cache.set_revision("rev-2")
+    assert cache.lookup(vec(1, 0, 0)) is None
+    assert cache.stats()["revision"] == "rev-2"
+
+
+def test_revision_check_is_rate_limited(clock):
+    cache = make_cache()
+    assert cache.claim_revision_check()
+    assert not cache.claim_revision_check()
+    clock.now += 10
+    assert cache.claim_revision_check()
+
+
+def test_disabled_cache():
+    cache = make_cache(maxsize=0)
+    cache.store("q", vec(1, 0, 0), "answer")
+    assert cache.lookup(vec(1, 0, 0)) is None
+    assert cache.stats()["size"] == 0
+
+
+class FakeEmbeddings:
+    async def embed_query_vector_async(self, query: str) -> np.ndarray:
+        return vec(1, 0.2, 0) if "close" in query else vec(0, 0, 1)
+
+
+class FakeStore:
+    async def get_revision_async(self) -> str:
+        return "rev-1"
+
+
+class DownRetriever:
+    async def retrieve(self, query: str):
+        raise ConnectionError("vector store down")
+
+
+def degraded_chain(cache: SemanticAnswerCache) -> RAGChain:
+    settings = Settings(degraded_cache_threshold=0.9, coalesce_queries=False)
+    return RAGChain(
+        settings, retriever=DownRetriever(), llm=object(), embedding_svc=FakeEmbeddings(), vector_svc=FakeStore(), cache=cache
+    )
+
+
+def test_degraded_lookup_serves_a_stale_approximate_answer():
+    cache = make_cache(ttl_seconds=0.05)
+    cache.store("What has Rahul built?", vec(1, 0, 0), "A voice assistant.", ["projects.md"])
+    time.sleep(0.06)
+    # Expired and below the normal threshold, but close enough while retrieval is down
+    answer, _ = asyncio.run(degraded_chain(cache).query_full("close question"))
+    assert answer == "A voice assistant."
+
+
+def test_degraded_lookup_falls_back_without_a_close_answer():
+    cache = make_cache()
+    cache.store("What has Rahul built?", vec(1, 0, 0), "A voice assistant.")
+    answer, _ = asyncio.run(degraded_chain(cache).query_full("something else"))
+    assert answer == FALLBACK_ANSWER
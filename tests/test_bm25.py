@@ -0,0 +1,118 @@
+import asyncio
+import os
+
+import pytest
+
+from app.rag import bm25 as bm25_module
+from app.rag.bm25 import BM25Index, ensure_bm25_index, reciprocal_rank_fusion, tokenize
+
+DOCS = {
+    "fastapi": "Rahul built a voice assistant with FastAPI and Qdrant.",
+    "ml": "Rahul trained machine learning models in PyTorch for speech recognition.",
+    "hobby": "Outside work Rahul plays chess and cricket.",
+}
+
+
+def build(path, docs=DOCS, revision=None) -> BM25Index:
+    index = BM25Index(path)
+    for doc_id, content in docs.items():
+        index.add(doc_id, content, {"source": f"{doc_id}.md"})
+    index.save(revision=revision)
+    return BM25Index(path).load()
+
+
+def test_tokenize_drops_stopwords_and_punctuation():
+    assert tokenize("What has Rahul built with FastAPI?") == ["rahul", "built", "fastapi"]
+
+
+def test_search_ranks_by_matching_terms(tmp_path):
+    index = build(tmp_path / "kb.json")
+    results = index.search("voice assistant FastAPI", top_k=3)
+    assert [r["id"] for r in results] == ["fastapi"]
+    assert results[0]["coverage"] == 1.0
+    assert results[0]["bm25_score"] > 0
+    assert results[0]["metadata"] == {"source": "fastapi.md"}
+
+
+def test_rarer_terms_weigh_more(tmp_path):
+    index = build(tmp_path / "kb.json")
+    results = index.search("rahul chess", top_k=3)
+    assert results[0]["id"] == "hobby"
+    assert results[0]["coverage"] == 1.0
+    assert {r["id"] for r in results[1:]} == {"fastapi", "ml"}
+    assert all(r["coverage"] == 0.5 for r in results[1:])
+    assert all(r["bm25_score"] < results[0]["bm25_score"] for r in results[1:])
+
+
+def test_no_matching_terms(tmp_path):
+    index = build(tmp_path / "kb.json")
+    assert index.search("weather in paris") == []
+    assert index.search("what is it") == []
+    assert BM25Index(tmp_path / "missing.json").search("rahul") == []
+
+
+def test_save_load_roundtrip_and_remove(tmp_path):
+    path = tmp_path / "kb.json"
+    index = build(path, revision="rev-1")
+    assert len(index) == 3 and index.revision == "rev-1"
+    index.remove({"hobby"})
+    index.save(revision="rev-2")
+    assert BM25Index(path).load().search("chess") == []
+
+
+def test_reloads_when_the_file_changes(tmp_path):
+    path = tmp_path / "kb.json"
+    reader = build(path)
+    assert reader.search("chess")
+    build(path, {"new": "Rahul now plays tennis."})
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert reader.search("chess") == []
+    assert [r["id"] for r in reader.search("tennis")] == ["new"]
+
+
+def test_rrf_orders_by_summed_reciprocal_rank():
+    dense = [{"id": "a", "score": 0.9}, {"id": "b", "score": 0.8}, {"id": "c", "score": 0.7}]
+    sparse = [{"id": "c", "bm25_score": 5.0}, {"id": "d", "bm25_score": 4.0}]
+    fused = reciprocal_rank_fusion([dense, sparse], k=60)
+    # b and d tie (both second in one list); ties keep first-seen order
+    assert [r["id"] for r in fused] == ["c", "a", "b", "d"]
+    assert fused[0]["rrf_score"] == pytest.approx(1 / 63 + 1 / 61)
+    # The first list's copy wins, so fused dense hits keep their cosine score
+    assert fused[0]["score"] == 0.7 and "bm25_score" not in fused[0]
+    assert fused[3]["bm25_score"] == 4.0
+    assert len(reciprocal_rank_fusion([dense, sparse], top_k=2)) == 2
+
+
+class FakeStore:
+    def __init__(self, revision: str, points: dict[str, str]) -> None:
+        self.revision = revision
+        self.points = points
+        self.scrolls = 0
+
+    async def get_revision_async(self) -> str:
+        return self.revision
+
+    async def scroll_points_async(self):
+        self.scrolls += 1
+        return [(pid, {"content": text, "metadata": {}}) for pid, text in self.points.items()]
+
+
+def test_ensure_rebuilds_missing_or_stale_index(tmp_path, monkeypatch):
+    path = tmp_path / "kb.json"
+    monkeypatch.setattr(bm25_module, "get_bm25_index", lambda: BM25Index(path))
+    store = FakeStore("rev-1", DOCS)
+
+    assert asyncio.run(ensure_bm25_index(store))
+    assert store.scrolls == 1
+    rebuilt = BM25Index(path).load()
+    assert rebuilt.revision == "rev-1" and len(rebuilt) == 3
+
+    asyncio.run(ensure_bm25_index(store))
+    assert store.scrolls == 1  # same revision: kept
+
+    store.revision, store.points = "rev-2", {"new": "Rahul now plays tennis."}
+    asyncio.run(ensure_bm25_index(store))
+    assert store.scrolls == 2
+    rebuilt = BM25Index(path).load()
+    assert rebuilt.revision == "rev-2" and [r["id"] for r in rebuilt.search("tennis")] == ["new"]
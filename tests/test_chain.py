@@ -0,0 +1,23 @@
+import asyncio
+
+from app.rag.chain import Speculation
+
+
+def _speculation(query: str) -> Speculation:
+    async def make():
+        task = asyncio.create_task(asyncio.sleep(0))
+        await task
+        return Speculation(query, task)
+
+    return asyncio.run(make())
+
+
+def test_speculation_matches_same_words():
+    spec = _speculation("What projects has Rahul built?")
+    assert spec.matches("what projects has rahul built", 0.99)
+
+
+def test_speculation_matches_close_transcript():
+    spec = _speculation("what projects has rahul built with python")
+    assert spec.matches("what projects has rahul built in python", 0.8)
+    assert not spec.matches("where did rahul study", 0.8)
@@ -0,0 +1,107 @@
+from app.rag.context import (
+    ContextAssembler,
+    estimate_tokens,
+    trim_history,
+    truncate_to_sentences,
+)
+
+SENTENCES = [f"Sentence number {i} describes one of Rahul's projects in detail." for i in range(30)]
+DOCUMENT = " ".join(SENTENCES)
+
+
+def chunk(content: str, source: str = "projects.md", index=None) -> dict:
+    metadata = {"source": source}
+    if index is not None:
+        metadata["chunk_index"] = index
+    return {"content": content, "metadata": metadata}
+
+
+def split(text: str, size: int = 500, overlap: int = 80) -> list[str]:
+    return [text[start:start + size] for start in range(0, len(text) - overlap, size - overlap)]
+
+
+def test_estimate_tokens_rounds_up():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("abcd") == 1
+    assert estimate_tokens("abcde") == 2
+
+
+def test_overlapping_neighbours_are_sent_once():
+    parts = split(DOCUMENT)
+    overlap = parts[0][-80:]
+    assert parts[1].startswith(overlap)
+    context = ContextAssembler(10_000).assemble([chunk(p, index=i) for i, p in enumerate(parts[:3])])
+    assert context.pieces == 1
+    assert context.text == "[1] " + DOCUMENT[: 2 * 420 + 500]
+    assert context.text.count(overlap) == 1
+
+
+def test_neighbours_merge_in_either_order():
+    parts = split(DOCUMENT)
+    chunks = [chunk(parts[2], index=2), chunk(parts[1], index=1), chunk(parts[3], index=3)]
+    context = ContextAssembler(10_000).assemble(chunks)
+    assert context.pieces == 1
+    assert context.text == "[1] " + DOCUMENT[420:420 + 2 * 420 + 500].strip()
+
+
+def test_adjacent_chunks_without_overlap_are_joined_by_a_newline():
+    context = ContextAssembler(10_000).assemble([chunk("First part.", index=0), chunk("Second part.", index=1)])
+    assert context.text == "[1] First part.\nSecond part."
+
+
+def test_other_sources_and_gaps_stay_separate():
+    chunks = [
+        chunk("Chunk zero of the resume.", "resume.pdf", 0),
+        chunk("Chunk one of the projects file.", "projects.md", 1),
+        chunk("Chunk three of the resume.", "resume.pdf", 3),
+    ]
+    context = ContextAssembler(10_000).assemble(chunks)
+    assert context.pieces == 3
+    assert context.sources == ["resume.pdf", "projects.md", "resume.pdf"]
+    assert context.text.startswith("[1] Chunk zero") and "\n\n[3] Chunk three" in context.text
+
+
+def test_exact_duplicates_and_empty_chunks_are_dropped():
+    chunks = [chunk("Same text."), chunk("  Same text.  ", "other.md"), chunk(""), {"content": None}]
+    context = ContextAssembler(10_000).assemble(chunks)
+    assert context.text == "[1] Same text."
+    assert context.chunks_in == 4 and context.pieces == 1
+
+
+def test_budget_cuts_the_last_piece_at_a_sentence_boundary():
+    chunks = [chunk(" ".join(SENTENCES[:5]), "a.md"), chunk(" ".join(SENTENCES[5:]), "b.md")]
+    context = ContextAssembler(150).assemble(chunks)
+    assert context.pieces == 2
+    assert context.tokens <= 150
+    last = context.text.split("\n\n")[1]
+    assert last.endswith("in detail.")
+    assert SENTENCES[5] in last and SENTENCES[-1] not in last
+
+
+def test_budget_too_small_for_a_useful_piece():
+    context = ContextAssembler(20).assemble([chunk(DOCUMENT)])
+    assert context.text == "" and context.pieces == 0
+    assert ContextAssembler(100).assemble([]).pieces == 0
+
+
+def test_truncate_to_sentences():
+    text = "One short sentence. Another one here. And a third!"
+    assert truncate_to_sentences(text, 100) == text
+    assert truncate_to_sentences(text, 10) == "One short sentence. Another one here."
+    assert truncate_to_sentences(text, 5) == "One short sentence."
+    assert truncate_to_sentences("No boundary anywhere in this text", 2) == ""
+
+
+def test_trim_history_keeps_recent_messages_within_budget():
+    history = [
+        {"role": "user", "content": "u" * 40},
+        {"role": "assistant", "content": "a" * 40},
+        {"role": "user", "content": "u" * 40},
+        {"role": "assistant", "content": "a" * 40},
+    ]
+    assert trim_history(history, 1000) == history
+    assert trim_history(history, 28) == history[2:]
+    # Room for three messages, but the oldest of them would be an orphaned assistant reply
+    assert trim_history(history, 42) == history[2:]
+    assert trim_history(history, 5) == []
+    assert trim_history(None, 100) == []
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from app.core.config import Settings
+from app.rag import embeddings as embeddings_module
+from app.rag.embeddings import EmbeddingService
+
+
+class FakeModel:
+    def __init__(self) -> None:
+        self.queries: list[str] = []
+
+    def query_embed(self, text: str):
+        self.queries.append(text)
+        yield np.full(4, len(text), dtype=np.float64)
+
+
+@pytest.fixture
+def service(monkeypatch):
+    settings = Settings(embedding_cache_size=2, embedding_cache_ttl_seconds=60)
+    monkeypatch.setattr(embeddings_module, "get_settings", lambda: settings)
+    service = EmbeddingService()
+    service._model = FakeModel()
+    return service
+
+
+def test_query_vectors_are_cached_by_normalized_text(service):
+    first = service.embed_query_vector("What has  Rahul built?")
+    again = service.embed_query_vector("what has rahul built?")
+    assert first is again
+    assert first.dtype == np.float32 and not first.flags.writeable
+    assert service._model.queries == ["what has rahul built?"]
+    assert service.cache_stats()["hits"] == 1 and service.cache_stats()["misses"] == 1
+
+
+def test_cache_is_bounded(service):
+    for text in ("a", "b", "c"):
+        service.embed_query_vector(text)
+    service.embed_query_vector("a")
+    assert service._model.queries == ["a", "b", "c", "a"]
+    assert service.cache_stats()["size"] == 2
+
+
+def test_cache_keys_include_the_model(service):
+    service.embed_query_vector("hello")
+    service._model_name = "another/model"
+    service.embed_query_vector("hello")
+    assert service._model.queries == ["hello", "hello"]
@@ -0,0 +1,139 @@
+import asyncio
+import json
+import os
+
+import numpy as np
+import pytest
+
+from app.core.config import Settings
+from app.services import local_vector_service
+from app.services.local_vector_service import LocalVectorService
+
+DIM = 4
+
+
+@pytest.fixture
+def settings(tmp_path, monkeypatch):
+    settings = Settings(local_index_path=str(tmp_path), embedding_dim=DIM, qdrant_collection="kb")
+    monkeypatch.setattr(local_vector_service, "get_settings", lambda: settings)
+    return settings
+
+
+@pytest.fixture
+def index(settings):
+    index = LocalVectorService()
+    index.ensure_collection()
+    return index
+
+
+def axis(i: int, scale: float = 1.0) -> list[float]:
+    vector = [0.0] * DIM
+    vector[i] = scale
+    return vector
+
+
+def payload(text: str) -> dict:
+    return {"content": text, "metadata": {"source": f"{text}.md"}}
+
+
+def ids_of(results: list[dict]) -> list[str]:
+    return [r["id"] for r in results]
+
+
+def test_upsert_and_search(index):
+    index.upsert(["a", "b"], [axis(0), axis(1)], [payload("a"), payload("b")])
+    index.upsert(["c"], np.array([[1.0, 1.0, 0.0, 0.0]]), [payload("c")])
+    results = index.search(axis(0, scale=3.0), top_k=2)
+    assert ids_of(results) == ["a", "c"]
+    assert results[0]["score"] == pytest.approx(1.0)
+    assert results[1]["score"] == pytest.approx(2 ** -0.5)
+    assert results[0]["content"] == "a" and results[0]["metadata"] == {"source": "a.md"}
+
+
+def test_score_threshold(index):
+    index.upsert(["a", "b", "c"], [axis(0), axis(1), [1.0, 1.0, 0.0, 0.0]], [payload("a"), payload("b"), payload("c")])
+    assert ids_of(index.search(axis(0), top_k=3, score_threshold=0.5)) == ["a", "c"]
+    assert index.search(axis(3), top_k=3, score_threshold=0.1) == []
+
+
+def test_update_in_place_after_flush(index):
+    index.upsert(["a", "b"], [axis(0), axis(1)], [payload("a"), payload("b")])
+    index.flush()
+    index.upsert(["a"], [axis(2)], [payload("a2")])
+    results = index.search(axis(2), top_k=1)
+    assert ids_of(results) == ["a"] and results[0]["content"] == "a2"
+    assert len(index.search(axis(0), top_k=5, score_threshold=0.5)) == 0
+
+
+def test_pending_rows_are_updated_before_flush(index):
+    index.upsert(["a"], [axis(0)], [payload("a")])
+    index.upsert(["a", "b"], [axis(1), axis(2)], [payload("a2"), payload("b")])
+    assert ids_of(index.search(axis(1), top_k=1)) == ["a"]
+    assert len(index.search(axis(0), top_k=5)) == 2
+
+
+def test_repeated_id_in_one_batch_keeps_the_last(index):
+    index.upsert(["a", "a", "b"], [axis(0), axis(1), axis(2)], [payload("first"), payload("last"), payload("b")])
+    results = index.search(axis(1), top_k=5)
+    assert sorted(ids_of(results)) == ["a", "b"]
+    assert results[0]["id"] == "a" and results[0]["content"] == "last"
+
+
+def test_delete(index):
+    index.upsert(["a", "b", "c"], [axis(0), axis(1), axis(2)], [payload("a"), payload("b"), payload("c")])
+    index.delete(["b", "missing"])
+    assert sorted(ids_of(index.search(axis(1), top_k=5))) == ["a", "c"]
+    index.upsert(["d"], [axis(1)], [payload("d")])
+    assert ids_of(index.search(axis(1), top_k=1)) == ["d"]
+
+
+def test_flush_persists_atomically(index, settings):
+    index.upsert(["a", "b"], [axis(0), axis(1)], [payload("a"), payload("b")])
+    index.set_revision("rev-1")
+    directory = index._dir
+    assert sorted(p.name for p in directory.iterdir()) == ["points.json", "vectors.npy"]
+    points = json.loads((directory / "points.json").read_text())
+    assert points["ids"] == ["a", "b"] and points["revision"] == "rev-1" and points["dim"] == DIM
+    assert np.load(directory / "vectors.npy").shape == (2, DIM)
+
+    reopened = LocalVectorService()
+    assert ids_of(reopened.search(axis(1), top_k=1)) == ["b"]
+    assert asyncio.run(reopened.get_revision_async()) == "rev-1"
+
+
+def test_reloads_when_another_process_rewrites_the_index(index):
+    index.upsert(["a"], [axis(0)], [payload("a")])
+    index.flush()
+    writer = LocalVectorService()
+    writer.upsert(["b"], [axis(1)], [payload("b")])
+    writer.flush()
+    stat = writer._points_path.stat()
+    os.utime(writer._points_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert index._needs_reload()
+    results = asyncio.run(index.search_async(axis(1), top_k=1))
+    assert ids_of(results) == ["b"]
+    assert not index._needs_reload()
+
+
+def test_unflushed_changes_are_not_clobbered_by_reload(index):
+    index.flush()
+    index.upsert(["a"], [axis(0)], [payload("a")])
+    writer = LocalVectorService()
+    writer.upsert(["b"], [axis(1)], [payload("b")])
+    writer.flush()
+    assert not index._needs_reload()
+    assert ids_of(index.search(axis(0), top_k=1)) == ["a"]
+
+
+def test_dimension_change_recreates(index):
+    index.upsert(["a"], [axis(0)], [payload("a")])
+    index.flush()
+    index.ensure_collection(embedding_dim=8)
+    assert index.search([1.0] * 8) == []
+
+
+def test_scroll_points(index):
+    index.upsert(["a", "b"], [axis(0), axis(1)], [payload("a"), payload("b")])
+    index.flush()
+    points = asyncio.run(LocalVectorService().scroll_points_async())
+    assert [(pid, p["content"]) for pid, p in points] == [("a", "a"), ("b", "b")]
@@ -0,0 +1,158 @@
+import asyncio
+
+import pytest
+
+from app.core import resilience
+from app.core.resilience import CircuitBreaker, CircuitOpenError, DeadlineExceeded, call_with_policy, start_turn
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(resilience.time, "monotonic", clock)
+    return clock
+
+
+class Flaky:
+    """Async callable that raises the queued errors, then returns "ok"."""
+
+    def __init__(self, *errors: BaseException, delay: float = 0.0) -> None:
+        self.errors = list(errors)
+        self.delay = delay
+        self.calls = 0
+
+    async def __call__(self) -> str:
+        self.calls += 1
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.errors:
+            raise self.errors.pop(0)
+        return "ok"
+
+
+def test_breaker_opens_after_threshold(clock):
+    breaker = CircuitBreaker("dep", threshold=3, reset_seconds=10)
+    for _ in range(2):
+        breaker.before_call()
+        breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.record_failure()
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_success_resets_failure_count(clock):
+    breaker = CircuitBreaker("dep", threshold=2, reset_seconds=10)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == "closed"
+
+
+def test_half_open_allows_a_single_trial(clock):
+    breaker = CircuitBreaker("dep", threshold=1, reset_seconds=10)
+    breaker.record_failure()
+    clock.now += 10
+    assert breaker.state == "half_open"
+    breaker.before_call()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    breaker.before_call()
+
+
+def test_failed_trial_reopens(clock):
+    breaker = CircuitBreaker("dep", threshold=1, reset_seconds=10)
+    breaker.record_failure()
+    clock.now += 10
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    clock.now += 9
+    assert breaker.state == "open"
+    clock.now += 1
+    assert breaker.state == "half_open"
+
+
+def test_released_trial_lets_the_next_call_through(clock):
+    breaker = CircuitBreaker("dep", threshold=1, reset_seconds=10)
+    breaker.record_failure()
+    clock.now += 10
+    breaker.before_call()
+    breaker.release_trial()
+    assert breaker.state == "half_open"
+    breaker.before_call()
+
+
+def test_lost_trial_is_replaced_after_reset(clock):
+    breaker = CircuitBreaker("dep", threshold=1, reset_seconds=10)
+    breaker.record_failure()
+    clock.now += 10
+    breaker.before_call()  # never reports back
+    clock.now += 10
+    breaker.before_call()
+
+
+def test_zero_threshold_never_opens():
+    breaker = CircuitBreaker("dep", threshold=0, reset_seconds=10)
+    for _ in range(5):
+        breaker.record_failure()
+    breaker.before_call()
+    assert breaker.state == "closed"
+
+
+def test_policy_retries_transient_errors():
+    breaker = CircuitBreaker("dep", threshold=5, reset_seconds=10)
+    fn = Flaky(ConnectionError("reset"))
+    assert asyncio.run(call_with_policy(fn, breaker, timeout=1.0, attempts=2)) == "ok"
+    assert fn.calls == 2
+    assert breaker._failures == 0
+
+
+def test_policy_gives_up_after_attempts():
+    breaker = CircuitBreaker("dep", threshold=5, reset_seconds=10)
+    fn = Flaky(ConnectionError("a"), ConnectionError("b"))
+    with pytest.raises(ConnectionError):
+        asyncio.run(call_with_policy(fn, breaker, timeout=1.0, attempts=2))
+    assert fn.calls == 2
+    assert breaker._failures == 2
+
+
+def test_policy_does_not_retry_client_errors():
+    breaker = CircuitBreaker("dep", threshold=1, reset_seconds=10)
+    fn = Flaky(ValueError("bad request"))
+    with pytest.raises(ValueError):
+        asyncio.run(call_with_policy(fn, breaker, timeout=1.0, attempts=3))
+    assert fn.calls == 1
+    assert breaker.state == "closed"
+
+
+def test_policy_turn_deadline_is_not_a_dependency_failure():
+    breaker = CircuitBreaker("dep", threshold=1, reset_seconds=10)
+
+    async def turn():
+        start_turn(0.05)
+        return await call_with_policy(Flaky(delay=1.0), breaker, timeout=5.0, attempts=3)
+
+    with pytest.raises(DeadlineExceeded):
+        asyncio.run(turn())
+    assert breaker.state == "closed"
+    assert breaker._failures == 0
+
+
+def test_policy_own_timeout_counts_as_failure():
+    breaker = CircuitBreaker("dep", threshold=1, reset_seconds=10)
+    with pytest.raises(asyncio.TimeoutError) as exc:
+        asyncio.run(call_with_policy(Flaky(delay=1.0), breaker, timeout=0.05, attempts=1))
+    assert not isinstance(exc.value, DeadlineExceeded)
+    assert breaker.state == "open"
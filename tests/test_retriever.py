@@ -0,0 +1,94 @@
+import asyncio
+
+import pytest
+
+from app.core.config import Settings
+from app.core.resilience import CircuitBreaker
+from app.rag import retriever as retriever_module
+from app.rag.bm25 import BM25Index
+from app.rag.retriever import Retriever
+
+DOCS = {
+    "fastapi": "Rahul built a voice assistant with FastAPI and Qdrant.",
+    "ml": "Rahul trained machine learning models in PyTorch for speech recognition.",
+    "hobby": "Outside work Rahul plays chess and cricket.",
+}
+
+
+class FakeEmbeddings:
+    async def embed_text_async(self, text: str, is_query: bool = False) -> list[float]:
+        return [1.0]
+
+
+class FakeStore:
+    """Dense search returning canned (id, score) hits for each query, filtered by the threshold."""
+
+    def __init__(self, hits: dict[str, list[tuple[str, float]]], error: Exception | None = None) -> None:
+        self.hits = hits
+        self.error = error
+        self.query = ""
+
+    async def search_async(self, query_vector, top_k: int = 5, score_threshold=None):
+        if self.error is not None:
+            raise self.error
+        return [
+            {"id": pid, "score": score, "content": DOCS[pid], "metadata": {}}
+            for pid, score in self.hits.get(self.query, [])[:top_k]
+            if score_threshold is None or score >= score_threshold
+        ]
+
+
+@pytest.fixture(autouse=True)
+def fresh_breaker(monkeypatch):
+    monkeypatch.setattr(retriever_module, "get_breaker", lambda name: CircuitBreaker(name, 5, 30))
+
+
+@pytest.fixture
+def bm25(tmp_path):
+    index = BM25Index(tmp_path / "kb.json")
+    for doc_id, content in DOCS.items():
+        index.add(doc_id, content, {})
+    index.save()
+    return BM25Index(index.path).load()
+
+
+def retrieve(store: FakeStore, bm25, query: str, hybrid: bool = True) -> list[dict]:
+    settings = Settings(hybrid_search=hybrid, rag_top_k=2, rag_score_threshold=0.3, retry_attempts=1)
+    retriever = Retriever(settings, embedding_svc=FakeEmbeddings(), vector_svc=store, bm25=bm25)
+    store.query = query
+    return asyncio.run(retriever.retrieve(query))
+
+
+def test_dense_only_without_hybrid(bm25):
+    store = FakeStore({"voice assistant": [("fastapi", 0.8), ("ml", 0.2)]})
+    results = retrieve(store, bm25, "voice assistant", hybrid=False)
+    assert [r["id"] for r in results] == ["fastapi"]
+
+
+def test_fuses_dense_and_lexical_hits(bm25):
+    store = FakeStore({"speech models in pytorch": [("fastapi", 0.5), ("ml", 0.45)]})
+    results = retrieve(store, bm25, "speech models in pytorch")
+    # BM25 ranks "ml" first, so fusion lifts it over the top dense hit
+    assert [r["id"] for r in results] == ["ml", "fastapi"]
+    assert all("rrf_score" in r for r in results)
+    assert results[0]["score"] == 0.45
+
+
+def test_off_topic_query_gets_no_context(bm25):
+    # "rahul" matches every chunk lexically, but nothing is semantically close
+    store = FakeStore({"what is rahul's favourite weather": [("hobby", 0.1)]})
+    assert retrieve(store, bm25, "what is rahul's favourite weather") == []
+
+
+def test_dense_failure_falls_back_to_covering_lexical_hits(bm25):
+    store = FakeStore({}, error=ConnectionError("qdrant down"))
+    results = retrieve(store, bm25, "chess and cricket")
+    assert [r["id"] for r in results] == ["hobby"]
+    assert results[0]["coverage"] == 1.0
+
+
+def test_dense_failure_with_off_topic_query_raises(bm25):
+    store = FakeStore({}, error=ConnectionError("qdrant down"))
+    with pytest.raises(ConnectionError):
+        # Only "rahul" of three query terms matches: too little to count as on-topic
+        retrieve(store, bm25, "rahul weather forecast")
@@ -0,0 +1,95 @@
+import asyncio
+
+import numpy as np
+
+from app.core.config import Settings
+from app.voice import session as session_module
+from app.voice.session import PCMRingBuffer, VoiceSession
+
+
+def ramp(start: int, stop: int) -> np.ndarray:
+    return np.arange(start, stop, dtype=np.int16)
+
+
+def test_write_within_capacity():
+    buf = PCMRingBuffer(8)
+    buf.write(ramp(0, 5))
+    assert len(buf) == 5 and not buf.full
+    np.testing.assert_array_equal(buf.read(), ramp(0, 5))
+
+
+def test_wraparound_keeps_newest_samples():
+    buf = PCMRingBuffer(8)
+    buf.write(ramp(0, 5))
+    buf.write(ramp(5, 11))
+    assert buf.full
+    np.testing.assert_array_equal(buf.read(), ramp(3, 11))
+    buf.write(ramp(11, 14))
+    np.testing.assert_array_equal(buf.read(), ramp(6, 14))
+
+
+def test_write_larger_than_capacity():
+    buf = PCMRingBuffer(8)
+    buf.write(ramp(0, 3))
+    buf.write(ramp(3, 23))
+    np.testing.assert_array_equal(buf.read(), ramp(15, 23))
+    buf.write(ramp(23, 25))
+    np.testing.assert_array_equal(buf.read(), ramp(17, 25))
+
+
+def test_keep_last_and_clear():
+    buf = PCMRingBuffer(8)
+    buf.write(ramp(0, 11))
+    buf.keep_last(3)
+    np.testing.assert_array_equal(buf.read(), ramp(8, 11))
+    buf.keep_last(10)
+    assert len(buf) == 3
+    buf.write(ramp(11, 20))
+    np.testing.assert_array_equal(buf.read(), ramp(12, 20))
+    buf.clear()
+    assert len(buf) == 0 and buf.read().size == 0
+
+
+class _Socket:
+    scope: dict = {}
+    client = None
+
+    def __init__(self) -> None:
+        self.sent = []
+
+    async def send_text(self, text: str) -> None:
+        self.sent.append(text)
+
+
+def test_one_partial_in_flight_at_a_time(monkeypatch):
+    calls = []
+
+    async def transcribe(wav: bytes) -> str:
+        calls.append(wav)
+        await asyncio.sleep(0.01)
+        return ""
+
+    monkeypatch.setattr(session_module, "transcribe_bytes_async", transcribe)
+    settings = Settings(voice_ws_partials=True)
+
+    async def main():
+        session = VoiceSession(_Socket(), chain=None, settings=settings)
+        session._buffer.write(ramp(0, 100))
+        session._start_partial()
+        first = session._partial
+        session._start_partial()
+        assert session._partial is first
+        await first
+        session._start_partial()
+        assert session._partial is not first
+        await session._partial
+
+    asyncio.run(main())
+    assert len(calls) == 2
+
+
+def test_partials_off_by_default():
+    session = VoiceSession(_Socket(), chain=None, settings=Settings())
+    tone = (8000 * np.sin(np.arange(16000) / 5)).astype(np.int16)
+    events = session._vad.feed(np.concatenate([tone, np.zeros(4000, dtype=np.int16)]))
+    assert events == ["start"]
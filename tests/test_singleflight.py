@@ -0,0 +1,79 @@
+import asyncio
+
+import pytest
+
+from app.utils.singleflight import SingleFlight, TokenBroadcast
+
+
+def test_concurrent_calls_share_one_computation():
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return calls
+
+    async def main():
+        flight = SingleFlight()
+        results = await asyncio.gather(*(flight.do("k", compute) for _ in range(5)))
+        assert not flight.in_flight("k")
+        return results, await flight.do("k", compute)
+
+    results, later = asyncio.run(main())
+    assert results == [1] * 5
+    assert later == 2
+
+
+def test_cancelled_caller_does_not_cancel_the_others():
+    async def compute():
+        await asyncio.sleep(0.02)
+        return "done"
+
+    async def main():
+        flight = SingleFlight()
+        first = asyncio.create_task(flight.do("k", compute))
+        second = asyncio.create_task(flight.do("k", compute))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(main()) == "done"
+
+
+async def _tokens(*tokens, error=None):
+    for token in tokens:
+        await asyncio.sleep(0)
+        yield token
+    if error is not None:
+        raise error
+
+
+async def _collect(stream):
+    return [token async for token in stream]
+
+
+def test_broadcast_replays_to_late_subscribers():
+    done = []
+
+    async def main():
+        broadcast = TokenBroadcast(_tokens("a", "b", "c"), on_done=lambda: done.append(True))
+        first = asyncio.create_task(_collect(broadcast.subscribe()))
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        late = await _collect(broadcast.subscribe())
+        return await first, late
+
+    assert asyncio.run(main()) == (["a", "b", "c"], ["a", "b", "c"])
+    assert done == [True]
+
+
+def test_broadcast_error_reaches_every_subscriber():
+    async def main():
+        broadcast = TokenBroadcast(_tokens("a", error=RuntimeError("llm down")))
+        return await asyncio.gather(
+            _collect(broadcast.subscribe()), _collect(broadcast.subscribe()), return_exceptions=True
+        )
+
+    results = asyncio.run(main())
+    assert all(isinstance(r, RuntimeError) for r in results)
@@ -0,0 +1,83 @@
+import asyncio
+import sys
+import types
+
+import numpy as np
+import pytest
+
+from app.core.config import Settings
+from app.voice import tts
+from app.voice.tts_backends import EdgeTTSBackend, PiperTTSBackend, wav_header
+from app.voice.vad import decode_wav
+
+MISSING_FFMPEG = "no-such-ffmpeg-binary"
+
+
+def test_wav_header_is_readable():
+    pcm = np.arange(-50, 50, dtype="<i2").tobytes()
+    samples, rate = decode_wav(wav_header(22050, len(pcm)) + pcm)
+    assert rate == 22050
+    np.testing.assert_allclose(samples[:, 0] * 32768, np.arange(-50, 50))
+
+
+def test_native_formats_need_no_ffmpeg():
+    settings = Settings(tts_format="", tts_ffmpeg_path=MISSING_FFMPEG)
+    assert EdgeTTSBackend(settings).format.name == "mp3"
+    piper = PiperTTSBackend(settings)
+    assert piper.format.name == "wav"
+    assert piper.media_type == "audio/wav"
+
+
+@pytest.mark.parametrize("backend, fmt", [(EdgeTTSBackend, "opus"), (PiperTTSBackend, "mp3")])
+def test_transcoding_without_ffmpeg_fails_at_construction(backend, fmt):
+    with pytest.raises(RuntimeError, match="needs ffmpeg"):
+        backend(Settings(tts_format=fmt, tts_ffmpeg_path=MISSING_FFMPEG))
+
+
+def test_unknown_format():
+    with pytest.raises(ValueError):
+        EdgeTTSBackend(Settings(tts_format="flac"))
+
+
+def test_piper_streams_wav_at_the_voice_rate(monkeypatch):
+    class Voice:
+        config = types.SimpleNamespace(sample_rate=22050)
+
+        @classmethod
+        def load(cls, path):
+            return cls()
+
+        def synthesize_stream_raw(self, text):
+            for sentence in text.split("."):
+                if sentence:
+                    yield np.full(100, len(sentence), dtype="<i2").tobytes()
+
+    monkeypatch.setitem(sys.modules, "piper", types.SimpleNamespace(PiperVoice=Voice))
+    backend = PiperTTSBackend(Settings(tts_pool_size=1))
+
+    async def main():
+        chunks = [chunk async for chunk in backend.stream("Hi.There.")]
+        await backend.aclose()
+        return chunks
+
+    chunks = asyncio.run(main())
+    assert len(chunks) == 3
+    data = b"".join(chunks)
+    assert data[:4] == b"RIFF"
+    samples, rate = decode_wav(wav_header(22050, len(data) - 44) + data[44:])
+    assert rate == 22050 and len(samples) == 200
+
+
+@pytest.mark.parametrize("fmt, media", [("pcm", "audio/wav"), ("mp3", "audio/mpeg")])
+def test_http_audio_is_playable(monkeypatch, fmt, media):
+    # any existing binary passes the ffmpeg check; nothing is transcoded here
+    settings = Settings(tts_format=fmt, tts_ffmpeg_path=sys.executable)
+    monkeypatch.setattr(tts, "get_tts_backend", lambda: EdgeTTSBackend(settings))
+    monkeypatch.setattr(tts, "get_settings", lambda: settings)
+    pcm = np.zeros(480, dtype="<i2").tobytes()
+    assert tts.file_media_type() == media
+    if fmt == "pcm":
+        samples, rate = decode_wav(tts.as_file(pcm))
+        assert (rate, len(samples)) == (settings.tts_sample_rate, 480)
+    else:
+        assert tts.as_file(b"mp3 bytes") == b"mp3 bytes"
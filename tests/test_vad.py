@@ -0,0 +1,141 @@
+import struct
+
+import numpy as np
+import pytest
+
+from app.voice.vad import (
+    STT_SAMPLE_RATE,
+    EndOfSpeechDetector,
+    decode_wav,
+    encode_wav,
+    prepare_for_stt,
+    resample,
+    speech_bounds,
+)
+
+RATE = 16000
+FRAME = RATE * 20 // 1000
+
+
+def tone(seconds: float, rate: int = RATE, amplitude: float = 0.3) -> np.ndarray:
+    t = np.arange(int(rate * seconds)) / rate
+    return (amplitude * 32767 * np.sin(2 * np.pi * 220 * t)).astype(np.int16)
+
+
+def silence(seconds: float, rate: int = RATE) -> np.ndarray:
+    return np.zeros(int(rate * seconds), dtype=np.int16)
+
+
+def detector(**kwargs) -> EndOfSpeechDetector:
+    options = dict(threshold=0.02, min_speech_ms=120, silence_ms=600, frame_ms=20, pause_ms=250)
+    options.update(kwargs)
+    return EndOfSpeechDetector(RATE, **options)
+
+
+def events_by_frame(vad: EndOfSpeechDetector, samples: np.ndarray) -> list[tuple[int, str]]:
+    out = []
+    for i in range(0, len(samples), FRAME):
+        out += [(i // FRAME, event) for event in vad.feed(samples[i:i + FRAME])]
+    return out
+
+
+def wav_bytes(fmt_tag: int, channels: int, rate: int, bits: int, data: bytes) -> bytes:
+    block = channels * bits // 8
+    fmt = struct.pack("<HHIIHH", fmt_tag, channels, rate, rate * block, block, bits)
+    body = b"WAVE" + b"fmt " + struct.pack("<I", len(fmt)) + fmt + b"data" + struct.pack("<I", len(data)) + data
+    return b"RIFF" + struct.pack("<I", len(body)) + body
+
+
+def test_start_pause_end_timing():
+    audio = np.concatenate([silence(0.2), tone(1.0), silence(0.3), tone(0.2), silence(1.0)])
+    vad = detector()
+    events = events_by_frame(vad, audio)
+    # speech starts on the 6th voiced frame (120 ms); 12 silent frames are a pause, 30 end it
+    assert events == [(10 + 5, "start"), (60 + 11, "pause"), (85 + 11, "pause"), (85 + 29, "end")]
+    assert vad.voiced_frames == 50 + 10
+    assert not vad.in_speech
+
+
+def test_partial_frames_are_carried_over():
+    audio = np.concatenate([silence(0.2), tone(0.5), silence(0.7)])
+    whole = detector().feed(audio)
+    vad = detector()
+    pieces = [vad.feed(chunk) for chunk in np.array_split(audio, 37)]
+    assert [e for events in pieces for e in events] == whole == ["start", "pause", "end"]
+
+
+def test_short_blip_is_not_speech():
+    assert detector().feed(np.concatenate([tone(0.08), silence(1.0)])) == []
+
+
+def test_pause_disabled_when_not_shorter_than_silence():
+    assert detector(pause_ms=0).feed(np.concatenate([tone(0.5), silence(0.7)])) == ["start", "end"]
+    assert detector(pause_ms=600).feed(np.concatenate([tone(0.5), silence(0.7)])) == ["start", "end"]
+
+
+def test_force_end():
+    vad = detector()
+    vad.feed(tone(0.3))
+    assert vad.force_end() == "end"
+    assert vad.force_end() is None
+
+
+def test_decode_wav_roundtrip_int16():
+    samples = tone(0.1)
+    decoded, rate = decode_wav(encode_wav(samples, RATE))
+    assert rate == RATE
+    assert decoded.shape == (len(samples), 1)
+    np.testing.assert_allclose(decoded[:, 0], samples / 32768.0, atol=1e-6)
+
+
+@pytest.mark.parametrize(
+    "tag, bits, encode",
+    [
+        (1, 8, lambda x: ((x * 127) + 128).astype(np.uint8).tobytes()),
+        (1, 24, lambda x: b"".join(struct.pack("<i", int(v * 8388607))[:3] for v in x)),
+        (1, 32, lambda x: (x * 2147483647).astype("<i4").tobytes()),
+        (3, 32, lambda x: x.astype("<f4").tobytes()),
+        (3, 64, lambda x: x.astype("<f8").tobytes()),
+    ],
+)
+def test_decode_wav_encodings(tag, bits, encode):
+    x = np.array([0.0, 0.5, -0.5, 0.25, -0.75])
+    decoded, rate = decode_wav(wav_bytes(tag, 1, 8000, bits, encode(x)))
+    assert rate == 8000
+    np.testing.assert_allclose(decoded[:, 0], x, atol=1.0 / 64)
+
+
+def test_decode_wav_stereo_and_errors():
+    frames = np.array([[0.5, -0.5], [0.25, 0.25]], dtype="<f4")
+    decoded, _ = decode_wav(wav_bytes(3, 2, 44100, 32, frames.tobytes()))
+    np.testing.assert_allclose(decoded, frames)
+    with pytest.raises(ValueError):
+        decode_wav(b"ID3 not a wav file")
+    with pytest.raises(ValueError):
+        decode_wav(wav_bytes(2, 1, 8000, 4, b"\x00\x00"))  # ADPCM
+
+
+def test_resample_length():
+    assert len(resample(np.zeros(44100, dtype=np.float32), 44100, STT_SAMPLE_RATE)) == STT_SAMPLE_RATE
+    assert len(resample(np.zeros(8000, dtype=np.float32), 8000, STT_SAMPLE_RATE)) == STT_SAMPLE_RATE
+
+
+def test_speech_bounds_pads_and_rejects_silence():
+    samples = np.concatenate([silence(1.0), tone(0.5), silence(1.0)]) / 32768.0
+    start, end = speech_bounds(samples, RATE, 0.01, padding_ms=200)
+    assert start == pytest.approx(RATE * 0.8, abs=FRAME)
+    assert end == pytest.approx(RATE * 1.7, abs=FRAME)
+    assert speech_bounds(silence(1.0) / 32768.0, RATE, 0.01) is None
+
+
+def test_prepare_for_stt_trims_and_resamples():
+    stereo = np.repeat(np.concatenate([silence(1.5, 44100), tone(0.5, 44100), silence(1.5, 44100)])[:, None], 2, axis=1)
+    prepared = prepare_for_stt(wav_bytes(1, 2, 44100, 16, stereo.astype("<i2").tobytes()), threshold=0.01)
+    samples, rate = decode_wav(prepared)
+    assert rate == STT_SAMPLE_RATE and samples.shape[1] == 1
+    assert len(samples) / rate == pytest.approx(0.5 + 2 * 0.2, abs=0.05)
+
+
+def test_prepare_for_stt_silence_and_passthrough():
+    assert prepare_for_stt(encode_wav(silence(1.0), RATE), threshold=0.01) is None
+    assert prepare_for_stt(b"OggS opus bytes", threshold=0.01) == b"OggS opus bytes"
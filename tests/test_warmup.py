@@ -0,0 +1,93 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.core import warmup
+from app.core.config import Settings
+from app.core.warmup import WarmupState, run_warmup
+from app.rag import bm25
+from app.voice import stt, tts
+
+
+async def ok() -> bool:
+    return True
+
+
+class Flaky:
+    def __init__(self, failures: int) -> None:
+        self.failures = failures
+        self.calls = 0
+
+    async def __call__(self) -> bool:
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise ConnectionError("connection refused")
+        return True
+
+
+@pytest.fixture(autouse=True)
+def fast_retries(monkeypatch):
+    monkeypatch.setattr(warmup, "RETRY_BASE_SECONDS", 0.01)
+    monkeypatch.setattr(stt, "warmup", ok)
+    monkeypatch.setattr(tts, "warmup", ok)
+
+
+def services(vector_store, bm25_check=ok, llm=ok):
+    return SimpleNamespace(
+        settings=Settings(warmup_timeout_seconds=5, warmup_retry_max_seconds=0.02),
+        embeddings=SimpleNamespace(warmup_async=ok),
+        vectors=SimpleNamespace(health_check_async=vector_store),
+        llm=SimpleNamespace(warmup=llm),
+    )
+
+
+def test_ready_when_everything_warms_up(monkeypatch):
+    monkeypatch.setattr(bm25, "ensure_bm25_index", lambda vectors: ok())
+    state = asyncio.run(run_warmup(services(ok), WarmupState()))
+    assert state.ready and state.failed == []
+
+
+def test_non_critical_failure_does_not_block_readiness(monkeypatch):
+    monkeypatch.setattr(bm25, "ensure_bm25_index", lambda vectors: ok())
+    llm = Flaky(failures=100)
+    state = asyncio.run(run_warmup(services(ok, llm=llm), WarmupState()))
+    assert state.ready and state.failed == ["llm"]
+    assert llm.calls == 1
+
+
+def test_critical_failure_is_retried_until_ready(monkeypatch):
+    vector_store = Flaky(failures=3)
+    rebuild = Flaky(failures=3)
+    monkeypatch.setattr(bm25, "ensure_bm25_index", lambda vectors: rebuild())
+    state = WarmupState()
+
+    async def main():
+        task = asyncio.create_task(run_warmup(services(vector_store), state))
+        await asyncio.sleep(0)
+        while state.finished_at is None:
+            await asyncio.sleep(0.001)
+        assert not state.ready
+        assert state.to_dict()["failed"] == ["vector_store", "bm25"]
+        assert state.components["vector_store"].error == "connection refused"
+        await asyncio.wait_for(task, 5)
+
+    asyncio.run(main())
+    assert state.ready and state.failed == []
+    assert vector_store.calls == 4 and rebuild.calls == 4
+    assert state.components["vector_store"].error is None
+
+
+def test_retries_stop_when_cancelled(monkeypatch):
+    monkeypatch.setattr(bm25, "ensure_bm25_index", lambda vectors: ok())
+    vector_store = Flaky(failures=10**6)
+
+    async def main():
+        task = asyncio.create_task(run_warmup(services(vector_store), WarmupState()))
+        await asyncio.sleep(0.1)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(main())
+    assert vector_store.calls > 1